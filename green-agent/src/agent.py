@@ -1,18 +1,30 @@
-import json
-import re
-from pathlib import Path
-from typing import Any
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Annotated, Any, Callable, Literal
 import logging
 
-from pydantic import BaseModel, HttpUrl, ValidationError
+from pydantic import BaseModel, ConfigDict, Field, HttpUrl, ValidationError
 from a2a.server.tasks import TaskUpdater
 from a2a.types import Message, TaskState, Part, TextPart, DataPart
 from a2a.utils import get_message_text, new_agent_text_message
 
-from messenger import Messenger
+from checkpoint import CheckpointJournal
+from concurrency import DEFAULT_LATENCY_TOLERANCE, DEFAULT_MAX_ADAPTIVE_CONCURRENCY, AdaptiveLimiter
+from dataset import QAPair, load_dataset
+from extraction import has_final_answer
+from grading import DEFAULT_TOLERANCE, GradingPolicy, grade_results, grading_policy
+from messenger import DEFAULT_RESET_TIMEOUT, DEFAULT_TIMEOUT, CircuitOpenError, Messenger, RetryPolicy
+from metrics import REGISTRY, QuestionTiming, RunMetrics
+from partial_results import PartialResultStream
+from result_format import compact_results
+from scheduler import FairScheduler
 
 logger = logging.getLogger(__name__)
 
+# Number of questions in flight at once; 1 keeps the original sequential loop
+DEFAULT_MAX_CONCURRENCY = 1
+
 
 class EvalRequest(BaseModel):
     """Request format sent by the AgentBeats platform to green agents."""
@@ -20,34 +32,78 @@ class EvalRequest(BaseModel):
     config: dict[str, Any]
 
 
-def extract_number(text: str):
-    """
-    Extract the first number (integer or float) from text.
-    Supports:
-    - integers (e.g., "22")
-    - floats (e.g., "22.5", "-3.14")
-    Returns:
-        float if a number is found
-        -1 if no number is found
+class RunConfig(BaseModel):
+    """Evaluation options read from `EvalRequest.config`.
+
+    Question selection keys (num_tasks, task_ids, ...) are handled by
+    `QADataset.select_from_config`; unknown keys are ignored.
     """
-    match = re.search(r'-?\d+(?:\.\d+)?', str(text))
-    return float(match.group()) if match else -1
+    model_config = ConfigDict(extra="ignore")
+
+    # Questions in flight per participant, optionally overridden per role
+    max_concurrency: int = Field(DEFAULT_MAX_CONCURRENCY, ge=1)
+    participant_concurrency: dict[str, Annotated[int, Field(ge=1)]] = {}
+    # Questions in flight across all participants (None = no global limit)
+    max_total_concurrency: int | None = Field(None, ge=1)
+    # "adaptive" starts at max_concurrency and adjusts it per participant (AIMD)
+    concurrency: Literal["fixed", "adaptive"] = "fixed"
+    max_adaptive_concurrency: int = Field(DEFAULT_MAX_ADAPTIVE_CONCURRENCY, ge=1)
+    latency_tolerance: float = Field(DEFAULT_LATENCY_TOLERANCE, gt=1)
+    checkpoint: bool = True
+    resume: bool = False
+    stream_every: int = Field(0, ge=0)
+    stream_interval: float | None = Field(None, gt=0)
+    request_timeout: float = Field(DEFAULT_TIMEOUT, gt=0)
+    max_retries: int = Field(2, ge=0)
+    # Consecutive failed questions before the assessment is aborted (0 = never)
+    circuit_breaker_threshold: int = Field(10, ge=0)
+    # Seconds before a tripped breaker lets one trial question through
+    circuit_breaker_reset: float = Field(DEFAULT_RESET_TIMEOUT, gt=0)
+    # Read streaming purple agents event by event, and stop once the answer is in
+    streaming: bool = False
+    stop_on_answer: bool = True
+    grading: Literal["relative", "absolute", "unit_normalized"] = "relative"
+    tolerance: float = Field(DEFAULT_TOLERANCE, ge=0)
+    # "compact" references questions by id + dataset hash instead of repeating them
+    result_format: Literal["verbose", "compact"] = "verbose"
+    compress_results: bool = False
+
+
+@dataclass
+class ParticipantRun:
+    """State of one purple agent being evaluated within an assessment."""
+    role: str
+    url: str
+    semaphore: asyncio.Semaphore | AdaptiveLimiter
+    metrics: RunMetrics
+    stream: PartialResultStream
+    journal: CheckpointJournal | None
+    answered: dict[int, dict]
+    tasks: list[asyncio.Task] = field(default_factory=list)
+    aborted: BaseException | None = None
+
+    @property
+    def limiter(self) -> AdaptiveLimiter | None:
+        return self.semaphore if isinstance(self.semaphore, AdaptiveLimiter) else None
+
 
 class Agent:
-    # Purple Agent role
-    required_roles: list[str] = ["agent"]
+    # Purple Agent roles; any number of participants is evaluated (the
+    # leaderboard scenario has a single "agent")
+    required_roles: list[str] = []
     # No config needed
     required_config_keys: list[str] = []
 
     def __init__(self):
         self.messenger = Messenger()
-        
-        # Load questions
-        qa_file = Path(__file__).parent / "qa_pairs.json"
-        with open(qa_file) as f:
-            self.qa_pairs = json.load(f)["qa_pairs"]
+
+        # Questions are loaded once per process and shared by every Agent
+        self.dataset = load_dataset()
 
     def validate_request(self, request: EvalRequest) -> tuple[bool, str]:
+        if not request.participants:
+            return False, "No participants to evaluate"
+
         missing_roles = set(self.required_roles) - set(request.participants.keys())
         if missing_roles:
             return False, f"Missing roles: {missing_roles}"
@@ -61,6 +117,10 @@ class Agent:
     async def run(self, message: Message, updater: TaskUpdater) -> None:
         """Run ETF benchmark evaluation.
 
+        If the run is cancelled, questions in flight are cancelled and the
+        answers collected so far are graded and sent as a "Partial Results"
+        artifact before the cancellation propagates.
+
         Args:
             message: The incoming assessment request
             updater: Report progress and results
@@ -78,70 +138,298 @@ class Agent:
             await updater.reject(new_agent_text_message(f"Invalid request: {e}"))
             return
 
-        # Get Purple Agent URL
-        agent_url = str(request.participants["agent"])
-        
-        # Track results
-        results = []
-        correct = 0
-        total = len(self.qa_pairs)
-
-        # Loop through questions
-        for qa in self.qa_pairs:
-            qid = qa["id"]
-            question = qa["question"]
-            ground_truth = qa["answer"]
-            
-            # Update status
-            await updater.update_status(
-                TaskState.working,
-                new_agent_text_message(f"Question {qid}/{total}...")
-            )
+        # Parse options and select the questions to ask (num_tasks, task_ids, providers, sample)
+        try:
+            config = RunConfig.model_validate(request.config)
+            qa_pairs = self.dataset.select_from_config(request.config)
+        except (ValidationError, ValueError) as e:
+            await updater.reject(new_agent_text_message(f"Invalid config: {e}"))
+            return
+
+        total = len(qa_pairs)
+        policy = grading_policy(config.grading, config.tolerance)
+        self.messenger.configure(
+            retry_policy=RetryPolicy(max_attempts=config.max_retries + 1, request_timeout=config.request_timeout),
+            failure_threshold=config.circuit_breaker_threshold,
+            reset_timeout=config.circuit_breaker_reset,
+            streaming=config.streaming,
+        )
+        answer_ready = has_final_answer if config.stop_on_answer else None
+        # A lone "agent" participant keeps the original single-agent output
+        single = list(request.participants) == ["agent"]
+        participants = [
+            self.prepare_participant(role, str(url), config, qa_pairs, updater, policy, single)
+            for role, url in request.participants.items()
+        ]
+        for participant in participants:
+            if participant.answered:
+                await updater.update_status(
+                    TaskState.working,
+                    new_agent_text_message(
+                        f"Resuming {participant.role}: {len(participant.answered)}/{total} questions already answered"
+                    )
+                )
+                for qa in qa_pairs:
+                    if qa.id in participant.answered:
+                        await participant.stream.add(participant.answered[qa.id])
+
+        # Per-participant limits bound each purple agent; the scheduler
+        # shares the optional global limit round-robin between them
+        scheduler = FairScheduler(config.max_total_concurrency)
+
+        async def evaluate(participant: ParticipantRun, qa: QAPair) -> dict:
+            async with participant.semaphore, scheduler.slot(participant.role):
+                # Update status
+                prefix = "" if single else f"[{participant.role}] "
+                await updater.update_status(
+                    TaskState.working,
+                    new_agent_text_message(f"{prefix}Question {qa.id}/{total}...")
+                )
+                result = await self.evaluate_question(
+                    qa, participant.url, participant.metrics, answer_ready, participant.limiter
+                )
+            # Failed exchanges are not journaled so a resume re-asks them
+            if participant.journal and "error" not in result:
+                participant.journal.record(result)
+            await participant.stream.add(result)
+            return result
 
-            # Send question to Purple Agent
+        async def run_participant(participant: ParticipantRun) -> None:
+            # Tasks are kept in question order. If this purple agent is clearly
+            # down its breaker trips and only its questions are cancelled.
+            pending = [qa for qa in qa_pairs if qa.id not in participant.answered]
             try:
-                logger.info(f"Sending to Purple Agent at: {agent_url}")
-                response = await self.messenger.talk_to_agent(question, agent_url)
-                logger.info(f"Got response: {response}")
-                agent_answer = extract_number(response)
-            except Exception as e:
-                logger.error(f"Error talking to agent: {e}", exc_info=True)
-                agent_answer = -1
-
-            # Check if correct with ±10% tolerance
-            if ground_truth != 0:
-                relative_error = abs(agent_answer - ground_truth) / abs(ground_truth)
-                is_correct = relative_error <= 0.10
-            else:
-                # Ground truth is zero → must be exactly zero
-                is_correct = agent_answer == 0
+                async with asyncio.TaskGroup() as tg:
+                    participant.tasks = [tg.create_task(evaluate(participant, qa)) for qa in pending]
+            except* CircuitOpenError as eg:
+                participant.aborted = eg.exceptions[0]
+            finally:
+                participant.metrics.finish()
 
-            if is_correct:
-                correct += 1
+        REGISTRY.assessments += 1
+        REGISTRY.in_flight += 1
+        cancelled = False
+        try:
+            async with asyncio.TaskGroup() as tg:
+                for participant in participants:
+                    tg.create_task(run_participant(participant))
+        except asyncio.CancelledError:
+            # Questions in flight have been cancelled; report what was answered
+            cancelled = True
+        finally:
+            REGISTRY.in_flight -= 1
+            # Release pooled connections once the assessment is over
+            await self.messenger.close()
+            for participant in participants:
+                if participant.journal:
+                    participant.journal.close()
+        for participant in participants:
+            await participant.stream.close()
 
+        if cancelled:
+            text, data = self.results_summary(participants, qa_pairs, policy, config, single)
+            await updater.add_artifact(
+                parts=[
+                    Part(root=TextPart(text=f"Cancelled. {text}")),
+                    Part(root=DataPart(data={**data, "cancelled": True})),
+                ],
+                name="Partial Results",
+            )
+            raise asyncio.CancelledError
 
-            # Store result
-            results.append({
-                "question_id": qid,
-                "question": question,
-                "correct": is_correct,
-                "agent_answer": agent_answer,
-                "ground_truth": ground_truth
-            })
+        for participant in participants:
+            if participant.aborted is not None:
+                logger.error(f"Aborting {participant.role}: {participant.aborted}")
+        if all(p.aborted is not None for p in participants):
+            await updater.failed(new_agent_text_message(
+                "Assessment aborted, "
+                + "; ".join(f"{p.url} appears to be down: {p.aborted}" for p in participants)
+                + ". Answers so far are checkpointed; rerun with resume=true to continue."
+            ))
+            return
 
-        # Calculate pass rate
-        pass_rate = (correct / total) * 100 if total > 0 else 0
+        text, data = self.results_summary(participants, qa_pairs, policy, config, single)
 
         # Return final results as artifact
         await updater.add_artifact(
             parts=[
-                Part(root=TextPart(text=f"Score: {correct}/{total} ({pass_rate:.1f}%)")),
-                Part(root=DataPart(data={
-                    "score": correct,
-                    "total": total,
-                    "pass_rate": round(pass_rate, 2),
-                    "results": results
-                }))
+                Part(root=TextPart(text=text)),
+                Part(root=DataPart(data=data)),
             ],
             name="Result",
-        )
\ No newline at end of file
+        )
+
+    def results_summary(
+        self,
+        participants: list[ParticipantRun],
+        qa_pairs: list[QAPair],
+        policy: GradingPolicy,
+        config: RunConfig,
+        single: bool,
+    ) -> tuple[str, dict]:
+        """Score line(s) and result data of the answers collected so far."""
+        if single:
+            data = self.participant_results(participants[0], qa_pairs, policy, config)
+            text = f"Score: {data['score']}/{data['total']} ({data['pass_rate']:.1f}%)"
+        else:
+            data = self.score_table(participants, qa_pairs, policy, config)
+            text = "\n".join(
+                f"{row['role']}: {row['score']}/{row['total']} ({row['pass_rate']:.1f}%)"
+                + (" - aborted" if row.get("error") else "")
+                for row in data["scores"]
+            )
+        return text, data
+
+    def prepare_participant(
+        self,
+        role: str,
+        url: str,
+        config: RunConfig,
+        qa_pairs: list[QAPair],
+        updater: TaskUpdater,
+        policy: GradingPolicy,
+        single: bool,
+    ) -> ParticipantRun:
+        """Set up the limits, metrics, partial-result stream and checkpoint journal of one purple agent."""
+        # Optionally stream graded results every K questions / T seconds
+        stream = PartialResultStream(
+            updater, len(qa_pairs), every=config.stream_every, interval=config.stream_interval,
+            grade=lambda batch: grade_results(batch, policy),
+            name="Partial Results" if single else f"Partial Results ({role})",
+        )
+
+        # Journal raw answers so an interrupted run can be resumed
+        journal = None
+        answered = {}
+        if config.checkpoint:
+            journal = CheckpointJournal(url, self.dataset.content_hash, role, (qa.id for qa in qa_pairs))
+            if config.resume:
+                answered = journal.load()
+            else:
+                journal.reset()
+
+        limit = config.participant_concurrency.get(role, config.max_concurrency)
+        if config.concurrency == "adaptive":
+            semaphore = AdaptiveLimiter(
+                initial=limit,
+                max_limit=config.max_adaptive_concurrency,
+                latency_tolerance=config.latency_tolerance,
+            )
+        else:
+            semaphore = asyncio.Semaphore(limit)
+        return ParticipantRun(
+            role=role,
+            url=url,
+            semaphore=semaphore,
+            metrics=RunMetrics(),
+            stream=stream,
+            journal=journal,
+            answered=answered,
+        )
+
+    def participant_results(
+        self, participant: ParticipantRun, qa_pairs: list[QAPair], policy: GradingPolicy, config: RunConfig
+    ) -> dict:
+        """Grade one participant's answers and encode them in the configured result format."""
+        total = len(qa_pairs)
+        # An aborted participant only has results for the questions it finished
+        finished = [t for t in participant.tasks if t.done() and not t.cancelled() and t.exception() is None]
+        new_by_id = {r["question_id"]: r for r in (t.result() for t in finished)}
+        results = [participant.answered.get(qa.id) or new_by_id.get(qa.id) for qa in qa_pairs]
+        results = [r for r in results if r is not None]
+
+        # Grade every response in one vectorized pass
+        grading_started = time.perf_counter()
+        grade_results(results, policy)
+        participant.metrics.grading_time += time.perf_counter() - grading_started
+        correct = sum(1 for r in results if r["correct"])
+
+        # Calculate pass rate
+        pass_rate = (correct / total) * 100 if total > 0 else 0
+
+        if config.result_format == "compact":
+            encoded = compact_results(results, self.dataset.content_hash, compress=config.compress_results)
+        else:
+            encoded = {"results": results}
+        data = {
+            "score": correct,
+            "total": total,
+            "pass_rate": round(pass_rate, 2),
+            **encoded,
+            "metrics": participant.metrics.summary(),
+        }
+        if participant.limiter is not None:
+            data["concurrency"] = participant.limiter.summary()
+        return data
+
+    def score_table(
+        self, participants: list[ParticipantRun], qa_pairs: list[QAPair], policy: GradingPolicy, config: RunConfig
+    ) -> dict:
+        """Per-participant results plus a score table ranked by score."""
+        by_role = {p.role: self.participant_results(p, qa_pairs, policy, config) for p in participants}
+        scores = []
+        for participant in participants:
+            row = {
+                "role": participant.role,
+                "url": participant.url,
+                "score": by_role[participant.role]["score"],
+                "total": by_role[participant.role]["total"],
+                "pass_rate": by_role[participant.role]["pass_rate"],
+            }
+            if participant.aborted is not None:
+                row["error"] = f"aborted: {participant.aborted}"
+            scores.append(row)
+        scores.sort(key=lambda row: (-row["score"], row["role"]))
+        return {"total": len(qa_pairs), "scores": scores, "participants": by_role}
+
+    async def evaluate_question(
+        self,
+        qa: QAPair,
+        agent_url: str,
+        metrics: RunMetrics | None = None,
+        answer_ready: Callable[[str], bool] | None = None,
+        limiter: AdaptiveLimiter | None = None,
+    ) -> dict:
+        """Send one question to the Purple Agent and record its raw response.
+
+        `agent_answer` and `correct` are filled in later by `grade_results`.
+        When streaming, `answer_ready` lets the exchange end as soon as the
+        response contains its final answer. The outcome is reported to an
+        adaptive `limiter`.
+        """
+        qid = qa.id
+        question = qa.question
+        ground_truth = qa.answer
+
+        # Send question to Purple Agent
+        error = None
+        response = None
+        timing = QuestionTiming()
+        try:
+            logger.info(f"Sending to Purple Agent at: {agent_url}")
+            # Questions are in flight at the same time, so each gets its own conversation
+            response = await self.messenger.talk_to_agent(
+                question, agent_url, new_conversation=True, timing=timing, answer_ready=answer_ready
+            )
+            logger.info(f"Got response: {response}")
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            logger.error(f"Error talking to agent: {e}", exc_info=True)
+            error = e
+
+        result = {
+            "question_id": qid,
+            "question": question,
+            "correct": None,
+            "agent_answer": None,
+            "ground_truth": ground_truth,
+            "response": response,
+        }
+        if error is not None:
+            result["error"] = str(error)
+        if metrics:
+            metrics.record(timing, error)
+        if limiter:
+            limiter.observe(timing, error)
+        return result
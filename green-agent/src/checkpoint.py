@@ -0,0 +1,71 @@
+"""Append-only checkpoint journal of graded answers, used to resume assessments."""
+import hashlib
+import json
+import logging
+import os
+from collections.abc import Iterable
+from pathlib import Path
+
+from dataset import format_id_ranges
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_CHECKPOINT_DIR = Path(os.environ.get("CHECKPOINT_DIR", "checkpoints"))
+
+
+class CheckpointJournal:
+    """JSONL journal of per-question results for one participant of one assessment.
+
+    Each graded answer is appended as one line as soon as it arrives, so a
+    crashed or cancelled assessment can be resumed by re-asking only the
+    questions that are missing from the journal. The journal is keyed by the
+    participant's role and URL, the dataset hash and the selected question
+    ids, so two roles sharing a URL or two runs over different questions
+    never resume from each other's answers.
+    """
+
+    def __init__(
+        self,
+        participant: str,
+        dataset_hash: str,
+        role: str = "agent",
+        question_ids: Iterable[int] = (),
+        directory: Path = DEFAULT_CHECKPOINT_DIR,
+    ):
+        selection = format_id_ranges(sorted(question_ids))
+        key = hashlib.sha256(f"{role}\n{participant}\n{dataset_hash}\n{selection}".encode()).hexdigest()[:16]
+        self.path = Path(directory) / f"{key}.jsonl"
+        self._file = None
+
+    def load(self) -> dict[int, dict]:
+        """Return recorded results by question id (the latest record wins)."""
+        results = {}
+        if not self.path.exists():
+            return results
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                    results[int(result["question_id"])] = result
+                except (ValueError, KeyError, TypeError):
+                    # A crash can leave a truncated last line behind
+                    logger.warning(f"Skipping malformed checkpoint line in {self.path}")
+        return results
+
+    def record(self, result: dict) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a")
+        self._file.write(json.dumps(result) + "\n")
+        self._file.flush()
+
+    def reset(self) -> None:
+        """Start a fresh journal, discarding earlier records."""
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,142 @@
+"""Adaptive concurrency limit for the questions sent to one purple agent.
+
+`AdaptiveLimiter` is an AIMD controller used in place of a fixed semaphore:
+- additive increase: each window of `limit` healthy answers, while the
+  limit is actually in use, adds one slot
+- multiplicative decrease: a timeout, a 429/503, a task that did not
+  complete, or answers getting much slower (the smoothed latency above
+  `latency_tolerance` times the lowest smoothed latency of the last
+  `BASELINE_WINDOW` answers) scales the limit by `backoff`
+
+The baseline is windowed so that a short run of unusually fast answers
+(cached answers, a warm connection) does not pin it below the latency the
+purple agent normally has for the rest of the run.
+
+Only questions sent after the previous decrease can trigger another one,
+so a burst of failures from one overloaded window backs off once. Every
+change of the limit is recorded for the result data.
+"""
+import time
+from collections import deque
+
+from a2a.client.errors import A2AClientHTTPError, A2AClientTimeoutError
+
+from messenger import AgentResponseError
+from metrics import QuestionTiming
+from scheduler import WaiterQueue
+
+
+DEFAULT_MAX_ADAPTIVE_CONCURRENCY = 64
+DEFAULT_LATENCY_TOLERANCE = 2.0
+DEFAULT_BACKOFF = 0.5
+# Weight of the newest answer in the smoothed latency
+LATENCY_SMOOTHING = 0.3
+# Number of recent smoothed latencies the baseline is the minimum of
+BASELINE_WINDOW = 50
+
+# HTTP statuses that mean the purple agent is overloaded
+OVERLOAD_STATUS_CODES = {429, 503}
+
+
+def is_overload(error: BaseException) -> bool:
+    """Whether a failed question means the purple agent has too much to do."""
+    if isinstance(error, (TimeoutError, A2AClientTimeoutError, AgentResponseError)):
+        return True
+    return isinstance(error, A2AClientHTTPError) and error.status_code in OVERLOAD_STATUS_CODES
+
+
+class AdaptiveLimiter:
+    """Concurrency limit that grows while answers stay fast and backs off on overload.
+
+    Use `async with limiter:` around a question and report its outcome with
+    `observe()`.
+    """
+
+    def __init__(
+        self,
+        initial: int = 1,
+        min_limit: int = 1,
+        max_limit: int = DEFAULT_MAX_ADAPTIVE_CONCURRENCY,
+        latency_tolerance: float = DEFAULT_LATENCY_TOLERANCE,
+        backoff: float = DEFAULT_BACKOFF,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, min_limit)
+        self.latency_tolerance = latency_tolerance
+        self.backoff = backoff
+        self.limit = float(min(max(initial, min_limit), self.max_limit))
+        self.in_flight = 0
+        self.latency: float | None = None
+        self.baseline: float | None = None
+        self._recent_latencies: deque[float] = deque(maxlen=BASELINE_WINDOW)
+        self.backoffs = 0
+        self.started = time.monotonic()
+        self.trajectory: list[tuple[float, int]] = [(0.0, int(self.limit))]
+        self._last_decrease = self.started
+        self._waiters = WaiterQueue()
+
+    async def __aenter__(self) -> "AdaptiveLimiter":
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return self
+        await self._waiters.wait(None, self._release)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._release()
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._admit()
+
+    def _admit(self) -> None:
+        # Hand free slots to waiting questions in arrival order
+        while self.in_flight < int(self.limit) and self._waiters.hand_over():
+            self.in_flight += 1
+
+    def observe(self, timing: QuestionTiming, error: BaseException | None = None) -> None:
+        """Adjust the limit to the outcome of one question."""
+        if error is not None:
+            if is_overload(error):
+                self._decrease(timing)
+            return
+        if timing.total is None:
+            return
+        if self.latency is None:
+            self.latency = timing.total
+        else:
+            self.latency += LATENCY_SMOOTHING * (timing.total - self.latency)
+        self._recent_latencies.append(self.latency)
+        self.baseline = min(self._recent_latencies)
+        if self.latency > self.latency_tolerance * self.baseline:
+            self._decrease(timing)
+        elif self.in_flight >= int(self.limit):
+            # Only grow a limit that is actually being used
+            self._set(self.limit + 1 / int(self.limit))
+
+    def _decrease(self, timing: QuestionTiming) -> None:
+        if timing.started < self._last_decrease:
+            return
+        self._last_decrease = time.monotonic()
+        self.backoffs += 1
+        self._set(self.limit * self.backoff)
+
+    def _set(self, limit: float) -> None:
+        previous = int(self.limit)
+        self.limit = min(max(limit, self.min_limit), self.max_limit)
+        if int(self.limit) != previous:
+            self.trajectory.append((round(time.monotonic() - self.started, 3), int(self.limit)))
+            self._admit()
+
+    def summary(self) -> dict:
+        limits = [limit for _, limit in self.trajectory]
+        return {
+            "mode": "adaptive",
+            "initial": limits[0],
+            "final": int(self.limit),
+            "peak": max(limits),
+            "backoffs": self.backoffs,
+            "baseline_latency": round(self.baseline, 6) if self.baseline is not None else None,
+            # (seconds since the start, limit) at every change
+            "trajectory": [list(point) for point in self.trajectory],
+        }
@@ -0,0 +1,241 @@
+"""Loading and selection of the ETF benchmark question set."""
+import hashlib
+import json
+import random
+import re
+from array import array
+from collections.abc import Iterable, Iterator, Mapping
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+
+QA_FILE = Path(__file__).parent / "qa_pairs.json"
+
+PROVIDERS = ("Fidelity", "iShares", "Schwab", "Vanguard")
+
+_PROVIDER_RE = re.compile(r"\b(" + "|".join(PROVIDERS) + r")\b")
+_TICKER_RE = re.compile(r"\bETF [A-Z][A-Z0-9.]{0,5}\b")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d[\d,]*(?:\.\d+)?")
+
+
+def question_template(question: str) -> str:
+    """Reduce a question to its template by masking provider, ticker and numbers.
+
+    e.g. "How many ETFs have a PriceBookRatio value greater than 1 in Schwab?"
+    -> "How many ETFs have a PriceBookRatio value greater than {n} in {provider}?"
+    """
+    template = _PROVIDER_RE.sub("{provider}", question)
+    template = _TICKER_RE.sub("ETF {ticker}", template)
+    return _NUMBER_RE.sub("{n}", template)
+
+
+def question_provider(question: str) -> str | None:
+    match = _PROVIDER_RE.search(question)
+    return match.group(1) if match else None
+
+
+class QAPair:
+    """A single benchmark question."""
+    __slots__ = ("id", "question", "answer", "provider", "template")
+
+    def __init__(self, id: int, question: str, answer: float, provider: str | None, template: str):
+        self.id = id
+        self.question = question
+        self.answer = answer
+        self.provider = provider
+        self.template = template
+
+    def __repr__(self) -> str:
+        return f"QAPair(id={self.id}, provider={self.provider!r}, answer={self.answer})"
+
+
+class QADataset:
+    """Column-oriented question set with lookups by id, provider and template.
+
+    Questions, answers, provider and template codes are stored as parallel
+    columns; QAPair objects are only built for the rows that get selected.
+    """
+    __slots__ = (
+        "ids", "questions", "answers", "templates", "content_hash",
+        "_provider_codes", "_template_codes",
+        "_row_by_id", "_rows_by_provider", "_rows_by_template",
+    )
+
+    def __init__(self, qa_pairs: list[Mapping[str, Any]], content_hash: str | None = None):
+        self.ids = array("q")
+        self.answers = array("d")
+        self._provider_codes = array("b")
+        self._template_codes = array("H")
+        questions = []
+        templates: dict[str, int] = {}
+        self._row_by_id: dict[int, int] = {}
+        self._rows_by_provider: dict[str, array] = {p: array("H") for p in PROVIDERS}
+        self._rows_by_template: dict[str, array] = {}
+
+        for row, qa in enumerate(qa_pairs):
+            question = qa["question"]
+            provider = question_provider(question)
+            template = question_template(question)
+            template_code = templates.setdefault(template, len(templates))
+
+            self.ids.append(int(qa["id"]))
+            self.answers.append(float(qa["answer"]))
+            questions.append(question)
+            self._provider_codes.append(PROVIDERS.index(provider) if provider else -1)
+            self._template_codes.append(template_code)
+
+            self._row_by_id[int(qa["id"])] = row
+            if provider:
+                self._rows_by_provider[provider].append(row)
+            self._rows_by_template.setdefault(template, array("H")).append(row)
+
+        self.questions = tuple(questions)
+        self.templates = tuple(templates)
+        if content_hash is None:
+            content_hash = hashlib.sha256(json.dumps(list(map(dict, qa_pairs)), sort_keys=True).encode()).hexdigest()
+        self.content_hash = content_hash
+
+    def row(self, row: int) -> QAPair:
+        provider_code = self._provider_codes[row]
+        return QAPair(
+            id=self.ids[row],
+            question=self.questions[row],
+            answer=self.answers[row],
+            provider=PROVIDERS[provider_code] if provider_code >= 0 else None,
+            template=self.templates[self._template_codes[row]],
+        )
+
+    def get(self, qid: int) -> QAPair | None:
+        row = self._row_by_id.get(qid)
+        return self.row(row) if row is not None else None
+
+    def rows_for_provider(self, provider: str) -> array:
+        return self._rows_by_provider.get(provider, array("H"))
+
+    def rows_for_template(self, template: str) -> array:
+        return self._rows_by_template.get(template, array("H"))
+
+    def select(
+        self,
+        num_tasks: int | None = None,
+        ids: list[int] | None = None,
+        providers: list[str] | None = None,
+        sample: int | None = None,
+        seed: int | None = None,
+    ) -> list[QAPair]:
+        """Select a subset of questions, kept in dataset order.
+
+        Filters apply in order: explicit ids, then providers, then a seeded
+        random sample, then the first `num_tasks` of what remains.
+        """
+        rows = range(len(self))
+        if ids is not None:
+            wanted = {self._row_by_id[qid] for qid in ids if qid in self._row_by_id}
+            rows = [r for r in rows if r in wanted]
+        if providers is not None:
+            wanted = {r for p in providers for r in self.rows_for_provider(p)}
+            rows = [r for r in rows if r in wanted]
+        if sample is not None and sample < len(rows):
+            rows = sorted(random.Random(seed).sample(list(rows), sample))
+        if num_tasks is not None:
+            rows = rows[:num_tasks]
+        return [self.row(r) for r in rows]
+
+    def select_from_config(self, config: Mapping[str, Any]) -> list[QAPair]:
+        """Select questions using the assessment config keys.
+
+        Keys (all optional): `num_tasks`, `task_ids` (ids and "a-b" ranges, as a
+        list or comma-separated string), `providers`, `sample` and `seed`.
+
+        Raises:
+            ValueError: If a key has an invalid value
+        """
+        return self.select(
+            num_tasks=_optional_int(config, "num_tasks"),
+            ids=parse_id_ranges(config["task_ids"]) if config.get("task_ids") is not None else None,
+            providers=_parse_providers(config["providers"]) if config.get("providers") is not None else None,
+            sample=_optional_int(config, "sample"),
+            seed=_optional_int(config, "seed"),
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[QAPair]:
+        return (self.row(r) for r in range(len(self)))
+
+
+def parse_id_ranges(value: Any) -> list[int]:
+    """Parse question ids such as [1, 2, "10-20"] or "1-20,40"."""
+    items = value.split(",") if isinstance(value, str) else value
+    if not isinstance(items, list):
+        raise ValueError(f"task_ids must be a list or a string, got {value!r}")
+    ids = []
+    for item in items:
+        if isinstance(item, int):
+            ids.append(item)
+            continue
+        text = str(item).strip()
+        start, sep, end = text.partition("-")
+        try:
+            if sep:
+                first, last = int(start), int(end)
+                if first > last:
+                    raise ValueError
+                ids.extend(range(first, last + 1))
+            else:
+                ids.append(int(text))
+        except ValueError:
+            raise ValueError(f"Invalid task id or range: {item!r}") from None
+    return ids
+
+
+def format_id_ranges(ids: Iterable[int]) -> str:
+    """Inverse of `parse_id_ranges`: [1, 2, 3, 7] -> "1-3,7" (order is kept)."""
+    parts = []
+    start = end = None
+    for qid in ids:
+        if start is not None and qid == end + 1:
+            end = qid
+            continue
+        if start is not None:
+            parts.append(f"{start}-{end}" if end != start else str(start))
+        start = end = qid
+    if start is not None:
+        parts.append(f"{start}-{end}" if end != start else str(start))
+    return ",".join(parts)
+
+
+def _parse_providers(value: Any) -> list[str]:
+    names = [value] if isinstance(value, str) else value
+    if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+        raise ValueError(f"providers must be a provider name or a list of them, got {value!r}")
+    lookup = {p.lower(): p for p in PROVIDERS}
+    providers = []
+    for name in names:
+        provider = lookup.get(name.strip().lower())
+        if provider is None:
+            raise ValueError(f"Unknown provider: {name!r} (expected one of {', '.join(PROVIDERS)})")
+        providers.append(provider)
+    return providers
+
+
+def _optional_int(config: Mapping[str, Any], key: str) -> int | None:
+    value = config.get(key)
+    if value is None:
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be an integer, got {value!r}") from None
+    if number < 0:
+        raise ValueError(f"{key} must not be negative, got {number}")
+    return number
+
+
+@lru_cache(maxsize=None)
+def load_dataset(path: Path = QA_FILE) -> QADataset:
+    """Load the question set once per process; every Agent shares the result."""
+    data = Path(path).read_bytes()
+    return QADataset(json.loads(data)["qa_pairs"], content_hash=hashlib.sha256(data).hexdigest())
@@ -1,10 +1,14 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.events import EventQueue
 from a2a.server.tasks import TaskUpdater
 from a2a.types import (
     Task,
     TaskState,
-    UnsupportedOperationError,
     InvalidRequestError,
 )
 from a2a.utils.errors import ServerError
@@ -24,9 +28,73 @@ TERMINAL_STATES = {
 }
 
 
+# Bounds for the per-context agent cache
+DEFAULT_MAX_AGENTS = 64
+DEFAULT_AGENT_IDLE_TIMEOUT = 600.0
+
+# How long a cancel request waits for the run to report its partial results
+DEFAULT_CANCEL_GRACE = 10.0
+
+
+class AgentCache:
+    """Bounded context_id -> Agent map.
+
+    Agents are evicted once their task reaches a terminal state, when they
+    have been idle for `idle_timeout` seconds, or (least recently used
+    first) when more than `max_size` contexts are cached.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_AGENTS, idle_timeout: float = DEFAULT_AGENT_IDLE_TIMEOUT):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._agents: OrderedDict[str, tuple[Agent, float]] = OrderedDict()
+
+    def get_or_create(self, context_id: str) -> Agent:
+        self.evict_idle()
+        entry = self._agents.pop(context_id, None)
+        agent = entry[0] if entry else Agent()
+        self._agents[context_id] = (agent, time.monotonic())
+        while len(self._agents) > self.max_size:
+            self._agents.popitem(last=False)
+        return agent
+
+    def evict(self, context_id: str) -> None:
+        self._agents.pop(context_id, None)
+
+    def evict_idle(self) -> None:
+        # Entries are kept in last-used order, so idle ones are at the front
+        deadline = time.monotonic() - self.idle_timeout
+        while self._agents:
+            context_id, (_, last_used) = next(iter(self._agents.items()))
+            if last_used >= deadline:
+                break
+            self._agents.popitem(last=False)
+
+    def __contains__(self, context_id: str) -> bool:
+        return context_id in self._agents
+
+    def __len__(self) -> int:
+        return len(self._agents)
+
+
+@dataclass
+class RunningTask:
+    """An assessment in progress: its Agent, the `agent.run` task and the `execute` call awaiting it."""
+    agent: Agent
+    run: asyncio.Task
+    execution: asyncio.Task
+
+
 class Executor(AgentExecutor):
-    def __init__(self):
-        self.agents: dict[str, Agent] = {} # context_id to agent instance
+    def __init__(
+        self,
+        max_agents: int = DEFAULT_MAX_AGENTS,
+        agent_idle_timeout: float = DEFAULT_AGENT_IDLE_TIMEOUT,
+        cancel_grace: float = DEFAULT_CANCEL_GRACE,
+    ):
+        self.agents = AgentCache(max_agents, agent_idle_timeout) # context_id to agent instance
+        self.cancel_grace = cancel_grace
+        self.running: dict[str, RunningTask] = {} # task_id to assessment in progress
 
     async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
         msg = context.message
@@ -42,21 +110,42 @@ class Executor(AgentExecutor):
             await event_queue.enqueue_event(task)
 
         context_id = task.context_id
-        agent = self.agents.get(context_id)
-        if not agent:
-            agent = Agent()
-            self.agents[context_id] = agent
-
         updater = TaskUpdater(event_queue, task.id, context_id)
 
         await updater.start_work()
+        # No awaits from here until the task is registered as running
+        agent = self.agents.get_or_create(context_id)
+        if any(running.agent is agent for running in self.running.values()):
+            # Another task of this context is using the cached agent; cancelling
+            # or finishing it closes that agent's messenger, so don't share it
+            agent = Agent()
+        run = asyncio.create_task(agent.run(msg, updater))
+        self.running[task.id] = RunningTask(agent, run, asyncio.current_task())
         try:
-            await agent.run(msg, updater)
+            await run
             if not updater._terminal_state_reached:
                 await updater.complete()
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                # The server itself is stopping this request
+                raise
+            await updater.cancel(new_agent_text_message("Assessment cancelled", context_id=context_id, task_id=task.id))
         except Exception as e:
             print(f"Task failed with agent error: {e}")
             await updater.failed(new_agent_text_message(f"Agent error: {e}", context_id=context_id, task_id=task.id))
+        finally:
+            self.running.pop(task.id, None)
+            if updater._terminal_state_reached:
+                self.agents.evict(context_id)
 
     async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
-        raise ServerError(error=UnsupportedOperationError())
+        """Cancel a running assessment; it stops asking questions and reports partial results."""
+        running = self.running.get(context.task_id)
+        if running is None:
+            # Not running in this process (e.g. started before a restart)
+            updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+            await updater.cancel()
+            return
+        running.run.cancel()
+        # The request handler stops `execute` once we return; let it finish reporting first
+        await asyncio.wait([running.execution], timeout=self.cancel_grace)
@@ -0,0 +1,188 @@
+"""Vectorized grading of extracted answers.
+
+Results are graded in one pass over arrays of extracted answers and
+ground truths rather than one branch per question, under a pluggable
+tolerance policy:
+- relative: within ±tolerance of the ground truth (exact zero when it is 0)
+- absolute: within ±tolerance in the answer's own units
+- unit_normalized: relative, but for questions asking for a percentage an
+  answer given as a decimal (or vice versa) is also accepted
+
+Because results keep the purple agent's raw `response`, stored results can
+be re-graded offline under another policy without re-querying any agent:
+
+  uv run src/grading.py ../results/<run>.json --policy unit_normalized
+"""
+import argparse
+import json
+import re
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+
+from extraction import extract_answer, extract_answers
+from result_format import rehydrate
+
+
+DEFAULT_TOLERANCE = 0.10
+
+_PERCENT_RE = re.compile(r"\bin percentage\b", re.IGNORECASE)
+
+
+def extract_number(text: str):
+    """
+    Extract the answer from text (see `extraction.extract_answer`).
+    Returns:
+        float if a number is found
+        -1 if no number is found
+    """
+    return extract_answer(text).value
+
+
+def is_correct(agent_answer: float, ground_truth: float) -> bool:
+    """Check a single answer against the ground truth with ±10% tolerance."""
+    return bool(grade([agent_answer], [ground_truth])[0])
+
+
+@dataclass(frozen=True)
+class GradingPolicy:
+    """Tolerances an answer is graded under; either bound suffices."""
+    relative: float | None = DEFAULT_TOLERANCE
+    absolute: float | None = None
+    normalize_percent: bool = False
+
+    def within(self, answers: np.ndarray, truths: np.ndarray) -> np.ndarray:
+        error = np.abs(answers - truths)
+        correct = np.zeros(answers.shape, dtype=bool)
+        if self.relative is not None:
+            nonzero = truths != 0
+            with np.errstate(divide="ignore", invalid="ignore"):
+                correct |= nonzero & (error / np.abs(truths) <= self.relative)
+            # Ground truth is zero → must be exactly zero
+            correct |= ~nonzero & (answers == 0)
+        if self.absolute is not None:
+            correct |= error <= self.absolute
+        return correct
+
+
+GRADING_POLICIES = ("relative", "absolute", "unit_normalized")
+
+DEFAULT_POLICY = GradingPolicy()
+
+
+def grading_policy(name: str = "relative", tolerance: float = DEFAULT_TOLERANCE) -> GradingPolicy:
+    if name == "relative":
+        return GradingPolicy(relative=tolerance)
+    if name == "absolute":
+        return GradingPolicy(relative=None, absolute=tolerance)
+    if name == "unit_normalized":
+        return GradingPolicy(relative=tolerance, normalize_percent=True)
+    raise ValueError(f"Unknown grading policy {name!r}, expected one of {GRADING_POLICIES}")
+
+
+def asks_for_percentage(questions: Iterable[str]) -> np.ndarray:
+    """Mask of questions that ask for the answer in percent (e.g. "In percentage")."""
+    return np.array([bool(_PERCENT_RE.search(q)) for q in questions], dtype=bool)
+
+
+def grade(
+    answers: Iterable[float],
+    truths: Iterable[float],
+    percent: np.ndarray | None = None,
+    policy: GradingPolicy = DEFAULT_POLICY,
+) -> np.ndarray:
+    """Boolean array: which answers are correct under `policy`."""
+    answers = np.asarray(answers, dtype=np.float64)
+    truths = np.asarray(truths, dtype=np.float64)
+    correct = policy.within(answers, truths)
+    if policy.normalize_percent and percent is not None:
+        # Accept 12.5 for 0.125 (and 0.125 for 12.5) where a percentage was asked for
+        for scale in (100.0, 0.01):
+            correct |= percent & policy.within(answers * scale, truths)
+    return correct
+
+
+def grade_results(results: list[dict], policy: GradingPolicy = DEFAULT_POLICY) -> list[dict]:
+    """Fill in `agent_answer` and `correct` for result dicts, in place.
+
+    Answers are extracted from the raw `response`; results stored before
+    responses were kept fall back to their recorded `agent_answer`. Failed
+    exchanges (an `error` and no response) score -1.
+    """
+    if not results:
+        return results
+    extracted = extract_answers(r.get("response") for r in results)
+    answers = []
+    for r, extraction in zip(results, extracted):
+        if r.get("response") is not None:
+            answers.append(extraction.value)
+        elif "error" in r:
+            answers.append(-1)
+        else:
+            answers.append(r.get("agent_answer", -1))
+    percent = asks_for_percentage(r["question"] for r in results) if policy.normalize_percent else None
+    correct = grade(answers, [r["ground_truth"] for r in results], percent, policy)
+    for r, answer, ok in zip(results, answers, correct.tolist()):
+        r["agent_answer"] = answer
+        r["correct"] = ok
+    return results
+
+
+def regrade_participant(run: dict, policy: GradingPolicy) -> dict:
+    """Re-grade one participant's stored results and recompute its score."""
+    run = rehydrate(run)
+    results = grade_results(run.get("results", []), policy)
+    run["score"] = sum(1 for r in results if r["correct"])
+    # An aborted participant keeps the size of the whole question set as its total
+    run["total"] = run.get("total", len(results))
+    run["pass_rate"] = round(run["score"] / run["total"] * 100, 2) if run["total"] else 0
+    return run
+
+
+def regrade(data: dict, policy: GradingPolicy) -> dict:
+    """Re-grade a stored leaderboard results document (results/<run>.json).
+
+    Multi-participant runs are re-graded role by role and their score table
+    rebuilt. Compact runs are rehydrated, so the output is always in the
+    verbose format.
+    """
+    runs = []
+    for run in data.get("results", []):
+        if "participants" not in run:
+            runs.append(regrade_participant(run, policy))
+            continue
+        run["participants"] = {role: regrade_participant(r, policy) for role, r in run["participants"].items()}
+        scores = run.setdefault("scores", [])
+        for row in scores:
+            regraded = run["participants"].get(row["role"])
+            if regraded is not None:
+                row.update(score=regraded["score"], total=regraded["total"], pass_rate=regraded["pass_rate"])
+        scores.sort(key=lambda row: (-row["score"], row["role"]))
+        runs.append(run)
+    data["results"] = runs
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-grade stored results without re-querying agents.")
+    parser.add_argument("path", help="Results JSON file written by an assessment")
+    parser.add_argument("--policy", choices=GRADING_POLICIES, default="relative", help="Tolerance policy")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Relative or absolute tolerance")
+    parser.add_argument("--output", help="Write the re-graded results here (default: print scores only)")
+    args = parser.parse_args()
+
+    with open(args.path) as f:
+        data = json.load(f)
+    data = regrade(data, grading_policy(args.policy, args.tolerance))
+    for run in data.get("results", []):
+        for role, scores in run["participants"].items() if "participants" in run else [(None, run)]:
+            prefix = f"{role}: " if role else ""
+            print(f"{prefix}Score: {scores['score']}/{scores['total']} ({scores['pass_rate']:.1f}%)")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(data, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,142 @@
+import asyncio
 import json
+import logging
+import random
+import time
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import Callable
 from uuid import uuid4
 
 import httpx
 from a2a.client import (
     A2ACardResolver,
+    Client,
+    ClientCallContext,
     ClientConfig,
     ClientFactory,
     Consumer,
 )
+from a2a.client.errors import A2AClientHTTPError, A2AClientTimeoutError
 from a2a.types import (
+    AgentCard,
     Message,
     Part,
     Role,
+    Task,
+    TaskArtifactUpdateEvent,
+    TaskIdParams,
+    TaskState,
     TextPart,
     DataPart,
 )
 
+from metrics import QuestionTiming, attach_trace, current_timing
+
 
 DEFAULT_TIMEOUT = 300
 
+# Connection pool defaults for the long-lived Messenger client
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+# How long a resolved agent card (and the client built from it) is reused
+DEFAULT_CARD_TTL = 300.0
+
+# Seconds an open circuit breaker waits before letting a trial request through
+DEFAULT_RESET_TIMEOUT = 30.0
+
+# HTTP statuses worth retrying: timeouts, throttling and server-side hiccups
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+# Task states after which no further events arrive
+TERMINAL_STATES = {TaskState.completed, TaskState.canceled, TaskState.failed, TaskState.rejected}
+
+logger = logging.getLogger(__name__)
+
+
+class AgentResponseError(RuntimeError):
+    """The agent answered, but its task did not reach the "completed" state."""
+
+    def __init__(self, url: str, outputs: dict):
+        super().__init__(f"{url} responded with: {outputs}")
+        self.url = url
+        self.status = outputs.get("status")
+        self.outputs = outputs
+
+
+class CircuitOpenError(RuntimeError):
+    """Too many consecutive failures; the agent is treated as down."""
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Whether a failed request is worth retrying (transport errors, timeouts, 5xx/429)."""
+    if isinstance(error, (httpx.TransportError, A2AClientTimeoutError, TimeoutError)):
+        return True
+    if isinstance(error, A2AClientHTTPError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    return False
+
+
+@dataclass
+class RetryPolicy:
+    """Per-request deadline and exponential backoff for transient errors."""
+    max_attempts: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 10.0
+    request_timeout: float = DEFAULT_TIMEOUT
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (1-based), with jitter."""
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures.
+
+    While open every call fails fast with CircuitOpenError. After
+    `reset_timeout` seconds one trial call is let through (half-open) while
+    the others keep failing fast; its outcome closes the circuit again or
+    re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.trial_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def before_call(self, url: str) -> bool:
+        """Raise CircuitOpenError unless the call may go ahead; returns whether it is the half-open trial."""
+        if self.opened_at is None:
+            return False
+        if self.trial_in_flight or time.monotonic() - self.opened_at < self.reset_timeout:
+            raise CircuitOpenError(f"{url} failed {self.failures} times in a row; not sending more requests")
+        # Half-open: allow one trial request
+        self.trial_in_flight = True
+        return True
+
+    def release_trial(self) -> None:
+        """The trial call ended without an outcome (e.g. it was cancelled); let another one through."""
+        self.trial_in_flight = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.failure_threshold > 0 and self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
 
 def create_message(
     *, role: Role = Role.user, text: str, context_id: str | None = None
@@ -32,14 +150,91 @@ def create_message(
     )
 
 
-def merge_parts(parts: list[Part]) -> str:
+def merge_parts(parts: list[Part], separator: str = "\n") -> str:
     chunks = []
     for part in parts:
         if isinstance(part.root, TextPart):
             chunks.append(part.root.text)
         elif isinstance(part.root, DataPart):
             chunks.append(json.dumps(part.root.data, indent=2))
-    return "\n".join(chunks)
+    return separator.join(chunks)
+
+
+def task_text(task: Task, include_status: bool = True) -> str:
+    """Merged text of a task's status message (optional) and artifacts.
+
+    Parts appended to an artifact are chunks of one text, so they are joined
+    as is.
+    """
+    text = ""
+    if include_status and task.status.message:
+        text += merge_parts(task.status.message.parts)
+    for artifact in task.artifacts or []:
+        text += merge_parts(artifact.parts, separator="")
+    return text
+
+
+def settled_text(text: str) -> str:
+    """Prefix of streamed text that later chunks cannot change (up to the last whitespace).
+
+    A number split across chunks ("2" + "2.5" for 22.5) is only considered
+    once something follows it.
+    """
+    end = max(text.rfind(" "), text.rfind("\n"), text.rfind("\t"))
+    return text[:end + 1]
+
+
+async def collect_outputs(
+    client: Client,
+    outbound_msg: Message,
+    context: ClientCallContext | None = None,
+    answer_ready: Callable[[str], bool] | None = None,
+) -> dict:
+    """Send a message with an existing A2A client and merge its events into an outputs dict.
+
+    Events are consumed as they arrive; the time until the first one carrying
+    text is recorded on `current_timing`. With `answer_ready`, a streaming
+    exchange stops as soon as the settled artifact text satisfies it: the
+    outputs then hold the artifact text so far, `stopped_early` and the
+    `task_id`, so the caller can cancel the remote task.
+    """
+    outputs = {"response": "", "context_id": None}
+    timing = current_timing.get()
+    # Until an artifact chunk arrives with last_chunk=True, more text may follow
+    artifact_open = False
+
+    # if streaming == False, only one event is generated
+    async with aclosing(client.send_message(outbound_msg, context=context)) as events:
+        async for event in events:
+            match event:
+                case Message() as msg:
+                    outputs["context_id"] = msg.context_id
+                    outputs["response"] = merge_parts(msg.parts)
+                    answer = ""
+
+                case (task, update):
+                    outputs["context_id"] = task.context_id
+                    outputs["status"] = task.status.state.value
+                    outputs["response"] = task_text(task)
+                    answer = "" if task.status.state in TERMINAL_STATES else task_text(task, include_status=False)
+                    if isinstance(update, TaskArtifactUpdateEvent):
+                        artifact_open = update.last_chunk is not True
+                    if artifact_open:
+                        answer = settled_text(answer)
+
+                case _:
+                    continue
+
+            if timing and timing.first_token is None and outputs["response"]:
+                timing.first_token = time.monotonic() - timing.started
+            if answer_ready and answer and answer_ready(answer):
+                # Progress text in a "working" status message is not part of the answer
+                outputs["response"] = answer
+                outputs["stopped_early"] = True
+                outputs["task_id"] = task.id
+                break
+
+    return outputs
 
 
 async def send_message(
@@ -49,8 +244,13 @@ async def send_message(
     streaming: bool = False,
     timeout: int = DEFAULT_TIMEOUT,
     consumer: Consumer | None = None,
+    answer_ready: Callable[[str], bool] | None = None,
 ):
-    """Returns dict with context_id, response and status (if exists)"""
+    """Returns dict with context_id, response and status (if exists)
+
+    With `streaming` and `answer_ready`, stops reading as soon as an answer
+    is available (see `collect_outputs`).
+    """
     async with httpx.AsyncClient(timeout=timeout) as httpx_client:
         resolver = A2ACardResolver(httpx_client=httpx_client, base_url=base_url)
         agent_card = await resolver.get_agent_card()
@@ -64,67 +264,252 @@ async def send_message(
             await client.add_event_consumer(consumer)
 
         outbound_msg = create_message(text=message, context_id=context_id)
-        last_event = None
-        outputs = {"response": "", "context_id": None}
+        return await collect_outputs(client, outbound_msg, answer_ready=answer_ready)
 
-        # if streaming == False, only one event is generated
-        async for event in client.send_message(outbound_msg):
-            last_event = event
 
-        match last_event:
-            case Message() as msg:
-                outputs["context_id"] = msg.context_id
-                outputs["response"] += merge_parts(msg.parts)
+@dataclass
+class CachedClient:
+    """An A2A client built from a resolved agent card, reused until it expires."""
+    agent_card: AgentCard
+    client: Client
+    expires_at: float
 
-            case (task, update):
-                outputs["context_id"] = task.context_id
-                outputs["status"] = task.status.state.value
-                msg = task.status.message
-                if msg:
-                    outputs["response"] += merge_parts(msg.parts)
-                if task.artifacts:
-                    for artifact in task.artifacts:
-                        outputs["response"] += merge_parts(artifact.parts)
 
-            case _:
-                pass
+class Messenger:
+    """Talks to other agents over a shared, long-lived connection pool.
 
-        return outputs
+    Agent cards and the A2A clients built from them are cached per URL for
+    `card_ttl` seconds, so repeated messages to the same agent reuse both the
+    TCP connections and the resolved card. Call `close()` when done.
 
+    With `streaming`, agents that support it are read event by event; when
+    `talk_to_agent` is given an `answer_ready` check, it returns as soon as
+    an answer has streamed in and asks the agent to cancel the rest of the
+    task (if `cancel_on_answer`).
+    """
 
-class Messenger:
-    def __init__(self):
+    def __init__(
+        self,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+        card_ttl: float = DEFAULT_CARD_TTL,
+        streaming: bool = False,
+        retry_policy: RetryPolicy | None = None,
+        failure_threshold: int = 0,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+        cancel_on_answer: bool = True,
+    ):
         self._context_ids = {}
+        self.cancel_on_answer = cancel_on_answer
+        self._cancellations: set[asyncio.Task] = set()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._card_ttl = card_ttl
+        self._streaming = streaming
+        self._httpx_client: httpx.AsyncClient | None = None
+        self._clients: dict[str, CachedClient] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def _get_httpx_client(self) -> httpx.AsyncClient:
+        if self._httpx_client is None or self._httpx_client.is_closed:
+            self._httpx_client = httpx.AsyncClient(
+                timeout=DEFAULT_TIMEOUT,
+                limits=self._limits,
+                event_hooks={"request": [attach_trace]},
+            )
+        return self._httpx_client
+
+    async def get_client(self, url: str) -> Client:
+        """Return the cached A2A client for `url`, resolving the agent card if needed."""
+        cached = self._clients.get(url)
+        if cached and cached.expires_at > time.monotonic():
+            return cached.client
+
+        # One card fetch per URL even when many questions arrive at once
+        lock = self._locks.setdefault(url, asyncio.Lock())
+        async with lock:
+            cached = self._clients.get(url)
+            if cached and cached.expires_at > time.monotonic():
+                return cached.client
+
+            httpx_client = self._get_httpx_client()
+            resolver = A2ACardResolver(httpx_client=httpx_client, base_url=url)
+            resolve_started = time.monotonic()
+            agent_card = await resolver.get_agent_card()
+            if timing := current_timing.get():
+                timing.card_resolution += time.monotonic() - resolve_started
+            config = ClientConfig(
+                httpx_client=httpx_client,
+                streaming=self._streaming,
+            )
+            client = ClientFactory(config).create(agent_card)
+            self._clients[url] = CachedClient(
+                agent_card=agent_card,
+                client=client,
+                expires_at=time.monotonic() + self._card_ttl,
+            )
+            return client
+
+    def invalidate(self, url: str | None = None):
+        """Drop the cached agent card and client for `url` (or for every URL)."""
+        if url is None:
+            self._clients.clear()
+        else:
+            self._clients.pop(url, None)
+
+    def configure(
+        self,
+        retry_policy: RetryPolicy | None = None,
+        failure_threshold: int | None = None,
+        streaming: bool | None = None,
+        reset_timeout: float | None = None,
+    ):
+        """Replace the retry policy, circuit breaker settings and/or streaming mode (resets breakers)."""
+        if retry_policy is not None:
+            self.retry_policy = retry_policy
+        if failure_threshold is not None:
+            self.failure_threshold = failure_threshold
+        if reset_timeout is not None:
+            self.reset_timeout = reset_timeout
+        if streaming is not None and streaming != self._streaming:
+            # Cached clients were built for the other mode
+            self._streaming = streaming
+            self._clients.clear()
+        self._breakers.clear()
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        breaker = self._breakers.get(url)
+        if breaker is None:
+            breaker = CircuitBreaker(self.failure_threshold, reset_timeout=self.reset_timeout)
+            self._breakers[url] = breaker
+        return breaker
+
+    async def close(self):
+        """Drop cached clients and close the connection pool."""
+        if self._cancellations:
+            await asyncio.gather(*self._cancellations, return_exceptions=True)
+        self._clients.clear()
+        self._locks.clear()
+        self._breakers.clear()
+        if self._httpx_client is not None:
+            await self._httpx_client.aclose()
+            self._httpx_client = None
 
     async def talk_to_agent(
         self,
         message: str,
         url: str,
         new_conversation: bool = False,
-        timeout: int = DEFAULT_TIMEOUT,
+        timeout: float | None = None,
+        timing: QuestionTiming | None = None,
+        answer_ready: Callable[[str], bool] | None = None,
     ):
         """
         Communicate with another agent by sending a message and receiving their response.
 
+        Transient transport errors are retried with exponential backoff per
+        `retry_policy`; consecutive failed messages trip the circuit breaker
+        for `url` when `failure_threshold` is set.
+
         Args:
             message: The message to send to the agent
             url: The agent's URL endpoint
             new_conversation: If True, start fresh conversation; if False, continue existing conversation
-            timeout: Timeout in seconds for the request (default: 300)
+            timeout: Deadline in seconds per attempt (default: retry_policy.request_timeout)
+            timing: Filled in with connect/send/first-byte/first-token/total timings of the exchange
+            answer_ready: When streaming, stop waiting once the settled response text satisfies this
 
         Returns:
             str: The agent's response message
+
+        Raises:
+            AgentResponseError: The agent's task ended in a state other than "completed"
+            CircuitOpenError: The circuit breaker for `url` is open
         """
-        outputs = await send_message(
-            message=message,
-            base_url=url,
-            context_id=None if new_conversation else self._context_ids.get(url, None),
-            timeout=timeout,
-        )
-        if outputs.get("status", "completed") != "completed":
-            raise RuntimeError(f"{url} responded with: {outputs}")
+        policy = self.retry_policy
+        timeout = timeout or policy.request_timeout
+        breaker = self.breaker(url)
+        trial = breaker.before_call(url)
+
+        token = current_timing.set(timing)
+        try:
+            attempt = 1
+            while True:
+                if timing:
+                    timing.attempts = attempt
+                try:
+                    outputs = await self._send_once(message, url, new_conversation, timeout, answer_ready)
+                    break
+                except Exception as e:
+                    if attempt >= policy.max_attempts or not is_transient_error(e):
+                        breaker.record_failure()
+                        raise
+                    delay = policy.backoff(attempt)
+                    logger.warning(f"Attempt {attempt} to reach {url} failed ({e!r}); retrying in {delay:.1f}s")
+                    attempt += 1
+                    await asyncio.sleep(delay)
+        finally:
+            current_timing.reset(token)
+            if timing:
+                timing.finish()
+            if trial:
+                breaker.release_trial()
+
+        # The agent is reachable even if it did not complete the task
+        breaker.record_success()
+        if outputs.get("stopped_early"):
+            if timing:
+                timing.stopped_early = True
+            if self.cancel_on_answer:
+                self._cancel_task(url, outputs["task_id"])
+        elif outputs.get("status", "completed") != "completed":
+            raise AgentResponseError(url, outputs)
         self._context_ids[url] = outputs.get("context_id", None)
         return outputs["response"]
 
+    async def _send_once(
+        self,
+        message: str,
+        url: str,
+        new_conversation: bool,
+        timeout: float,
+        answer_ready: Callable[[str], bool] | None = None,
+    ) -> dict:
+        outbound_msg = create_message(
+            text=message,
+            context_id=None if new_conversation else self._context_ids.get(url, None),
+        )
+        call_context = ClientCallContext(state={"http_kwargs": {"timeout": timeout}})
+        try:
+            async with asyncio.timeout(timeout):
+                client = await self.get_client(url)
+                return await collect_outputs(client, outbound_msg, context=call_context, answer_ready=answer_ready)
+        except Exception:
+            # The agent may have restarted or moved; re-resolve its card next time
+            self.invalidate(url)
+            raise
+
+    def _cancel_task(self, url: str, task_id: str) -> None:
+        """Ask the agent to stop working on a task whose answer is already in, without waiting."""
+        async def cancel():
+            try:
+                client = await self.get_client(url)
+                await client.cancel_task(TaskIdParams(id=task_id))
+            except Exception as e:
+                # Agents are free not to support cancellation
+                logger.debug(f"Could not cancel task {task_id} at {url}: {e!r}")
+
+        task = asyncio.create_task(cancel())
+        self._cancellations.add(task)
+        task.add_done_callback(self._cancellations.discard)
+
     def reset(self):
         self._context_ids = {}
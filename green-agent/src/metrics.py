@@ -0,0 +1,208 @@
+"""Latency and throughput instrumentation for assessments.
+
+Per-question timings are collected by `Messenger` through httpx trace hooks:
+- connect: time spent opening TCP/TLS connections (0 when a pooled one is reused)
+- send: time spent writing requests
+- first_byte: time from the start of the question until response headers arrived
+- first_token: time from the start of the question until the first response text
+  arrived (the whole answer unless the agent streams)
+- total: wall time of the whole exchange, retries included
+
+`RunMetrics` summarises one assessment; `REGISTRY` aggregates every
+assessment in the process and renders the Prometheus text format.
+"""
+import math
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+
+# Upper bounds (seconds) of the question latency histogram
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+@dataclass
+class QuestionTiming:
+    started: float = field(default_factory=time.monotonic)
+    card_resolution: float = 0.0
+    connect: float = 0.0
+    send: float = 0.0
+    first_byte: float | None = None
+    first_token: float | None = None
+    total: float | None = None
+    attempts: int = 0
+    # Stopped reading a streamed response once its answer was in
+    stopped_early: bool = False
+    _phase_started: dict[str, float] = field(default_factory=dict, repr=False)
+
+    def finish(self) -> None:
+        self.total = time.monotonic() - self.started
+
+    def as_dict(self) -> dict:
+        return {
+            "card_resolution": round(self.card_resolution, 6),
+            "connect": round(self.connect, 6),
+            "send": round(self.send, 6),
+            "first_byte": round(self.first_byte, 6) if self.first_byte is not None else None,
+            "first_token": round(self.first_token, 6) if self.first_token is not None else None,
+            "total": round(self.total, 6) if self.total is not None else None,
+            "attempts": self.attempts,
+        }
+
+
+# Timing of the question being sent by the current asyncio task
+current_timing: ContextVar[QuestionTiming | None] = ContextVar("current_timing", default=None)
+
+
+async def trace_http(event: str, info: dict) -> None:
+    """httpcore trace callback that feeds connection and transfer phases into `current_timing`."""
+    timing = current_timing.get()
+    if timing is None:
+        return
+    now = time.monotonic()
+    # e.g. "connection.connect_tcp.started" -> ("connection.connect_tcp", "started")
+    phase, _, stage = event.rpartition(".")
+    if stage == "started":
+        timing._phase_started[phase] = now
+        return
+    started = timing._phase_started.pop(phase, None)
+    if started is None:
+        return
+    if phase.endswith(("connect_tcp", "connect_unix_socket", "start_tls")):
+        timing.connect += now - started
+    elif phase.endswith(("send_request_headers", "send_request_body")):
+        timing.send += now - started
+    elif phase.endswith("receive_response_headers") and stage == "complete":
+        timing.first_byte = now - timing.started
+
+
+async def attach_trace(request) -> None:
+    """httpx request event hook that enables `trace_http` for the request."""
+    if current_timing.get() is not None:
+        request.extensions["trace"] = trace_http
+
+
+def percentile(values: list[float], p: float) -> float | None:
+    """Linearly interpolated percentile (p in 0-100) of `values`."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values: list[float]) -> dict:
+    def rounded(value):
+        return round(value, 6) if value is not None else None
+
+    return {
+        "count": len(values),
+        "mean": rounded(sum(values) / len(values)) if values else None,
+        "p50": rounded(percentile(values, 50)),
+        "p95": rounded(percentile(values, 95)),
+        "p99": rounded(percentile(values, 99)),
+        "max": rounded(max(values)) if values else None,
+    }
+
+
+class RunMetrics:
+    """Timings, throughput and error counts for one assessment."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.finished: float | None = None
+        self.timings: list[QuestionTiming] = []
+        self.grading_time = 0.0
+        self.errors: dict[str, int] = {}
+
+    def record(self, timing: QuestionTiming, error: BaseException | None = None) -> None:
+        self.timings.append(timing)
+        if error is not None:
+            kind = type(error).__name__
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+        REGISTRY.observe(timing, error)
+
+    def finish(self) -> None:
+        self.finished = time.monotonic()
+
+    def summary(self) -> dict:
+        wall_time = (self.finished or time.monotonic()) - self.started
+        completed = [t for t in self.timings if t.total is not None]
+        return {
+            "questions": len(self.timings),
+            "wall_time": round(wall_time, 3),
+            "throughput_qps": round(len(self.timings) / wall_time, 3) if wall_time > 0 else None,
+            "latency": summarize([t.total for t in completed]),
+            "first_byte": summarize([t.first_byte for t in completed if t.first_byte is not None]),
+            "first_token": summarize([t.first_token for t in completed if t.first_token is not None]),
+            "stopped_early": sum(1 for t in completed if t.stopped_early),
+            "connect": summarize([t.connect for t in completed]),
+            "send": summarize([t.send for t in completed]),
+            "card_resolution": summarize([t.card_resolution for t in completed if t.card_resolution > 0]),
+            "grading_time": round(self.grading_time, 6),
+            "errors": dict(self.errors),
+            "error_count": sum(self.errors.values()),
+        }
+
+
+class MetricsRegistry:
+    """Process-wide counters exposed on the optional /metrics endpoint."""
+
+    def __init__(self):
+        self.questions = 0
+        self.errors: dict[str, int] = {}
+        self.latency_buckets = [0] * len(LATENCY_BUCKETS)
+        self.latency_sum = 0.0
+        self.assessments = 0
+        self.in_flight = 0
+
+    def observe(self, timing: QuestionTiming, error: BaseException | None = None) -> None:
+        self.questions += 1
+        if error is not None:
+            kind = type(error).__name__
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+        if timing.total is not None:
+            self.latency_sum += timing.total
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if timing.total <= bound:
+                    self.latency_buckets[i] += 1
+
+    def render(self) -> str:
+        lines = [
+            "# HELP etf_benchmark_assessments_total Assessments started.",
+            "# TYPE etf_benchmark_assessments_total counter",
+            f"etf_benchmark_assessments_total {self.assessments}",
+            "# HELP etf_benchmark_assessments_in_progress Assessments currently running.",
+            "# TYPE etf_benchmark_assessments_in_progress gauge",
+            f"etf_benchmark_assessments_in_progress {self.in_flight}",
+            "# HELP etf_benchmark_questions_total Questions sent to purple agents.",
+            "# TYPE etf_benchmark_questions_total counter",
+            f"etf_benchmark_questions_total {self.questions}",
+            "# HELP etf_benchmark_question_errors_total Questions that failed, by error type.",
+            "# TYPE etf_benchmark_question_errors_total counter",
+        ]
+        for kind, count in sorted(self.errors.items()):
+            lines.append(f'etf_benchmark_question_errors_total{{type="{kind}"}} {count}')
+        lines += [
+            "# HELP etf_benchmark_question_latency_seconds Time to get an answer to one question.",
+            "# TYPE etf_benchmark_question_latency_seconds histogram",
+        ]
+        for bound, count in zip(LATENCY_BUCKETS, self.latency_buckets):
+            lines.append(f'etf_benchmark_question_latency_seconds_bucket{{le="{bound}"}} {count}')
+        lines += [
+            f'etf_benchmark_question_latency_seconds_bucket{{le="+Inf"}} {self.questions}',
+            f"etf_benchmark_question_latency_seconds_sum {self.latency_sum:.6f}",
+            f"etf_benchmark_question_latency_seconds_count {self.questions}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
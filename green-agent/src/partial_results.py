@@ -0,0 +1,82 @@
+"""Incremental streaming of graded results as artifact chunks."""
+import time
+from typing import Callable
+from uuid import uuid4
+
+from a2a.server.tasks import TaskUpdater
+from a2a.types import DataPart, Part
+
+
+class PartialResultStream:
+    """Batches graded results into appended chunks of one "Partial Results" artifact.
+
+    A chunk is emitted every `every` results and/or every `interval` seconds
+    (whichever comes first). Each chunk carries only the results graded since
+    the previous chunk plus the running score, so consumers can process the
+    run as a stream. `close()` sends the remaining results with last_chunk set.
+    If `grade` is given, each batch is graded with it when it is flushed.
+    """
+
+    def __init__(
+        self,
+        updater: TaskUpdater,
+        total: int,
+        every: int = 0,
+        interval: float | None = None,
+        grade: Callable[[list[dict]], list[dict]] | None = None,
+        name: str = "Partial Results",
+    ):
+        self.updater = updater
+        self.total = total
+        self.every = every
+        self.interval = interval
+        self.grade = grade
+        self.name = name
+        self.artifact_id = uuid4().hex
+        self.graded = 0
+        self.correct = 0
+        self._pending: list[dict] = []
+        self._chunks = 0
+        self._last_flush = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.every > 0 or self.interval is not None
+
+    async def add(self, result: dict) -> None:
+        if not self.enabled:
+            return
+        self._pending.append(result)
+        due_by_count = self.every > 0 and len(self._pending) >= self.every
+        due_by_time = self.interval is not None and time.monotonic() - self._last_flush >= self.interval
+        if due_by_count or due_by_time:
+            await self.flush()
+
+    async def flush(self, last_chunk: bool = False) -> None:
+        if not self.enabled or (not self._pending and not last_chunk):
+            return
+        # Swap the batch out before awaiting so concurrent adds start a new one
+        batch, self._pending = self._pending, []
+        self._last_flush = time.monotonic()
+        if self.grade is not None:
+            batch = self.grade(batch)
+        self.graded += len(batch)
+        self.correct += sum(1 for r in batch if r["correct"])
+        pass_rate = (self.correct / self.graded) * 100 if self.graded > 0 else 0
+        await self.updater.add_artifact(
+            parts=[Part(root=DataPart(data={
+                "graded": self.graded,
+                "total": self.total,
+                "score": self.correct,
+                "pass_rate": round(pass_rate, 2),
+                "results": batch,
+            }))],
+            artifact_id=self.artifact_id,
+            name=self.name,
+            append=self._chunks > 0,
+            last_chunk=last_chunk,
+        )
+        self._chunks += 1
+
+    async def close(self) -> None:
+        await self.flush(last_chunk=True)
@@ -0,0 +1,176 @@
+"""Compact encoding of assessment results.
+
+The verbose result format repeats each question's text and ground truth in
+every run. The compact format instead references questions by id plus the
+content hash of the question set, and stores per-question outcomes as columns:
+
+    {
+      "format": "compact/1",
+      "dataset_hash": "<sha256 of qa_pairs.json>",
+      "encoding": "json" | "gzip",
+      "columns": {
+        "question_id": "1-300",            # id ranges, in result order
+        "correct": "0110...",              # one character per question
+        "agent_answer": [22.0, 19.0, ...],
+        "response": ["22", "19", ...],     # raw responses, for re-grading
+        "error": {"17": "timed out"}       # only failed questions
+      }
+    }
+
+With the gzip encoding, "columns" is the base64 of the gzipped JSON.
+`rehydrate` rebuilds the verbose view from the question set on demand:
+
+  uv run src/result_format.py ../results/<run>.json --output verbose.json
+"""
+import argparse
+import base64
+import gzip
+import json
+import sys
+
+from dataset import QADataset, format_id_ranges, load_dataset, parse_id_ranges
+
+
+COMPACT_FORMAT = "compact/1"
+RESULT_FORMATS = ("verbose", "compact")
+
+
+def is_compact(data: dict) -> bool:
+    return data.get("format") == COMPACT_FORMAT
+
+
+def compact_results(results: list[dict], dataset_hash: str, compress: bool = False) -> dict:
+    """Encode graded verbose results as a compact payload."""
+    columns = {
+        "question_id": format_id_ranges(r["question_id"] for r in results),
+        "correct": "".join("1" if r["correct"] else "0" for r in results),
+        "agent_answer": [r["agent_answer"] for r in results],
+        "response": [r.get("response") for r in results],
+        "error": {str(r["question_id"]): r["error"] for r in results if "error" in r},
+    }
+    payload = {"format": COMPACT_FORMAT, "dataset_hash": dataset_hash, "encoding": "json", "columns": columns}
+    if compress:
+        raw = json.dumps(columns, separators=(",", ":")).encode()
+        payload["encoding"] = "gzip"
+        payload["columns"] = base64.b64encode(gzip.compress(raw, mtime=0)).decode("ascii")
+    return payload
+
+
+def check_questions(results: list[dict], dataset: QADataset) -> None:
+    """Make sure verbose results were asked from `dataset`, so they can be stored by id.
+
+    Raises:
+        ValueError: If a question id is unknown, or its question or ground truth differs
+    """
+    mismatched = []
+    for r in results:
+        qa = dataset.get(r["question_id"])
+        if qa is None or r.get("question") != qa.question or r.get("ground_truth") != qa.answer:
+            mismatched.append(r["question_id"])
+    if mismatched:
+        raise ValueError(
+            f"{len(mismatched)} of {len(results)} results do not match question set "
+            f"{dataset.content_hash[:12]} (question ids {format_id_ranges(sorted(mismatched))})"
+        )
+
+
+def decode_columns(data: dict) -> dict:
+    if data.get("encoding") == "gzip":
+        return json.loads(gzip.decompress(base64.b64decode(data["columns"])))
+    return data["columns"]
+
+
+def rehydrate(data: dict, dataset: QADataset | None = None) -> dict:
+    """Return a copy of a compact payload with the verbose `results` list restored.
+
+    Raises:
+        ValueError: If the results were produced against a different question set
+    """
+    if not is_compact(data):
+        return data
+    dataset = dataset or load_dataset()
+    if data["dataset_hash"] != dataset.content_hash:
+        raise ValueError(
+            f"Results reference question set {data['dataset_hash'][:12]}, "
+            f"but the loaded one is {dataset.content_hash[:12]}"
+        )
+    columns = decode_columns(data)
+    ids = parse_id_ranges(columns["question_id"]) if columns["question_id"] else []
+    results = []
+    for i, qid in enumerate(ids):
+        qa = dataset.get(qid)
+        if qa is None:
+            raise ValueError(f"Question {qid} is not in the question set")
+        result = {
+            "question_id": qid,
+            "question": qa.question,
+            "correct": columns["correct"][i] == "1",
+            "agent_answer": columns["agent_answer"][i],
+            "ground_truth": qa.answer,
+            "response": columns["response"][i],
+        }
+        if str(qid) in columns["error"]:
+            result["error"] = columns["error"][str(qid)]
+        results.append(result)
+
+    verbose = {k: v for k, v in data.items() if k not in ("format", "dataset_hash", "encoding", "columns")}
+    verbose["results"] = results
+    return verbose
+
+
+def convert_participant(run: dict, dataset: QADataset, to: str, compress: bool = False) -> dict:
+    """Convert one participant's results payload to the `to` format."""
+    run = rehydrate(run, dataset)
+    if to == "compact":
+        verbose = run.pop("results")
+        # Compact results only keep ids: refuse to store answers to other questions under them
+        check_questions(verbose, dataset)
+        run.update(compact_results(verbose, dataset.content_hash, compress=compress))
+    return run
+
+
+def convert(data: dict, dataset: QADataset, to: str, compress: bool = False) -> dict:
+    """Convert every run of a stored results document, role by role for multi-participant runs.
+
+    Raises:
+        ValueError: If a run can't be rehydrated, or compacting would misattribute its questions
+    """
+    runs = []
+    for run in data.get("results", []):
+        if "participants" in run:
+            run["participants"] = {
+                role: convert_participant(r, dataset, to, compress) for role, r in run["participants"].items()
+            }
+        else:
+            run = convert_participant(run, dataset, to, compress)
+        runs.append(run)
+    data["results"] = runs
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert stored results between the verbose and compact formats.")
+    parser.add_argument("path", help="Results JSON file written by an assessment")
+    parser.add_argument("--to", choices=RESULT_FORMATS, default="verbose", help="Target format")
+    parser.add_argument("--gzip", action="store_true", help="Gzip the compact columns")
+    parser.add_argument("--output", help="Output file (default: stdout)")
+    args = parser.parse_args()
+
+    with open(args.path) as f:
+        data = json.load(f)
+    try:
+        data = convert(data, load_dataset(), args.to, compress=args.gzip)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    text = json.dumps(data, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
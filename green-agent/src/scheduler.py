@@ -0,0 +1,90 @@
+"""Fair admission of questions from several participants under one concurrency cap."""
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Hashable
+
+
+class WaiterQueue:
+    """Callers waiting for a slot, served round-robin by key and in arrival order within a key.
+
+    Shared by the limiters that hand slots straight to waiting callers: the
+    owner calls `hand_over()` when a slot frees up and keeps its own count.
+    """
+
+    def __init__(self):
+        self._queues: OrderedDict[Hashable, deque[asyncio.Future]] = OrderedDict()
+
+    def __bool__(self) -> bool:
+        return bool(self._queues)
+
+    async def wait(self, key: Hashable, release: Callable[[], None]) -> None:
+        """Wait until a slot is handed over; `release` gives back one handed over too late."""
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(key, deque()).append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we were cancelled; pass it on
+                release()
+            else:
+                self._discard(key, waiter)
+            raise
+
+    def hand_over(self) -> bool:
+        """Give a slot to the next waiter in turn; False if nobody is waiting."""
+        while self._queues:
+            key, queue = next(iter(self._queues.items()))
+            self._queues.move_to_end(key)
+            waiter = queue.popleft()
+            if not queue:
+                del self._queues[key]
+            if not waiter.done():
+                waiter.set_result(None)
+                return True
+        return False
+
+    def _discard(self, key: Hashable, waiter: asyncio.Future) -> None:
+        queue = self._queues.get(key)
+        if queue is None:
+            return
+        try:
+            queue.remove(waiter)
+        except ValueError:
+            return
+        if not queue:
+            del self._queues[key]
+
+
+class FairScheduler:
+    """Round-robin concurrency limiter keyed by participant.
+
+    At most `limit` slots are held at once (None = unlimited). When a slot
+    frees up it goes to the next participant in turn that is waiting, so a
+    participant with many queued questions cannot starve the others.
+    """
+
+    def __init__(self, limit: int | None = None):
+        self.limit = limit
+        self.active = 0
+        self._waiters = WaiterQueue()
+
+    @asynccontextmanager
+    async def slot(self, key: str) -> AsyncIterator[None]:
+        await self._acquire(key)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, key: str) -> None:
+        if self.limit is None or (self.active < self.limit and not self._waiters):
+            self.active += 1
+            return
+        await self._waiters.wait(key, self._release)
+
+    def _release(self) -> None:
+        # Hand the slot straight to the next waiting participant, round-robin
+        if not self._waiters.hand_over():
+            self.active -= 1
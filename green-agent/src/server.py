@@ -1,9 +1,13 @@
 import argparse
+import os
+from contextlib import asynccontextmanager
+
 import uvicorn
+from starlette.applications import Starlette
+from starlette.routing import Route
 
 from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
 from a2a.types import (
     AgentCapabilities,
     AgentCard,
@@ -11,15 +15,11 @@ from a2a.types import (
 )
 
 from executor import Executor
+from metrics import metrics_endpoint
+from task_store import DEFAULT_MAX_AGE, DEFAULT_MAX_TERMINAL_TASKS, SQLiteTaskStore
 
 
-def main():
-    parser = argparse.ArgumentParser(description="Run the ETF Benchmark Green Agent.")
-    parser.add_argument("--host", type=str, default="127.0.0.1", help="Host to bind the server")
-    parser.add_argument("--port", type=int, default=9009, help="Port to bind the server")
-    parser.add_argument("--card-url", type=str, help="URL to advertise in the agent card")
-    args = parser.parse_args()
-
+def build_agent_card(url: str) -> AgentCard:
     # Define what this benchmark tests
     skill = AgentSkill(
         id="etf-data-analysis",
@@ -34,10 +34,10 @@ def main():
     )
 
     # Define the benchmark identity
-    agent_card = AgentCard(
+    return AgentCard(
         name="ETF Benchmark",
         description="A benchmark that evaluates agents on 60 ETF data questions. Tests counting, filtering, and analysis across Fidelity, iShares, Schwab, and Vanguard providers. Attributes tested: PriceEarningsRatio, PriceBookRatio, ReturnOnEquity, DividendYield, and DistributionFrequency.",
-        url=args.card_url or f"http://{args.host}:{args.port}/",
+        url=url,
         version="1.0.0",
         default_input_modes=["text"],
         default_output_modes=["text"],
@@ -45,19 +45,53 @@ def main():
         skills=[skill]
     )
 
+
+def build_app(card_url: str, metrics: bool = False, task_store: SQLiteTaskStore | None = None) -> Starlette:
+    """Build the green agent's Starlette app."""
+    task_store = task_store or SQLiteTaskStore()
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette):
+        yield
+        await task_store.close()
+
     # Create request handler with executor
     request_handler = DefaultRequestHandler(
         agent_executor=Executor(),
-        task_store=InMemoryTaskStore(),
+        task_store=task_store,
     )
 
-    # Create and run server
     server = A2AStarletteApplication(
-        agent_card=agent_card,
+        agent_card=build_agent_card(card_url),
         http_handler=request_handler,
     )
-    uvicorn.run(server.build(), host=args.host, port=args.port)
+    app = server.build(lifespan=lifespan)
+    if metrics:
+        app.router.routes.append(Route("/metrics", metrics_endpoint, methods=["GET"]))
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the ETF Benchmark Green Agent.")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Host to bind the server")
+    parser.add_argument("--port", type=int, default=9009, help="Port to bind the server")
+    parser.add_argument("--card-url", type=str, help="URL to advertise in the agent card")
+    parser.add_argument("--metrics", action="store_true", help="Expose Prometheus-style metrics at /metrics")
+    parser.add_argument("--task-store", type=str, default=os.environ.get("TASK_STORE_PATH", "tasks.sqlite"), help="SQLite file tasks are kept in (default: $TASK_STORE_PATH or tasks.sqlite)")
+    parser.add_argument("--task-retention", type=float, default=DEFAULT_MAX_AGE, help="Seconds finished tasks are kept")
+    parser.add_argument("--max-stored-tasks", type=int, default=DEFAULT_MAX_TERMINAL_TASKS, help="Most recent finished tasks kept")
+    args = parser.parse_args()
+
+    task_store = SQLiteTaskStore(
+        args.task_store,
+        max_age=args.task_retention,
+        max_terminal_tasks=args.max_stored_tasks,
+    )
+
+    # Create and run server
+    app = build_app(args.card_url or f"http://{args.host}:{args.port}/", metrics=args.metrics, task_store=task_store)
+    uvicorn.run(app, host=args.host, port=args.port)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
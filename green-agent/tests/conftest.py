@@ -1,6 +1,14 @@
+import asyncio
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable
+
 import httpx
 import pytest
 
+import agent
+from dataset import QAPair, load_dataset
+
 
 def pytest_addoption(parser):
     parser.addoption(
@@ -13,6 +21,11 @@ def pytest_addoption(parser):
         default="http://localhost:9019",
         help="Purple Agent URL (default: http://localhost:9019)",
     )
+    parser.addoption(
+        "--benchmark-report",
+        default=None,
+        help="Write the offline benchmark report (JSON) to this path",
+    )
 
 
 @pytest.fixture(scope="session")
@@ -42,4 +55,45 @@ def purple_agent(request):
     except Exception as e:
         pytest.exit(f"Could not connect to Purple Agent at {url}: {e}", returncode=1)
 
-    return url
\ No newline at end of file
+    return url
+
+@dataclass
+class FakePurple:
+    """How the fake purple agent behind every FakeMessenger of a test answers."""
+    answer: Callable[[QAPair], str] = lambda qa: "22"
+    failing: set[int] = field(default_factory=set)  # question ids that raise
+    delay: float = 0.0
+    asked: list[tuple[str, int]] = field(default_factory=list)  # (url, question id), in order
+
+
+class FakeMessenger:
+    """Stands in for the green agent's Messenger; fails once closed, like a closed connection pool."""
+
+    def __init__(self, purple: FakePurple):
+        self.purple = purple
+        self.questions = {qa.question: qa for qa in load_dataset()}
+        self.closed = False
+
+    def configure(self, **kwargs):
+        pass
+
+    async def talk_to_agent(self, question: str, url: str, **kwargs) -> str:
+        qa = self.questions[question]
+        self.purple.asked.append((url, qa.id))
+        await asyncio.sleep(self.purple.delay)
+        if self.closed:
+            raise RuntimeError("messenger is closed")
+        if qa.id in self.purple.failing:
+            raise RuntimeError("purple agent hiccup")
+        return self.purple.answer(qa)
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_purple(monkeypatch) -> FakePurple:
+    """Every green Agent created in the test talks to a FakePurple instead of a real purple agent."""
+    purple = FakePurple()
+    monkeypatch.setattr(agent, "Messenger", partial(FakeMessenger, purple))
+    return purple
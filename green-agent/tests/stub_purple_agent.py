@@ -0,0 +1,118 @@
+"""
+In-process stub Purple Agent for benchmarking the green agent offline.
+
+Answers come from the benchmark's own ground truth, so no LLM is needed.
+Latency, error rate and accuracy are configurable; whether a question is
+answered correctly or fails is derived from a hash of the question text,
+so every run (sequential or concurrent) sees exactly the same answers.
+"""
+import asyncio
+import hashlib
+import random
+import socket
+import threading
+import time
+from dataclasses import dataclass
+
+import uvicorn
+from a2a.server.agent_execution import AgentExecutor, RequestContext
+from a2a.server.apps import A2AStarletteApplication
+from a2a.server.events import EventQueue
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import InMemoryTaskStore, TaskUpdater
+from a2a.types import AgentCapabilities, AgentCard
+from a2a.utils import new_agent_text_message, new_task
+
+from dataset import load_dataset
+
+
+@dataclass
+class StubConfig:
+    # Log-normal latency: median latency_median seconds, spread latency_sigma
+    latency_median: float = 0.02
+    latency_sigma: float = 0.5
+    error_rate: float = 0.05
+    accuracy: float = 0.5
+    seed: int = 0
+
+
+def _unit_hash(text: str, salt: str) -> float:
+    """Deterministic value in [0, 1) for `text`."""
+    digest = hashlib.sha256(f"{salt}:{text}".encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2**64
+
+
+class StubPurpleExecutor(AgentExecutor):
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.answers = {qa.question: qa.answer for qa in load_dataset()}
+        self.requests = 0
+        self._rng = random.Random(config.seed)
+
+    async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
+        self.requests += 1
+        task = context.current_task
+        if not task:
+            task = new_task(context.message)
+            await event_queue.enqueue_event(task)
+        updater = TaskUpdater(event_queue, task.id, task.context_id)
+
+        question = context.get_user_input()
+        await asyncio.sleep(self._rng.lognormvariate(0, self.config.latency_sigma) * self.config.latency_median)
+
+        salt = str(self.config.seed)
+        if _unit_hash(question, salt + "error") < self.config.error_rate:
+            await updater.failed(new_agent_text_message("stub failure", context_id=task.context_id))
+            return
+        truth = self.answers.get(question, 0.0)
+        correct = _unit_hash(question, salt + "correct") < self.config.accuracy
+        answer = truth if correct else truth * 2 + 1
+        await updater.complete(new_agent_text_message(f"{answer}", context_id=task.context_id))
+
+    async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
+        pass
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class StubPurpleAgent:
+    """Runs the stub Purple Agent with uvicorn in a background thread (its own event loop)."""
+
+    def __init__(self, config: StubConfig | None = None):
+        self.config = config or StubConfig()
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.executor = StubPurpleExecutor(self.config)
+        card = AgentCard(
+            name="Stub Purple Agent",
+            description="Answers ETF benchmark questions from the ground truth.",
+            url=f"{self.url}/",
+            version="1.0.0",
+            default_input_modes=["text"],
+            default_output_modes=["text"],
+            capabilities=AgentCapabilities(),
+            skills=[],
+        )
+        app = A2AStarletteApplication(
+            agent_card=card,
+            http_handler=DefaultRequestHandler(agent_executor=self.executor, task_store=InMemoryTaskStore()),
+        ).build()
+        self._server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def __enter__(self) -> "StubPurpleAgent":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Stub purple agent did not start")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=10)
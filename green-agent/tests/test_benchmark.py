@@ -0,0 +1,147 @@
+"""
+Offline benchmark of the green agent against an in-process stub Purple Agent.
+
+Measures the green side's own overhead for sequential vs. concurrent
+dispatch: wall time, questions/second, peak RSS and event-loop lag.
+
+Run with:
+  uv run pytest tests/test_benchmark.py -v -s --benchmark-report benchmark.json
+"""
+import asyncio
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+from uuid import uuid4
+
+import httpx
+import pytest
+import uvicorn
+from a2a.client import A2ACardResolver, ClientConfig, ClientFactory
+from a2a.types import Message, Part, Role, TextPart
+
+from metrics import percentile
+from server import build_app
+from stub_purple_agent import StubConfig, StubPurpleAgent, free_port
+
+
+NUM_QUESTIONS = 60
+MODES = {
+    "sequential": {"max_concurrency": 1},
+    "concurrent": {"max_concurrency": 16},
+}
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+async def measure_loop_lag(samples: list[float], interval: float = 0.01) -> None:
+    """Record how late the event loop wakes up from a short sleep."""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - started - interval))
+
+
+async def run_assessment(green_url: str, purple_url: str, config: dict) -> dict:
+    request = json.dumps({"participants": {"agent": purple_url}, "config": config})
+    async with httpx.AsyncClient(timeout=300) as httpx_client:
+        agent_card = await A2ACardResolver(httpx_client=httpx_client, base_url=green_url).get_agent_card()
+        client = ClientFactory(ClientConfig(httpx_client=httpx_client, streaming=True)).create(agent_card)
+        msg = Message(
+            kind="message",
+            role=Role.user,
+            parts=[Part(TextPart(text=request))],
+            message_id=uuid4().hex,
+        )
+        results = None
+        async for event in client.send_message(msg):
+            match event:
+                case (task, update):
+                    for artifact in task.artifacts or []:
+                        if artifact.name != "Result":
+                            continue
+                        for part in artifact.parts:
+                            if hasattr(part.root, "data"):
+                                results = part.root.data
+        return results
+
+
+async def benchmark_mode(green_url: str, purple_url: str, config: dict) -> dict:
+    lag_samples: list[float] = []
+    probe = asyncio.create_task(measure_loop_lag(lag_samples))
+    started = time.perf_counter()
+    results = await run_assessment(green_url, purple_url, config)
+    wall_time = time.perf_counter() - started
+    probe.cancel()
+
+    assert results is not None, "Assessment should return results"
+    return {
+        "results": results,
+        "report": {
+            "questions": results["total"],
+            "score": results["score"],
+            "wall_time": round(wall_time, 4),
+            "questions_per_second": round(results["total"] / wall_time, 2),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "loop_lag_p99_ms": round((percentile(lag_samples, 99) or 0) * 1000, 3),
+            "loop_lag_max_ms": round(max(lag_samples, default=0) * 1000, 3),
+            "green_metrics": results.get("metrics"),
+        },
+    }
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_sequential_vs_concurrent(request):
+    stub_config = StubConfig()
+    port = free_port()
+    green_url = f"http://127.0.0.1:{port}"
+    green = uvicorn.Server(uvicorn.Config(build_app(f"{green_url}/"), host="127.0.0.1", port=port, log_level="warning"))
+    serve_task = asyncio.create_task(green.serve())
+    while not green.started:
+        await asyncio.sleep(0.01)
+
+    runs = {}
+    try:
+        with StubPurpleAgent(stub_config) as purple:
+            for mode, mode_config in MODES.items():
+                config = {"num_tasks": NUM_QUESTIONS, "checkpoint": False, **mode_config}
+                runs[mode] = await benchmark_mode(green_url, purple.url, config)
+    finally:
+        green.should_exit = True
+        await serve_task
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "stub": vars(stub_config),
+        "num_questions": NUM_QUESTIONS,
+        "modes": {mode: run["report"] for mode, run in runs.items()},
+    }
+    print(json.dumps(report, indent=2))
+    report_path = request.config.getoption("--benchmark-report")
+    if report_path:
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    sequential, concurrent = runs["sequential"]["results"], runs["concurrent"]["results"]
+    assert sequential["total"] == concurrent["total"] == NUM_QUESTIONS
+    # Concurrency must not change grading
+    assert sequential["score"] == concurrent["score"]
+    assert [r["correct"] for r in sequential["results"]] == [r["correct"] for r in concurrent["results"]]
+    assert report["modes"]["concurrent"]["wall_time"] < report["modes"]["sequential"]["wall_time"]
@@ -0,0 +1,63 @@
+"""Checkpoint journal keys and resuming an assessment."""
+import json
+
+import pytest
+from a2a.server.events import EventQueue
+from a2a.server.tasks import TaskUpdater
+from a2a.types import Message, Part, Role, TextPart
+
+from agent import Agent
+from checkpoint import CheckpointJournal
+
+DATASET_HASH = "0" * 64
+
+
+async def assess(purple, participants: dict[str, str], config: dict) -> list[int]:
+    """Run one assessment; returns the ids of the questions that were asked."""
+    purple.asked.clear()
+    message = Message(
+        role=Role.user,
+        parts=[Part(TextPart(text=json.dumps({"participants": participants, "config": config})))],
+        message_id="m",
+    )
+    await Agent().run(message, TaskUpdater(EventQueue(), "task", "context"))
+    return [qid for _, qid in purple.asked]
+
+
+def test_journal_key_separates_roles_and_question_sets(tmp_path):
+    def path(role="agent", ids=(1, 2, 3), url="http://purple", dataset_hash=DATASET_HASH):
+        return CheckpointJournal(url, dataset_hash, role, ids, directory=tmp_path).path
+
+    assert path() == path(ids=[3, 2, 1])
+    assert len({path(), path(role="rival"), path(ids=(1, 2)), path(url="http://other"), path(dataset_hash="1" * 64)}) == 5
+
+
+def test_journal_records_and_loads(tmp_path):
+    journal = CheckpointJournal("http://purple", DATASET_HASH, directory=tmp_path)
+    journal.record({"question_id": 1, "response": "21"})
+    journal.record({"question_id": 2, "response": "5"})
+    journal.record({"question_id": 1, "response": "22"})
+    journal.close()
+    # A crash mid-write leaves a truncated line behind
+    with open(journal.path, "a") as f:
+        f.write('{"question_id": 3, "resp')
+    assert {qid: r["response"] for qid, r in journal.load().items()} == {1: "22", 2: "5"}
+    journal.reset()
+    assert journal.load() == {}
+
+
+@pytest.mark.asyncio
+async def test_resume_only_asks_missing_questions(tmp_path, monkeypatch, fake_purple):
+    monkeypatch.chdir(tmp_path)
+    purple = "http://purple"
+    config = {"task_ids": "1-6", "max_concurrency": 1}
+
+    # Failed exchanges are not journaled, so the resumed run asks them again
+    fake_purple.failing = {4, 5, 6}
+    assert await assess(fake_purple, {"agent": purple}, config) == [1, 2, 3, 4, 5, 6]
+    fake_purple.failing = set()
+    assert await assess(fake_purple, {"agent": purple}, {**config, "resume": True}) == [4, 5, 6]
+
+    # Another role at the same URL, or another question selection, starts from scratch
+    assert len(await assess(fake_purple, {"rival": purple}, {**config, "resume": True})) == 6
+    assert len(await assess(fake_purple, {"agent": purple}, {"task_ids": "1-3", "resume": True})) == 3
@@ -0,0 +1,96 @@
+"""Behaviour of the adaptive (AIMD) concurrency limit."""
+import asyncio
+
+import httpx
+import pytest
+from a2a.client.errors import A2AClientHTTPError
+
+from concurrency import AdaptiveLimiter
+from metrics import QuestionTiming
+
+
+def answered(latency: float) -> QuestionTiming:
+    timing = QuestionTiming()
+    timing.total = latency
+    return timing
+
+
+async def run_questions(limiter: AdaptiveLimiter, count: int, outcome) -> int:
+    """Ask `count` questions as fast as the limiter allows; returns the peak in flight."""
+    peak = 0
+
+    async def question(i: int) -> None:
+        nonlocal peak
+        async with limiter:
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.001)
+            limiter.observe(*outcome(i))
+
+    await asyncio.gather(*(question(i) for i in range(count)))
+    return peak
+
+
+@pytest.mark.asyncio
+async def test_grows_while_answers_stay_fast():
+    limiter = AdaptiveLimiter(initial=1, max_limit=8)
+    peak = await run_questions(limiter, 200, lambda i: (answered(0.1),))
+    assert limiter.limit == 8
+    assert peak == 8
+    assert [limit for _, limit in limiter.trajectory] == list(range(1, 9))
+
+
+@pytest.mark.asyncio
+async def test_backs_off_once_per_overloaded_window():
+    limiter = AdaptiveLimiter(initial=8)
+    throttled = A2AClientHTTPError(429, "Too Many Requests")
+    timings = [QuestionTiming() for _ in range(8)]
+    for timing in timings:
+        limiter.observe(timing, throttled)
+    # All eight were sent before the first back-off, so they count once
+    assert limiter.limit == 4
+    assert limiter.backoffs == 1
+    limiter.observe(QuestionTiming(), throttled)
+    assert limiter.limit == 2
+    # Errors that do not indicate overload leave the limit alone
+    limiter.observe(QuestionTiming(), httpx.ConnectError("refused"))
+    assert limiter.limit == 2
+
+
+@pytest.mark.asyncio
+async def test_backs_off_when_latency_rises():
+    limiter = AdaptiveLimiter(initial=4, latency_tolerance=2.0)
+    for _ in range(3):
+        limiter.observe(answered(0.1))
+    for _ in range(10):
+        limiter.observe(answered(1.0))
+    assert limiter.limit < 4
+    summary = limiter.summary()
+    assert summary["initial"] == 4 and summary["final"] == int(limiter.limit)
+    assert summary["baseline_latency"] == pytest.approx(0.1)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_a_slot():
+    limiter = AdaptiveLimiter(initial=1)
+    await limiter.__aenter__()
+    waiter = asyncio.create_task(limiter.__aenter__())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    await limiter.__aexit__(None, None, None)
+    assert limiter.in_flight == 0
+    async with limiter:
+        assert limiter.in_flight == 1
+
+
+@pytest.mark.asyncio
+async def test_recovers_after_a_burst_of_fast_answers():
+    limiter = AdaptiveLimiter(initial=8, max_limit=8)
+    # A few cached answers, then the purple agent's normal (10x slower) latency
+    await run_questions(limiter, 500, lambda i: (answered(0.01 if i < 10 else 0.1),))
+    limits = [limit for _, limit in limiter.trajectory]
+    assert limiter.backoffs >= 1 and min(limits) < 8
+    # Once the fast answers leave the window, the baseline follows and the limit grows back
+    assert limiter.baseline == pytest.approx(0.1)
+    assert limiter.limit == 8
@@ -0,0 +1,89 @@
+"""Question selection and task id parsing of the QA dataset."""
+import json
+
+import pytest
+from a2a.server.events import EventQueue
+from a2a.server.tasks import TaskUpdater
+from a2a.types import Message, Part, Role, TaskState, TextPart
+
+from agent import Agent
+from dataset import format_id_ranges, load_dataset, parse_id_ranges
+
+
+@pytest.mark.parametrize(
+    "value, ids",
+    [
+        ("1-3,7", [1, 2, 3, 7]),
+        (" 4 , 10-11 ", [4, 10, 11]),
+        ([5, "1-2", "9"], [5, 1, 2, 9]),
+        ("7-7", [7]),
+    ],
+)
+def test_parse_id_ranges(value, ids):
+    assert parse_id_ranges(value) == ids
+
+
+@pytest.mark.parametrize("value", ["1-", "-3", "a", "1-b", "3-1", "1,,2", "1.5", 12, {"from": 1}])
+def test_parse_id_ranges_rejects_malformed_input(value):
+    with pytest.raises(ValueError):
+        parse_id_ranges(value)
+
+
+def test_format_id_ranges_inverts_parse():
+    assert format_id_ranges([1, 2, 3, 7, 9, 10, 4]) == "1-3,7,9-10,4"
+    assert parse_id_ranges(format_id_ranges([1, 2, 3, 7, 9, 10, 4])) == [1, 2, 3, 7, 9, 10, 4]
+    assert format_id_ranges([]) == ""
+
+
+def test_select_filters_in_order():
+    dataset = load_dataset()
+    # Explicit ids come back in dataset order; unknown ids are ignored
+    assert [qa.id for qa in dataset.select(ids=[10, 1, 5, 100_000])] == [1, 5, 10]
+    vanguard = dataset.select(providers=["Vanguard"])
+    assert vanguard and all(qa.provider == "Vanguard" for qa in vanguard)
+    assert [qa.id for qa in dataset.select(ids=list(range(1, 13)), providers=["Vanguard"], num_tasks=3)] == [1, 4, 7]
+    assert len(dataset.select(num_tasks=5)) == 5
+
+
+def test_seeded_sample_is_reproducible():
+    dataset = load_dataset()
+    sample = [qa.id for qa in dataset.select(sample=10, seed=3)]
+    assert sample == [qa.id for qa in dataset.select(sample=10, seed=3)]
+    assert len(sample) == 10 and sample == sorted(sample)
+    assert sample != [qa.id for qa in dataset.select(sample=10, seed=4)]
+
+
+def test_select_from_config():
+    dataset = load_dataset()
+    selected = dataset.select_from_config({"task_ids": "1-12", "providers": "vanguard", "num_tasks": "2"})
+    assert [qa.id for qa in selected] == [1, 4]
+    assert len(dataset.select_from_config({})) == len(dataset)
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        {"providers": 5},
+        {"providers": ["Vanguard", 5]},
+        {"providers": {"name": "Vanguard"}},
+        {"providers": "Acme"},
+        {"task_ids": "3-1"},
+        {"num_tasks": -1},
+        {"sample": "many"},
+    ],
+)
+def test_select_from_config_rejects_invalid_values(config):
+    with pytest.raises(ValueError):
+        load_dataset().select_from_config(config)
+
+
+@pytest.mark.asyncio
+async def test_invalid_selection_rejects_the_assessment(fake_purple):
+    request = {"participants": {"agent": "http://purple"}, "config": {"providers": 5}}
+    message = Message(role=Role.user, parts=[Part(TextPart(text=json.dumps(request)))], message_id="m")
+    queue = EventQueue()
+    await Agent().run(message, TaskUpdater(queue, "task", "context"))
+    [status] = [queue.queue.get_nowait().status for _ in range(queue.queue.qsize())]
+    assert status.state == TaskState.rejected
+    assert "providers must be" in status.message.parts[0].root.text
+    assert fake_purple.asked == []
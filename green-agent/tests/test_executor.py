@@ -0,0 +1,98 @@
+"""Cancelling assessments through the executor."""
+import asyncio
+import json
+
+import pytest
+from a2a.server.agent_execution import RequestContext
+from a2a.server.events import EventQueue
+from a2a.types import (
+    Message,
+    MessageSendParams,
+    Part,
+    Role,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+from a2a.utils import new_task
+
+from executor import Executor
+
+
+@pytest.fixture(autouse=True)
+def slow_purple(fake_purple):
+    # Answers take a moment, so cancellations land mid-run
+    fake_purple.delay = 0.01
+
+
+def request_context(context_id: str | None = None, num_tasks: int = 20) -> RequestContext:
+    request = {"participants": {"agent": "http://purple"}, "config": {"num_tasks": num_tasks, "checkpoint": False}}
+    message = Message(
+        role=Role.user, parts=[Part(TextPart(text=json.dumps(request)))], message_id="m", context_id=context_id
+    )
+    task = new_task(message)
+    return RequestContext(
+        request=MessageSendParams(message=message), task_id=task.id, context_id=task.context_id, task=task
+    )
+
+
+def drain(queue: EventQueue) -> list:
+    events = []
+    while not queue.queue.empty():
+        events.append(queue.queue.get_nowait())
+    return events
+
+
+def final_state(events: list) -> TaskState:
+    return [e for e in events if isinstance(e, TaskStatusUpdateEvent)][-1].status.state
+
+
+def artifact_data(events: list, name: str) -> dict:
+    [artifact] = [e.artifact for e in events if isinstance(e, TaskArtifactUpdateEvent) and e.artifact.name == name]
+    return artifact.parts[1].root.data
+
+
+async def wait_for_questions(purple, count: int) -> None:
+    while len(purple.asked) < count:
+        await asyncio.sleep(0.001)
+
+
+@pytest.mark.asyncio
+async def test_cancel_reports_partial_results(fake_purple):
+    executor = Executor()
+    context, queue = request_context(), EventQueue()
+    execution = asyncio.create_task(executor.execute(context, queue))
+    await wait_for_questions(fake_purple, 5)
+    await executor.cancel(context, queue)
+    await execution
+
+    events = drain(queue)
+    assert final_state(events) == TaskState.canceled
+    partial = artifact_data(events, "Partial Results")
+    assert partial["cancelled"] is True
+    assert partial["total"] == 20
+    assert 0 < len(partial["results"]) < 20
+    assert partial["score"] == sum(1 for r in partial["results"] if r["correct"])
+    assert executor.running == {}
+
+
+@pytest.mark.asyncio
+async def test_cancel_leaves_other_tasks_in_the_context_running(fake_purple):
+    executor = Executor()
+    cancelled, cancelled_queue = request_context("shared"), EventQueue()
+    kept, kept_queue = request_context("shared"), EventQueue()
+    executions = [
+        asyncio.create_task(executor.execute(cancelled, cancelled_queue)),
+        asyncio.create_task(executor.execute(kept, kept_queue)),
+    ]
+    await wait_for_questions(fake_purple, 5)
+    await executor.cancel(cancelled, cancelled_queue)
+    await asyncio.gather(*executions)
+
+    assert final_state(drain(cancelled_queue)) == TaskState.canceled
+    events = drain(kept_queue)
+    assert final_state(events) == TaskState.completed
+    result = artifact_data(events, "Result")
+    assert len(result["results"]) == 20
+    assert not any("error" in r for r in result["results"])
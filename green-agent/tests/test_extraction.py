@@ -0,0 +1,84 @@
+"""Offline tests and micro-benchmark of numeric answer extraction."""
+import random
+import time
+
+import pytest
+
+from extraction import NO_ANSWER, NOT_FOUND, extract_answer, extract_answers, extract_values, has_final_answer
+from messenger import settled_text
+
+
+@pytest.mark.parametrize(
+    "response, value, source",
+    [
+        ("22", 22.0, "exact"),
+        (" -3.14\n", -3.14, "exact"),
+        ("Answer (Q12): 0.34", 0.34, "marker"),
+        ("Looked at 5 funds. Final answer: 1,234.5", 1234.5, "marker"),
+        ("The answer is 3.2%", 3.2, "marker"),
+        ("About 1.2e3 ETFs", 1200.0, "only"),
+        ("Result: 5e-3.", 0.005, "marker"),
+        ("It fell to −4.5 percent", -4.5, "only"),
+        ("Of 3 providers, 19 qualify", 3.0, "first"),
+        ("H2O and Q12", NOT_FOUND, "none"),
+        ("no idea", NOT_FOUND, "none"),
+    ],
+)
+def test_extract_answer(response, value, source):
+    extraction = extract_answer(response)
+    assert extraction.value == pytest.approx(value)
+    assert extraction.source == source
+
+
+def test_percent_flag():
+    assert extract_answer("The answer is 3.2%").percent
+    assert extract_answer("12 percent").percent
+    assert not extract_answer("12 funds").percent
+
+
+def test_batch_matches_single():
+    responses = ["22", None, "Answer: 7", "22", "none"]
+    assert extract_answers(responses) == [NO_ANSWER if r is None else extract_answer(r) for r in responses]
+    assert extract_values(responses).tolist() == [22.0, NOT_FOUND, 7.0, 22.0, NOT_FOUND]
+
+
+def test_final_answer_survives_more_text():
+    # A streamed response cut short once it has a final answer grades the same as the whole
+    response = "Of 3 providers, the answer is 22.5 percent, up from 19 last year."
+    for end in range(len(response)):
+        settled = settled_text(response[:end])
+        if has_final_answer(settled):
+            assert extract_answer(settled).value == extract_answer(response).value
+    assert not has_final_answer(settled_text("Of 3 providers, the answer is 22"))
+
+
+def synthetic_responses(n: int, seed: int = 0) -> list[tuple[str, float]]:
+    """(response, answer) pairs in the shapes purple agents answer with."""
+    rng = random.Random(seed)
+    shapes = [
+        "{v:.2f}",
+        "{v:,.2f}",
+        "The answer is {v:.2f}%",
+        "Answer (Q{q}): {v:.2f}",
+        "Looking at {q} funds from Vanguard and iShares, the final answer is {v:,.2f}.",
+        "{v:.3e}",
+        "I could not find that.",
+    ]
+    pairs = []
+    for _ in range(n):
+        shape = rng.choice(shapes)
+        value = rng.uniform(-5000, 5000)
+        answer = float(f"{value:.3e}") if "e}" in shape else round(value, 2)
+        pairs.append((shape.format(v=value, q=rng.randint(1, 300)), answer if "{v" in shape else NOT_FOUND))
+    return pairs
+
+
+def test_extraction_benchmark():
+    pairs = synthetic_responses(20_000)
+    responses = [response for response, _ in pairs]
+    started = time.perf_counter()
+    values = extract_values(responses)
+    elapsed = time.perf_counter() - started
+    print(f"\nExtracted {len(responses)} responses in {elapsed * 1000:.1f} ms "
+          f"({len(responses) / elapsed:,.0f}/s)")
+    assert values.tolist() == pytest.approx([answer for _, answer in pairs])
@@ -0,0 +1,79 @@
+"""Offline tests of the vectorized grading module."""
+import random
+
+from grading import GradingPolicy, extract_number, grade, grade_results, grading_policy, regrade
+
+
+def scalar_is_correct(agent_answer: float, ground_truth: float) -> bool:
+    """The original per-question rule the vectorized grader must reproduce."""
+    if ground_truth != 0:
+        return abs(agent_answer - ground_truth) / abs(ground_truth) <= 0.10
+    return agent_answer == 0
+
+
+def test_relative_policy_matches_scalar_rule():
+    rng = random.Random(0)
+    truths = [rng.choice([0.0, rng.uniform(-100, 100)]) for _ in range(2000)]
+    answers = [t * rng.uniform(0.85, 1.15) if rng.random() < 0.9 else rng.choice([0.0, -1.0]) for t in truths]
+    expected = [scalar_is_correct(a, t) for a, t in zip(answers, truths)]
+    assert grade(answers, truths).tolist() == expected
+
+
+def test_absolute_policy():
+    policy = grading_policy("absolute", 0.5)
+    assert grade([10.4, 10.6, 0.3], [10.0, 10.0, 0.0], policy=policy).tolist() == [True, False, True]
+
+
+def test_unit_normalized_accepts_decimal_for_percentage():
+    questions = [
+        "What is the average TotalExpenseRatio across all ETFs in Vanguard? In percentage",
+        "What is the average PriceEarningsRatio across all ETFs in Vanguard?",
+    ]
+    results = [
+        {"question_id": 1, "question": questions[0], "ground_truth": 0.12, "response": "0.0012"},
+        {"question_id": 2, "question": questions[1], "ground_truth": 22.0, "response": "0.22"},
+    ]
+    assert [r["correct"] for r in grade_results(results, GradingPolicy())] == [False, False]
+    assert [r["correct"] for r in grade_results(results, grading_policy("unit_normalized"))] == [True, False]
+
+
+def test_regrade_stored_results():
+    stored = {"results": [{"score": 0, "total": 2, "pass_rate": 0, "results": [
+        # Stored before raw responses were kept: falls back to agent_answer
+        {"question_id": 1, "question": "Q1", "correct": False, "agent_answer": 21, "ground_truth": 22.0},
+        {"question_id": 2, "question": "Q2", "correct": None, "agent_answer": None, "ground_truth": 5.0,
+         "response": None, "error": "timed out"},
+    ]}]}
+    run = regrade(stored, GradingPolicy())["results"][0]
+    assert (run["score"], run["total"], run["pass_rate"]) == (1, 2, 50.0)
+    assert [r["agent_answer"] for r in run["results"]] == [21, -1]
+
+
+def test_extract_number():
+    assert extract_number("The answer is -3.14 percent") == -3.14
+    assert extract_number("no idea") == -1
+
+
+
+def test_regrade_multi_participant_results():
+    def participant(responses: list[str]) -> dict:
+        return {"score": 0, "total": 2, "pass_rate": 0, "results": [
+            {"question_id": i, "question": f"Q{i}", "correct": None, "agent_answer": None, "ground_truth": truth,
+             "response": response}
+            for i, (truth, response) in enumerate(zip([22.0, 5.0], responses), start=1)
+        ]}
+
+    stored = {"results": [{
+        "total": 2,
+        "scores": [
+            {"role": "agent", "url": "http://a", "score": 0, "total": 2, "pass_rate": 0},
+            {"role": "rival", "url": "http://b", "score": 0, "total": 2, "pass_rate": 0},
+        ],
+        "participants": {"agent": participant(["22", "7"]), "rival": participant(["22", "5"])},
+    }]}
+    run = regrade(stored, GradingPolicy())["results"][0]
+    assert [(row["role"], row["score"], row["pass_rate"]) for row in run["scores"]] == [
+        ("rival", 2, 100.0), ("agent", 1, 50.0),
+    ]
+    assert run["participants"]["agent"]["score"] == 1
+    assert [r["correct"] for r in run["participants"]["rival"]["results"]] == [True, True]
@@ -0,0 +1,43 @@
+"""Indexing of results files by the repository's leaderboard.py."""
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from leaderboard import LeaderboardIndex  # noqa: E402
+
+
+def participant(score: int, correct: list[bool]) -> dict:
+    return {"score": score, "total": len(correct), "pass_rate": round(score / len(correct) * 100, 2), "results": [
+        {"question_id": i, "question": f"How many ETFs does Vanguard have with rank {i}?", "correct": ok,
+         "agent_answer": 1.0, "ground_truth": 1.0, "response": "1"}
+        for i, ok in enumerate(correct, start=1)
+    ]}
+
+
+def test_multi_participant_run_indexes_one_row_per_role(tmp_path):
+    results, submissions = tmp_path / "results", tmp_path / "submissions"
+    results.mkdir()
+    submissions.mkdir()
+    run = {
+        "total": 2,
+        "scores": [
+            {"role": "agent", "url": "http://a", "score": 2, "total": 2, "pass_rate": 100.0},
+            {"role": "rival", "url": "http://b", "score": 1, "total": 2, "pass_rate": 50.0},
+        ],
+        "participants": {"agent": participant(2, [True, True]), "rival": participant(1, [True, False])},
+    }
+    data = {"participants": {"agent": "agent-id", "rival": "rival-id"}, "results": [run]}
+    (results / "sub.json").write_text(json.dumps(data))
+
+    index = LeaderboardIndex(tmp_path / "index.sqlite")
+    assert index.update(results, submissions) == (1, 0)
+    runs = {row["run_id"]: row for row in index.runs()}
+    assert set(runs) == {"sub:agent", "sub:rival"}
+    assert (runs["sub:agent"]["participant"], runs["sub:agent"]["score"]) == ("agent-id", 2)
+    assert (runs["sub:rival"]["participant"], runs["sub:rival"]["pass_rate"]) == ("rival-id", 50.0)
+    [template] = index.templates(participant="rival-id")
+    assert (template["answers"], template["correct"]) == (2, 1)
+    index.close()
@@ -0,0 +1,348 @@
+"""Retries, circuit breaker, connection pool, card cache and streamed answers of the Messenger."""
+import asyncio
+import json
+import random
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from a2a.client.errors import A2AClientHTTPError, A2AClientJSONError, A2AClientTimeoutError
+from a2a.types import (
+    AgentCapabilities,
+    AgentCard,
+    Artifact,
+    Part,
+    Task,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+
+from agent import Agent
+from extraction import has_final_answer
+from messenger import (
+    AgentResponseError,
+    CircuitBreaker,
+    CircuitOpenError,
+    Messenger,
+    RetryPolicy,
+    collect_outputs,
+    create_message,
+    is_transient_error,
+    settled_text,
+)
+
+
+@pytest.mark.parametrize(
+    "error, transient",
+    [
+        (httpx.ConnectError("refused"), True),
+        (httpx.ReadTimeout("slow"), True),
+        (httpx.RemoteProtocolError("dropped"), True),
+        (A2AClientTimeoutError("deadline"), True),
+        (TimeoutError(), True),
+        (A2AClientHTTPError(429, "Too Many Requests"), True),
+        (A2AClientHTTPError(503, "Unavailable"), True),
+        (A2AClientHTTPError(404, "Not Found"), False),
+        (A2AClientHTTPError(400, "Bad Request"), False),
+        (A2AClientJSONError("not JSON"), False),
+        (AgentResponseError("http://purple", {"status": "failed"}), False),
+        (ValueError("bug"), False),
+    ],
+)
+def test_is_transient_error(error, transient):
+    assert is_transient_error(error) is transient
+
+
+def test_backoff_doubles_up_to_the_cap(monkeypatch):
+    policy = RetryPolicy(backoff_base=0.5, backoff_max=5.0)
+    monkeypatch.setattr(random, "uniform", lambda low, high: high)
+    assert [policy.backoff(attempt) for attempt in range(1, 7)] == [0.5, 1.0, 2.0, 4.0, 5.0, 5.0]
+    # Jitter keeps each delay between half and all of it
+    monkeypatch.setattr(random, "uniform", lambda low, high: low)
+    assert policy.backoff(3) == 1.0
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.before_call("http://purple")
+        breaker.record_failure()
+    # A success in between resets the count
+    breaker.record_success()
+    for _ in range(3):
+        breaker.before_call("http://purple")
+        breaker.record_failure()
+    assert breaker.is_open
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call("http://purple")
+
+
+def test_breaker_half_open_probe():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    # Once reset_timeout has passed one trial call goes through; the rest still fail fast
+    breaker.opened_at -= 31
+    assert breaker.before_call("http://purple") is True
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call("http://purple")
+    # A failed trial re-opens the circuit straight away
+    breaker.record_failure()
+    assert breaker.is_open
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call("http://purple")
+
+    # A trial that ends without an outcome lets the next call try
+    breaker.opened_at -= 31
+    assert breaker.before_call("http://purple")
+    breaker.release_trial()
+    assert breaker.before_call("http://purple")
+    breaker.record_success()
+    assert not breaker.is_open and breaker.failures == 0
+    breaker.record_failure()
+    assert not breaker.is_open
+
+
+@pytest.mark.asyncio
+async def test_only_one_concurrent_call_probes_a_half_open_circuit(monkeypatch):
+    messenger = Messenger(failure_threshold=1, reset_timeout=30)
+    breaker = messenger.breaker("http://purple")
+    breaker.record_failure()
+    breaker.opened_at -= 31
+    sent = []
+    release = asyncio.Event()
+
+    async def send_once(message, *args):
+        sent.append(message)
+        await release.wait()
+        return {"response": "22", "status": "completed"}
+
+    monkeypatch.setattr(messenger, "_send_once", send_once)
+    calls = [asyncio.create_task(messenger.talk_to_agent(f"Q{i}", "http://purple")) for i in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*calls, return_exceptions=True)
+    assert sent == ["Q0"]
+    assert results[0] == "22"
+    assert all(isinstance(r, CircuitOpenError) for r in results[1:])
+    assert not breaker.is_open
+
+
+@pytest.mark.asyncio
+async def test_cancelled_trial_frees_the_probe(monkeypatch):
+    messenger = Messenger(failure_threshold=1, reset_timeout=30)
+    breaker = messenger.breaker("http://purple")
+    breaker.record_failure()
+    breaker.opened_at -= 31
+
+    async def hang(*args):
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(messenger, "_send_once", hang)
+    trial = asyncio.create_task(messenger.talk_to_agent("Q", "http://purple"))
+    await asyncio.sleep(0)
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+    assert breaker.is_open and not breaker.trial_in_flight
+
+
+def test_breaker_threshold_zero_never_opens():
+    breaker = CircuitBreaker(failure_threshold=0)
+    for _ in range(100):
+        breaker.record_failure()
+    assert not breaker.is_open
+
+
+def test_reset_timeout_is_its_own_setting():
+    messenger = Messenger(failure_threshold=3, reset_timeout=5, retry_policy=RetryPolicy(request_timeout=300))
+    assert messenger.breaker("http://purple").reset_timeout == 5
+    messenger.configure(retry_policy=RetryPolicy(request_timeout=60), reset_timeout=12)
+    breaker = messenger.breaker("http://purple")
+    assert (breaker.failure_threshold, breaker.reset_timeout) == (3, 12)
+
+
+class StreamingClient:
+    """Replays a purple agent streaming its answer as artifact chunks.
+
+    `events` holds ("chunk", text, last_chunk) and ("status", state) entries;
+    each is yielded as a (task, update) pair with the task as it stands.
+    """
+
+    def __init__(self, events: list[tuple]):
+        self.events = events
+        self.sent = 0
+
+    async def send_message(self, message, context=None):
+        task = Task(id="t", context_id="c", status=TaskStatus(state=TaskState.working), artifacts=[])
+        for kind, *args in self.events:
+            self.sent += 1
+            if kind == "chunk":
+                text, last_chunk = args
+                if not task.artifacts:
+                    task.artifacts.append(Artifact(artifact_id="a", parts=[]))
+                task.artifacts[0].parts.append(Part(TextPart(text=text)))
+                update = TaskArtifactUpdateEvent(
+                    task_id="t", context_id="c", artifact=task.artifacts[0], last_chunk=last_chunk
+                )
+            else:
+                task.status = TaskStatus(state=args[0])
+                update = TaskStatusUpdateEvent(
+                    task_id="t", context_id="c", status=task.status, final=args[0] == TaskState.completed
+                )
+            yield task, update
+
+
+async def collect(events: list[tuple]) -> tuple[dict, int]:
+    client = StreamingClient(events)
+    outputs = await collect_outputs(client, create_message(text="Q"), answer_ready=has_final_answer)
+    return outputs, client.sent
+
+
+def test_settled_text_stops_at_the_last_whitespace():
+    assert settled_text("Final answer: 2") == "Final answer: "
+    assert settled_text("Final answer: 22.5 ") == "Final answer: 22.5 "
+    assert settled_text("22") == ""
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("last_chunk", [None, False])
+async def test_open_artifact_waits_for_the_rest_of_the_number(last_chunk):
+    outputs, sent = await collect([
+        ("chunk", "Final answer: 2", last_chunk),
+        ("chunk", "2.5", last_chunk),
+        ("chunk", " percent", last_chunk),
+        ("chunk", " of them.", last_chunk),
+        ("status", TaskState.completed),
+    ])
+    assert outputs["stopped_early"]
+    assert outputs["response"] == "Final answer: 22.5 "
+    assert sent == 3
+
+
+@pytest.mark.asyncio
+async def test_status_event_between_chunks_does_not_settle_the_text():
+    outputs, sent = await collect([
+        ("chunk", "Final answer: 2", None),
+        ("status", TaskState.working),
+        ("chunk", "2.5", None),
+        ("status", TaskState.completed),
+    ])
+    assert "stopped_early" not in outputs
+    assert outputs["response"] == "Final answer: 22.5"
+    assert sent == 4
+
+
+@pytest.mark.asyncio
+async def test_last_chunk_settles_the_whole_text():
+    outputs, sent = await collect([
+        ("chunk", "Final answer: 2", None),
+        ("chunk", "2.5", True),
+        ("status", TaskState.completed),
+    ])
+    assert outputs["stopped_early"]
+    assert outputs["response"] == "Final answer: 22.5"
+    assert sent == 2
+
+
+class FakePurpleServer:
+    """A purple agent behind an httpx.MockTransport that answers "22"; can be told to fail."""
+
+    def __init__(self):
+        self.card_fetches = 0
+        self.messages = 0
+        self.context_ids: list[str | None] = []  # of the messages received
+        self.failing = False
+        self.card = AgentCard(
+            name="purple", description="test", url="http://purple/", version="1.0.0",
+            default_input_modes=["text/plain"], default_output_modes=["text/plain"],
+            capabilities=AgentCapabilities(), skills=[],
+        )
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.method == "GET":
+            self.card_fetches += 1
+            return httpx.Response(200, json=self.card.model_dump(mode="json", by_alias=True, exclude_none=True))
+        if self.failing:
+            return httpx.Response(503)
+        self.messages += 1
+        rpc = json.loads(request.content)
+        self.context_ids.append(rpc["params"]["message"].get("contextId"))
+        answer = {"kind": "message", "role": "agent", "messageId": f"answer-{self.messages}",
+                  "contextId": "ctx", "parts": [{"kind": "text", "text": "22"}]}
+        return httpx.Response(200, json={"jsonrpc": "2.0", "id": rpc["id"], "result": answer})
+
+
+@pytest.fixture
+def purple_server() -> FakePurpleServer:
+    return FakePurpleServer()
+
+
+def pooled_messenger(server: FakePurpleServer, **kwargs) -> Messenger:
+    messenger = Messenger(retry_policy=RetryPolicy(max_attempts=1), **kwargs)
+    messenger._httpx_client = httpx.AsyncClient(transport=httpx.MockTransport(server))
+    return messenger
+
+
+@pytest.mark.asyncio
+async def test_messages_reuse_the_card_and_client(purple_server):
+    messenger = pooled_messenger(purple_server)
+    pool = messenger._get_httpx_client()
+    client = await messenger.get_client("http://purple")
+    assert [await messenger.talk_to_agent("Q", "http://purple") for _ in range(3)] == ["22"] * 3
+    assert purple_server.card_fetches == 1 and purple_server.messages == 3
+    assert await messenger.get_client("http://purple") is client
+    assert messenger._get_httpx_client() is pool
+    await messenger.close()
+    assert pool.is_closed and messenger._clients == {}
+
+
+@pytest.mark.asyncio
+async def test_card_is_resolved_again_after_its_ttl(purple_server):
+    messenger = pooled_messenger(purple_server, card_ttl=60)
+    client = await messenger.get_client("http://purple")
+    await messenger.talk_to_agent("Q", "http://purple")
+    messenger._clients["http://purple"].expires_at -= 61
+    await messenger.talk_to_agent("Q", "http://purple")
+    assert purple_server.card_fetches == 2
+    assert await messenger.get_client("http://purple") is not client
+    await messenger.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_request_invalidates_the_card(purple_server):
+    messenger = pooled_messenger(purple_server)
+    await messenger.talk_to_agent("Q", "http://purple")
+    purple_server.failing = True
+    with pytest.raises(A2AClientHTTPError):
+        await messenger.talk_to_agent("Q", "http://purple")
+    assert "http://purple" not in messenger._clients
+    # The agent is back: its card is fetched again before the next message
+    purple_server.failing = False
+    assert await messenger.talk_to_agent("Q", "http://purple") == "22"
+    assert purple_server.card_fetches == 2
+    await messenger.close()
+
+
+def test_invalidate_drops_one_url_or_all():
+    messenger = Messenger()
+    messenger._clients = {"http://a": "client a", "http://b": "client b"}
+    messenger.invalidate("http://a")
+    assert list(messenger._clients) == ["http://b"]
+    messenger.invalidate()
+    assert messenger._clients == {}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_questions_do_not_share_a_conversation(purple_server):
+    agent = Agent()
+    agent.messenger = pooled_messenger(purple_server)
+    questions = [SimpleNamespace(id=i, question=f"Q{i}", answer=22.0) for i in range(4)]
+    await agent.evaluate_question(questions[0], "http://purple")
+    results = await asyncio.gather(*(agent.evaluate_question(qa, "http://purple") for qa in questions[1:]))
+    assert [r["response"] for r in results] == ["22"] * 3
+    assert purple_server.context_ids == [None] * 4
+    await agent.messenger.close()
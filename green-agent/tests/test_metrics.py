@@ -0,0 +1,93 @@
+"""Percentiles, run summaries and the Prometheus /metrics payload."""
+import pytest
+from starlette.testclient import TestClient
+
+import metrics
+from metrics import LATENCY_BUCKETS, MetricsRegistry, QuestionTiming, RunMetrics, percentile, summarize
+from server import build_app
+
+
+def timing(total: float | None, first_byte: float | None = None) -> QuestionTiming:
+    return QuestionTiming(started=0.0, total=total, first_byte=first_byte)
+
+
+@pytest.fixture
+def registry(monkeypatch) -> MetricsRegistry:
+    registry = MetricsRegistry()
+    monkeypatch.setattr(metrics, "REGISTRY", registry)
+    return registry
+
+
+@pytest.mark.parametrize(
+    "values, p, expected",
+    [
+        ([7.0], 99, 7.0),
+        ([5, 1, 4, 2, 3], 0, 1),
+        ([5, 1, 4, 2, 3], 50, 3),
+        ([5, 1, 4, 2, 3], 100, 5),
+        ([1, 2, 3, 4], 50, 2.5),
+        ([10, 20], 95, 19.5),
+    ],
+)
+def test_percentile_interpolates_between_ranks(values, p, expected):
+    assert percentile(values, p) == pytest.approx(expected)
+
+
+def test_percentile_of_nothing():
+    assert percentile([], 50) is None
+
+
+def test_summarize():
+    assert summarize(list(range(1, 101))) == {
+        "count": 100, "mean": 50.5, "p50": 50.5, "p95": 95.05, "p99": 99.01, "max": 100,
+    }
+    assert summarize([]) == {"count": 0, "mean": None, "p50": None, "p95": None, "p99": None, "max": None}
+
+
+def test_run_summary_counts_errors_and_skips_unfinished_questions(registry):
+    run = RunMetrics()
+    run.record(timing(1.0, first_byte=0.2))
+    run.record(timing(3.0, first_byte=0.4))
+    run.record(timing(None), error=TimeoutError())
+    run.finish()
+    summary = run.summary()
+    assert summary["questions"] == 3
+    assert summary["latency"]["count"] == 2 and summary["latency"]["p50"] == 2.0
+    assert summary["first_byte"]["max"] == 0.4
+    assert summary["errors"] == {"TimeoutError": 1} and summary["error_count"] == 1
+    # Every recorded question also reaches the process-wide registry
+    assert registry.questions == 3
+
+
+def test_registry_renders_a_cumulative_histogram(registry):
+    for total in (0.07, 0.3, 0.3, 400.0):
+        registry.observe(timing(total))
+    registry.observe(timing(None), error=ConnectionError())
+    registry.assessments = 2
+    registry.in_flight = 1
+    lines = registry.render().splitlines()
+
+    assert "etf_benchmark_assessments_total 2" in lines
+    assert "etf_benchmark_assessments_in_progress 1" in lines
+    assert "etf_benchmark_questions_total 5" in lines
+    assert 'etf_benchmark_question_errors_total{type="ConnectionError"} 1' in lines
+    buckets = {
+        line.split('le="')[1].split('"')[0]: int(line.rsplit(" ", 1)[1])
+        for line in lines if line.startswith("etf_benchmark_question_latency_seconds_bucket")
+    }
+    assert list(buckets) == [str(bound) for bound in LATENCY_BUCKETS] + ["+Inf"]
+    assert (buckets["0.05"], buckets["0.1"], buckets["0.25"], buckets["0.5"], buckets["300.0"]) == (0, 1, 1, 3, 3)
+    assert buckets["+Inf"] == 5
+    assert "etf_benchmark_question_latency_seconds_sum 400.670000" in lines
+
+
+def test_metrics_endpoint_is_opt_in(registry):
+    registry.questions = 4
+    with TestClient(build_app("http://green/", metrics=True)) as client:
+        response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "etf_benchmark_questions_total 4" in response.text
+
+    with TestClient(build_app("http://green/")) as client:
+        assert client.get("/metrics").status_code == 404
@@ -0,0 +1,77 @@
+"""Chunking and running score of streamed partial results."""
+import json
+
+import pytest
+from a2a.server.events import EventQueue
+from a2a.server.tasks import TaskUpdater
+from a2a.types import Message, Part, Role, TaskArtifactUpdateEvent, TextPart
+
+from agent import Agent
+from grading import grade_results
+from partial_results import PartialResultStream
+
+
+def artifacts(queue: EventQueue) -> list:
+    events = []
+    while not queue.queue.empty():
+        event = queue.queue.get_nowait()
+        if isinstance(event, TaskArtifactUpdateEvent):
+            events.append(event)
+    return events
+
+
+def result(qid: int, correct: bool) -> dict:
+    return {"question_id": qid, "question": f"Q{qid}", "ground_truth": 1.0, "response": "1" if correct else "3"}
+
+
+@pytest.mark.asyncio
+async def test_chunks_by_count_and_close():
+    queue = EventQueue()
+    stream = PartialResultStream(TaskUpdater(queue, "task", "context"), total=5, every=2, grade=grade_results)
+    for qid in range(1, 6):
+        await stream.add(result(qid, correct=qid != 2))
+    await stream.close()
+    # Chunks of one artifact: the first starts it, later ones append, close() ends it
+    events = artifacts(queue)
+    assert {e.artifact.artifact_id for e in events} == {stream.artifact_id}
+    chunks = [(e.append, e.last_chunk, e.artifact.parts[0].root.data) for e in events]
+    assert [[r["question_id"] for r in data["results"]] for _, _, data in chunks] == [[1, 2], [3, 4], [5]]
+    assert [(append, last) for append, last, _ in chunks] == [(False, False), (True, False), (True, True)]
+    assert [(data["graded"], data["score"], data["pass_rate"]) for _, _, data in chunks] == [
+        (2, 1, 50.0), (4, 3, 75.0), (5, 4, 80.0),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_disabled_stream_emits_nothing():
+    queue = EventQueue()
+    stream = PartialResultStream(TaskUpdater(queue, "task", "context"), total=3)
+    await stream.add(result(1, correct=True))
+    await stream.close()
+    assert artifacts(queue) == []
+
+
+@pytest.mark.asyncio
+async def test_running_score_matches_final_results(fake_purple):
+    # Odd-numbered questions are answered correctly, even-numbered ones wrongly
+    fake_purple.answer = lambda qa: str(qa.answer if qa.id % 2 else qa.answer * 2 + 1)
+    request = {"participants": {"agent": "http://purple"},
+               "config": {"num_tasks": 10, "max_concurrency": 1, "stream_every": 4, "checkpoint": False}}
+    queue = EventQueue()
+    message = Message(role=Role.user, parts=[Part(TextPart(text=json.dumps(request)))], message_id="m")
+    await Agent().run(message, TaskUpdater(queue, "task", "context"))
+
+    events = artifacts(queue)
+    chunks = [e.artifact.parts[0].root.data for e in events if e.artifact.name == "Partial Results"]
+    [final] = [e.artifact.parts[1].root.data for e in events if e.artifact.name == "Result"]
+    assert [len(chunk["results"]) for chunk in chunks] == [4, 4, 2]
+    assert [chunk["graded"] for chunk in chunks] == [4, 8, 10]
+    streamed = [r for chunk in chunks for r in chunk["results"]]
+    assert streamed == final["results"]
+    assert (chunks[-1]["score"], chunks[-1]["total"], chunks[-1]["pass_rate"]) == (
+        final["score"], final["total"], final["pass_rate"],
+    )
+    # Every chunk's running score counts the correct answers streamed so far
+    for i, chunk in enumerate(chunks):
+        so_far = [r for c in chunks[: i + 1] for r in c["results"]]
+        assert chunk["score"] == sum(r["correct"] for r in so_far)
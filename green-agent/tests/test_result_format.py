@@ -0,0 +1,81 @@
+"""Round trip of the compact results format."""
+import pytest
+
+from dataset import load_dataset
+from result_format import check_questions, compact_results, convert, is_compact, rehydrate
+
+
+def verbose_results() -> list[dict]:
+    results = []
+    for qa in load_dataset().select(ids=[1, 2, 3, 10, 11]):
+        result = {
+            "question_id": qa.id,
+            "question": qa.question,
+            "correct": qa.id % 2 == 1,
+            "agent_answer": qa.answer if qa.id % 2 else -1,
+            "ground_truth": qa.answer,
+            "response": str(qa.answer) if qa.id % 2 else None,
+        }
+        if qa.id % 2 == 0:
+            result["error"] = "timed out"
+        results.append(result)
+    return results
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_compact_round_trip(compress):
+    dataset = load_dataset()
+    results = verbose_results()
+    compact = {"score": 3, "total": 5, **compact_results(results, dataset.content_hash, compress=compress)}
+    assert is_compact(compact) and "results" not in compact
+    if not compress:
+        assert compact["columns"]["question_id"] == "1-3,10-11"
+
+    restored = rehydrate(compact, dataset)
+    assert restored["score"] == 3
+    assert restored["results"] == results
+
+
+def test_rehydrate_rejects_other_question_set():
+    compact = compact_results(verbose_results(), "0" * 64)
+    with pytest.raises(ValueError):
+        rehydrate(compact, load_dataset())
+
+
+def test_check_questions_refuses_other_questions():
+    dataset = load_dataset()
+    results = verbose_results()
+    check_questions(results, dataset)
+    results[1]["question"] += " (older wording)"
+    results[3]["ground_truth"] += 1
+    with pytest.raises(ValueError, match=r"2 of 5 .*question ids 2,10"):
+        check_questions(results, dataset)
+    with pytest.raises(ValueError):
+        check_questions([{**results[0], "question_id": 10_000}], dataset)
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_convert_multi_participant_round_trip(compress):
+    dataset = load_dataset()
+    results = verbose_results()
+    rival = [{**r, "correct": not r["correct"]} for r in results]
+    scores = [{"role": "agent", "score": 3, "total": 5}, {"role": "rival", "score": 2, "total": 5}]
+    document = {
+        "participants": {"agent": "http://purple", "rival": "http://rival"},
+        "results": [{
+            "total": 5,
+            "scores": scores,
+            "participants": {
+                "agent": {"score": 3, "total": 5, "results": results},
+                "rival": {"score": 2, "total": 5, "results": rival},
+            },
+        }],
+    }
+    compact = convert(document, dataset, "compact", compress=compress)
+    [run] = compact["results"]
+    assert run["scores"] == scores
+    assert all(is_compact(r) and "results" not in r for r in run["participants"].values())
+
+    [run] = convert(compact, dataset, "verbose")["results"]
+    assert run["participants"]["agent"] == {"score": 3, "total": 5, "results": results}
+    assert run["participants"]["rival"] == {"score": 2, "total": 5, "results": rival}
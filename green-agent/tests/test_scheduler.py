@@ -0,0 +1,64 @@
+"""Fairness of the round-robin participant scheduler."""
+import asyncio
+
+import pytest
+
+from scheduler import FairScheduler, WaiterQueue
+
+
+@pytest.mark.asyncio
+async def test_slots_alternate_between_participants():
+    scheduler = FairScheduler(limit=1)
+    order = []
+
+    async def question(key: str) -> None:
+        async with scheduler.slot(key):
+            order.append(key)
+            await asyncio.sleep(0)
+
+    # "a" queues all of its questions before "b" queues any
+    tasks = [asyncio.create_task(question("a")) for _ in range(4)]
+    tasks += [asyncio.create_task(question("b")) for _ in range(2)]
+    await asyncio.gather(*tasks)
+    assert order == ["a", "a", "b", "a", "b", "a"]
+    assert scheduler.active == 0
+
+
+@pytest.mark.asyncio
+async def test_limit_and_cancellation():
+    scheduler = FairScheduler(limit=2)
+    peak = 0
+    release = asyncio.Event()
+
+    async def question(key: str) -> None:
+        nonlocal peak
+        async with scheduler.slot(key):
+            peak = max(peak, scheduler.active)
+            await release.wait()
+
+    tasks = [asyncio.create_task(question(k)) for k in "aabbc"]
+    await asyncio.sleep(0.01)
+    tasks[-1].cancel()
+    release.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    assert peak == 2
+    assert scheduler.active == 0
+
+
+@pytest.mark.asyncio
+async def test_slot_handed_to_a_cancelled_waiter_is_passed_on():
+    queue, released = WaiterQueue(), []
+    first = asyncio.create_task(queue.wait("a", lambda: released.append("a")))
+    second = asyncio.create_task(queue.wait("b", lambda: released.append("b")))
+    await asyncio.sleep(0)
+    # The slot reaches `first` in the same step as its cancellation
+    assert queue.hand_over()
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert released == ["a"]
+    # A waiter cancelled before its turn just leaves the queue
+    second.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await second
+    assert not queue and not queue.hand_over()
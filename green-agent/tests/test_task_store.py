@@ -0,0 +1,87 @@
+"""Persistence, hot-tier bounds and retention of the SQLite task store."""
+import asyncio
+import logging
+from pathlib import Path
+
+import pytest
+from a2a.types import Task, TaskState, TaskStatus
+
+import task_store
+from task_store import SQLiteTaskStore
+
+PURPLE_COPY = Path(__file__).resolve().parents[2] / "purple-agent" / "src" / "task_store.py"
+
+
+def make_task(task_id: str, state: TaskState = TaskState.working) -> Task:
+    return Task(id=task_id, context_id=f"ctx-{task_id}", status=TaskStatus(state=state))
+
+
+@pytest.mark.asyncio
+async def test_tasks_survive_restart(tmp_path):
+    path = tmp_path / "tasks.sqlite"
+    store = SQLiteTaskStore(path, max_hot_tasks=2)
+    for i in range(5):
+        await store.save(make_task(str(i)))
+    # Older tasks have left the hot tier but are still found on disk
+    assert len(store._hot) == 2
+    assert (await store.get("0")).context_id == "ctx-0"
+    await store.delete("1")
+    await store.close()
+
+    store = SQLiteTaskStore(path)
+    assert await store.get("1") is None
+    task = await store.get("4")
+    assert task.status.state == TaskState.working
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_saves_are_batched(tmp_path):
+    store = SQLiteTaskStore(tmp_path / "tasks.sqlite", batch_size=3, flush_interval=60)
+    await store.save(make_task("a"))
+    await store.save(make_task("b"))
+    assert store._db.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == 0
+    await store.save(make_task("c"))
+    assert store._db.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == 3
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_retention_keeps_newest_terminal_tasks():
+    store = SQLiteTaskStore(max_terminal_tasks=2, batch_size=1)
+    for i in range(4):
+        await store.save(make_task(f"done-{i}", TaskState.completed))
+    await store.save(make_task("running"))
+    store._retain()
+    rows = {row[0] for row in store._db.execute("SELECT task_id FROM tasks")}
+    assert rows == {"done-2", "done-3", "running"}
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_background_flush_survives_errors(caplog, monkeypatch):
+    store = SQLiteTaskStore(flush_interval=0.01)
+    write = store._write
+    failures = iter([RuntimeError("disk on fire")])
+
+    def flaky_write(rows):
+        for error in failures:
+            raise error
+        write(rows)
+
+    monkeypatch.setattr(store, "_write", flaky_write)
+    with caplog.at_level(logging.ERROR, logger=task_store.__name__):
+        await store.save(make_task("a"))
+        await asyncio.sleep(0.05)
+    assert "Could not write tasks" in caplog.text
+    # The failed save is kept and written with the next one
+    await store.save(make_task("b"))
+    await asyncio.sleep(0.05)
+    rows = {row[0] for row in store._db.execute("SELECT task_id FROM tasks")}
+    assert rows == {"a", "b"}
+    await store.close()
+
+
+def test_purple_copy_is_in_sync():
+    # Each agent image ships its own copy of the module; they must not drift apart
+    assert PURPLE_COPY.read_text() == Path(task_store.__file__).read_text()
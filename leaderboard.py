@@ -0,0 +1,289 @@
+"""Aggregate assessment results into a leaderboard and per-question-template breakdowns.
+
+results/*.json and submissions/*.provenance.json are indexed incrementally into
+a small SQLite store: files whose mtime and size are unchanged are skipped, and
+files whose content hash is unchanged are not re-parsed. Per-question outcomes
+are stored as one narrow row per (run, question), with question templates
+dictionary-encoded, so reports never re-read the JSON files.
+"""
+
+import argparse
+import hashlib
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent
+DEFAULT_INDEX = ROOT / ".leaderboard.sqlite"
+
+# Question templates and the compact results format come from the green agent
+sys.path.insert(0, str(ROOT / "green-agent" / "src"))
+from dataset import question_template  # noqa: E402
+from result_format import rehydrate  # noqa: E402
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    submission_id TEXT NOT NULL,
+    participant TEXT,
+    score INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    pass_rate REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS provenance (
+    submission_id TEXT PRIMARY KEY,
+    timestamp TEXT,
+    commit_sha TEXT,
+    images TEXT
+);
+CREATE TABLE IF NOT EXISTS templates (
+    template_id INTEGER PRIMARY KEY,
+    template TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS answers (
+    run_id TEXT NOT NULL,
+    question_id INTEGER NOT NULL,
+    template_id INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    PRIMARY KEY (run_id, question_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS answers_template ON answers (template_id);
+"""
+
+
+def run_results(run: dict) -> list[dict]:
+    """Per-question results of a run, rehydrating the green agent's compact format."""
+    if "results" in run:
+        return run["results"]
+    return rehydrate(run)["results"]
+
+
+def submission_id(path: Path) -> str:
+    """results/<id>.json and submissions/<id>.provenance.json share <id>."""
+    return path.name.removesuffix(".provenance.json").removesuffix(".json")
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class LeaderboardIndex:
+    """Incremental SQLite index over results and provenance files."""
+
+    def __init__(self, path: Path = DEFAULT_INDEX):
+        self.db = sqlite3.connect(str(path))
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self._templates = dict(self.db.execute("SELECT template, template_id FROM templates"))
+
+    def close(self) -> None:
+        self.db.close()
+
+    def template_id(self, template: str) -> int:
+        template_id = self._templates.get(template)
+        if template_id is None:
+            template_id = self.db.execute("INSERT INTO templates (template) VALUES (?)", (template,)).lastrowid
+            self._templates[template] = template_id
+        return template_id
+
+    def update(self, results_dir: Path, submissions_dir: Path) -> tuple[int, int]:
+        """Index new or changed files and drop removed ones; returns (parsed, unchanged)."""
+        known = {row[0]: row[1:] for row in self.db.execute("SELECT path, mtime, size, sha256 FROM files")}
+        seen = set()
+        parsed = unchanged = 0
+        paths = sorted(results_dir.glob("*.json")) + sorted(submissions_dir.glob("*.provenance.json"))
+        with self.db:
+            for path in paths:
+                key = str(path.relative_to(ROOT)) if path.is_relative_to(ROOT) else str(path)
+                seen.add(key)
+                stat = path.stat()
+                previous = known.get(key)
+                if previous and previous[0] == stat.st_mtime and previous[1] == stat.st_size:
+                    unchanged += 1
+                    continue
+                sha256 = file_sha256(path)
+                if previous and previous[2] == sha256:
+                    unchanged += 1
+                else:
+                    self._index_file(path)
+                    parsed += 1
+                self.db.execute(
+                    "INSERT OR REPLACE INTO files (path, mtime, size, sha256) VALUES (?, ?, ?, ?)",
+                    (key, stat.st_mtime, stat.st_size, sha256),
+                )
+            for key in set(known) - seen:
+                self._forget(Path(key))
+                self.db.execute("DELETE FROM files WHERE path = ?", (key,))
+        return parsed, unchanged
+
+    def _index_file(self, path: Path) -> None:
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Warning: skipping {path}: {e}", file=sys.stderr)
+            return
+        self._forget(path)
+        try:
+            if path.name.endswith(".provenance.json"):
+                self._index_provenance(submission_id(path), data)
+            else:
+                self._index_results(submission_id(path), data)
+        except (KeyError, ValueError) as e:
+            print(f"Warning: skipping {path}: {e}", file=sys.stderr)
+
+    def _forget(self, path: Path) -> None:
+        sid = submission_id(path)
+        if path.name.endswith(".provenance.json"):
+            self.db.execute("DELETE FROM provenance WHERE submission_id = ?", (sid,))
+            return
+        run_ids = [row[0] for row in self.db.execute("SELECT run_id FROM runs WHERE submission_id = ?", (sid,))]
+        self.db.executemany("DELETE FROM answers WHERE run_id = ?", [(r,) for r in run_ids])
+        self.db.execute("DELETE FROM runs WHERE submission_id = ?", (sid,))
+
+    def _index_provenance(self, sid: str, data: dict) -> None:
+        self.db.execute(
+            "INSERT OR REPLACE INTO provenance (submission_id, timestamp, commit_sha, images) VALUES (?, ?, ?, ?)",
+            (sid, data.get("timestamp"), (data.get("github_actions") or {}).get("sha"),
+             json.dumps(data.get("image_digests", {}))),
+        )
+
+    def _index_results(self, sid: str, data: dict) -> None:
+        participants = data.get("participants") or {}
+        runs = data.get("results") or []
+        for i, run in enumerate(runs):
+            run_id = sid if len(runs) == 1 else f"{sid}#{i}"
+            if "participants" in run:
+                # Multi-participant run: one row per role
+                for role, scores in run["participants"].items():
+                    self._index_run(f"{run_id}:{role}", sid, participants.get(role, role), scores)
+            else:
+                self._index_run(run_id, sid, next(iter(participants.values()), None), run)
+
+    def _index_run(self, run_id: str, sid: str, participant: str | None, run: dict) -> None:
+        answers = [
+            (run_id, r["question_id"], self.template_id(question_template(r["question"])), int(bool(r["correct"])))
+            for r in run_results(run)
+        ]
+        self.db.execute(
+            "INSERT OR REPLACE INTO runs (run_id, submission_id, participant, score, total, pass_rate) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (run_id, sid, participant, run.get("score", 0), run.get("total", 0), run.get("pass_rate", 0.0)),
+        )
+        self.db.executemany(
+            "INSERT OR REPLACE INTO answers (run_id, question_id, template_id, correct) VALUES (?, ?, ?, ?)",
+            answers,
+        )
+
+    # Reports
+
+    def leaderboard(self) -> list[dict]:
+        """Best run per participant, ranked by pass rate."""
+        rows = self.db.execute("""
+            SELECT r.participant, r.run_id, r.score, r.total, r.pass_rate, p.timestamp,
+                   COUNT(*) OVER (PARTITION BY r.participant) AS runs,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY r.participant ORDER BY r.pass_rate DESC, r.score DESC, p.timestamp
+                   ) AS place
+            FROM runs r LEFT JOIN provenance p ON p.submission_id = r.submission_id
+        """).fetchall()
+        best = [
+            {"participant": participant, "best_run": run_id, "score": score, "total": total,
+             "pass_rate": pass_rate, "timestamp": timestamp, "runs": runs}
+            for participant, run_id, score, total, pass_rate, timestamp, runs, place in rows if place == 1
+        ]
+        return sorted(best, key=lambda r: (-r["pass_rate"], -r["score"]))
+
+    def runs(self, participant: str | None = None) -> list[dict]:
+        """Every run in chronological order (the trend of a participant's score)."""
+        rows = self.db.execute("""
+            SELECT r.run_id, r.participant, r.score, r.total, r.pass_rate, p.timestamp, p.commit_sha
+            FROM runs r LEFT JOIN provenance p ON p.submission_id = r.submission_id
+            WHERE ? IS NULL OR r.participant = ?
+            ORDER BY COALESCE(p.timestamp, r.submission_id)
+        """, (participant, participant)).fetchall()
+        keys = ("run_id", "participant", "score", "total", "pass_rate", "timestamp", "commit_sha")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def templates(self, participant: str | None = None, run_id: str | None = None) -> list[dict]:
+        """Accuracy per question template, hardest first."""
+        rows = self.db.execute("""
+            SELECT t.template, COUNT(*), SUM(a.correct)
+            FROM answers a
+            JOIN runs r ON r.run_id = a.run_id
+            JOIN templates t ON t.template_id = a.template_id
+            WHERE (? IS NULL OR r.participant = ?) AND (? IS NULL OR a.run_id = ?)
+            GROUP BY a.template_id
+            ORDER BY CAST(SUM(a.correct) AS REAL) / COUNT(*), t.template
+        """, (participant, participant, run_id, run_id)).fetchall()
+        return [
+            {"template": template, "answers": answers, "correct": correct,
+             "accuracy": round(correct / answers * 100, 1) if answers else 0.0}
+            for template, answers, correct in rows
+        ]
+
+
+def print_table(rows: list[dict], columns: list[str]) -> None:
+    if not rows:
+        print("(no results)")
+        return
+    widths = {c: max(len(c), *(len(str(r[c])) for r in rows)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    print("  ".join("-" * widths[c] for c in columns))
+    for row in rows:
+        print("  ".join(str(row[c]).ljust(widths[c]) for c in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Leaderboard and per-template breakdowns from results/")
+    parser.add_argument("report", nargs="?", choices=("leaderboard", "runs", "templates"), default="leaderboard")
+    parser.add_argument("--results", type=Path, default=ROOT / "results", help="Directory of results JSON files")
+    parser.add_argument("--submissions", type=Path, default=ROOT / "submissions", help="Directory of provenance files")
+    parser.add_argument("--index", type=Path, default=DEFAULT_INDEX, help="SQLite index file")
+    parser.add_argument("--participant", help="Only this participant (runs, templates)")
+    parser.add_argument("--run", help="Only this run (templates)")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    args = parser.parse_args()
+
+    if not args.results.is_dir():
+        print(f"Error: {args.results} not found")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    index = LeaderboardIndex(args.index)
+    parsed, unchanged = index.update(args.results, args.submissions)
+    if args.report == "leaderboard":
+        rows = index.leaderboard()
+        columns = ["participant", "score", "total", "pass_rate", "runs", "best_run", "timestamp"]
+    elif args.report == "runs":
+        rows = index.runs(args.participant)
+        columns = ["run_id", "participant", "score", "total", "pass_rate", "timestamp"]
+    else:
+        rows = index.templates(args.participant, args.run)
+        columns = ["accuracy", "correct", "answers", "template"]
+    index.close()
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_table(rows, columns)
+    print(
+        f"Indexed {parsed} new or changed files ({unchanged} unchanged) in {time.perf_counter() - started:.3f}s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,12 +3,17 @@ ETF Purple Agent - Basic shell for ETF benchmark.
 
 This is the agent being tested. It:
 1. Receives questions from the Green Agent
-2. Passes to LLM
+2. Answers from local ETF data when it matches a known question
+   template, otherwise passes it to the LLM
 3. Returns answer
 
 
 """
 import argparse
+import asyncio
+import os
+from collections import Counter
+from contextlib import asynccontextmanager
 import uvicorn
 from dotenv import load_dotenv
 
@@ -18,7 +23,7 @@ from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.apps import A2AStarletteApplication
 from a2a.server.events import EventQueue
 from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore, TaskUpdater
+from a2a.server.tasks import TaskUpdater
 from a2a.types import (
     AgentCapabilities,
     AgentCard,
@@ -26,13 +31,30 @@ from a2a.types import (
     Task,
     TaskState,
     InvalidRequestError,
-    UnsupportedOperationError,
 )
 from a2a.utils import new_agent_text_message, new_task
 from a2a.utils.errors import ServerError
-from litellm import completion
+from litellm import RateLimitError, acompletion
 from loguru import logger
 
+from answer_cache import DEFAULT_MAX_ENTRIES, AnswerCache, cache_key
+from etf_data import DataError, ETFDataEngine
+from history import (
+    DEFAULT_CONTEXT_TTL,
+    DEFAULT_MAX_CONTEXTS,
+    DEFAULT_MAX_TURNS,
+    HISTORY_MODES,
+    HistoryStore,
+    TokenStats,
+    WindowedHistoryStore,
+    create_history_store,
+    estimate_tokens,
+)
+from query import execute, format_answer, parse_question
+from rate_limit import RateLimiter
+from single_flight import SingleFlight
+from task_store import DEFAULT_MAX_AGE, SQLiteTaskStore
+
 
 def prepare_agent_card(url: str) -> AgentCard:
     """Create the agent card for the ETF purple agent."""
@@ -75,6 +97,19 @@ Answer: 18
 """
 
 
+# Maximum number of LLM calls in flight at once
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Retries of a call the provider throttled despite the client-side rate limits
+MAX_THROTTLED_RETRIES = 3
+
+# How long a cancel request waits for the question to report its cancellation
+CANCEL_GRACE = 5.0
+
+# Finished tasks kept in the task store; every question is a task, so more than the green agent keeps
+DEFAULT_MAX_STORED_TASKS = 10_000
+
+
 TERMINAL_STATES = {
     TaskState.completed,
     TaskState.canceled,
@@ -86,9 +121,28 @@ TERMINAL_STATES = {
 class ETFAgentExecutor(AgentExecutor):
     """Executor for the ETF purple agent."""
 
-    def __init__(self, model: str):
+    def __init__(
+        self,
+        model: str,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        history: HistoryStore | None = None,
+        answer_cache: AnswerCache | None = None,
+        data_engine: ETFDataEngine | None = None,
+        rate_limiter: RateLimiter | None = None,
+        single_flight: bool = True,
+    ):
         self.model = model
-        self.ctx_id_to_messages: dict[str, list[dict]] = {}
+        self.rate_limiter = rate_limiter
+        # Identical questions asked at the same time share one LLM call
+        self.single_flight = SingleFlight() if single_flight else None
+        self.data_engine = data_engine
+        self.history = history or WindowedHistoryStore(SYSTEM_PROMPT, model=model)
+        self.answer_cache = answer_cache
+        self.token_stats = TokenStats()
+        self.route_stats = Counter()
+        self._llm_semaphore = asyncio.Semaphore(max_concurrency)
+        # task_id -> (answer being produced, execute() awaiting it), so a cancel can stop its LLM call
+        self._running: dict[str, tuple[asyncio.Task, asyncio.Task]] = {}
 
     async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
         msg = context.message
@@ -112,40 +166,126 @@ class ETFAgentExecutor(AgentExecutor):
             user_input = context.get_user_input()
             logger.info(f"Received question: {user_input[:200]}...")
 
-            # Initialize or get conversation history
-            if context_id not in self.ctx_id_to_messages:
-                self.ctx_id_to_messages[context_id] = [
-                    {"role": "system", "content": SYSTEM_PROMPT}
-                ]
-
-            messages = self.ctx_id_to_messages[context_id]
-            messages.append({"role": "user", "content": user_input})
-
-            # Call LLM
+            answering = asyncio.create_task(self.answer(context_id, user_input))
+            self._running[task.id] = (answering, asyncio.current_task())
             try:
-                response = completion(
-                    messages=messages,
-                    model=self.model,
-                    temperature=0.0,
-                )
-                assistant_content = response.choices[0].message.content
-                logger.info(f"LLM response: {assistant_content}")
-            except Exception as e:
-                logger.error(f"LLM error: {e}")
-                assistant_content = "-1"
-
-            # Add assistant response to history
-            messages.append({"role": "assistant", "content": assistant_content})
+                assistant_content = await answering
+            finally:
+                self._running.pop(task.id, None)
+
+            # Add the turn to history
+            self.history.record(context_id, user_input, assistant_content)
 
             # Complete the task with the response
             await updater.complete(new_agent_text_message(assistant_content, context_id=context_id))
-            
+
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                raise
+            logger.info(f"Task {task.id} cancelled")
+            await updater.cancel()
         except Exception as e:
             logger.error(f"Task failed: {e}")
             await updater.failed(new_agent_text_message(f"Error: {e}", context_id=context_id, task_id=task.id))
 
+    async def answer(self, context_id: str, user_input: str) -> str:
+        """Answer one question from the local data when it matches a known template,
+        otherwise from the answer cache or the LLM."""
+        if self.data_engine is not None:
+            answer = self.answer_from_data(user_input)
+            if answer is not None:
+                return answer
+
+        key = cache_key(self.model, user_input, SYSTEM_PROMPT, policy=self.history.mode)
+        if self.answer_cache is not None:
+            cached = await self.answer_cache.get(key)
+            if cached is not None:
+                logger.info(f"Answer cache hit: {cached} ({self.answer_cache.stats.as_dict()})")
+                return cached
+
+        if self.single_flight is None:
+            return await self.answer_from_llm(context_id, user_input, key)
+        return await self.single_flight.do(key, lambda: self.answer_from_llm(context_id, user_input, key))
+
+    async def answer_from_llm(self, context_id: str, user_input: str, key: str) -> str:
+        """Ask the LLM, with the conversation history of `context_id`."""
+        # Build the prompt from the bounded conversation history
+        messages = self.history.build_messages(context_id, user_input)
+        prompt_tokens = estimate_tokens(messages, self.model)
+        self.token_stats.record(prompt_tokens)
+        logger.info(
+            f"Sending {prompt_tokens} prompt tokens ({len(messages)} messages, "
+            f"avg {self.token_stats.avg_tokens:.0f} over {self.token_stats.calls} calls)"
+        )
+
+        # Call LLM without blocking the event loop
+        try:
+            response = await self.complete(messages, prompt_tokens)
+            assistant_content = response.choices[0].message.content
+            logger.info(f"LLM response: {assistant_content}")
+        except Exception as e:
+            logger.error(f"LLM error: {e}")
+            return "-1"
+
+        # Failed calls are never cached
+        if self.answer_cache is not None and assistant_content:
+            await self.answer_cache.put(key, assistant_content)
+        return assistant_content
+
+    async def complete(self, messages: list[dict], prompt_tokens: int):
+        """Call the LLM, queueing behind the RPM/TPM limits when they are set."""
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                wait = await self.rate_limiter.acquire(prompt_tokens)
+                if wait > 0:
+                    logger.info(f"Waited {wait:.2f}s for the rate limit ({self.rate_limiter.stats.as_dict()})")
+            try:
+                async with self._llm_semaphore:
+                    response = await acompletion(
+                        messages=messages,
+                        model=self.model,
+                        temperature=0.0,
+                    )
+            except RateLimitError:
+                # Throttled anyway: queue again behind the drained buckets
+                attempt += 1
+                if self.rate_limiter is None or attempt > MAX_THROTTLED_RETRIES:
+                    raise
+                self.rate_limiter.throttled()
+                continue
+            if self.rate_limiter is not None:
+                usage = getattr(response, "usage", None)
+                self.rate_limiter.settle(prompt_tokens, getattr(usage, "total_tokens", 0) or 0)
+            return response
+
+    def answer_from_data(self, user_input: str) -> str | None:
+        """Run the question's compiled query plan against the local ETF tables."""
+        query = parse_question(user_input)
+        if query is None:
+            self.route_stats["llm"] += 1
+            return None
+        try:
+            value = execute(self.data_engine, query)
+        except (DataError, ValueError) as e:
+            logger.warning(f"Query {query.plan.operation} failed, falling back to LLM: {e}")
+            self.route_stats["llm"] += 1
+            return None
+        self.route_stats["data"] += 1
+        answer = format_answer(value)
+        logger.info(f"Answered from data ({query.plan.operation}): {answer} (routes: {dict(self.route_stats)})")
+        return answer
+
     async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
-        raise ServerError(error=UnsupportedOperationError())
+        """Stop answering a question; an LLM call in flight is cancelled."""
+        running = self._running.get(context.task_id)
+        if running is None:
+            await TaskUpdater(event_queue, context.task_id, context.context_id).cancel()
+            return
+        answering, execution = running
+        answering.cancel()
+        # Let execute() report the cancellation before the request handler stops it
+        await asyncio.wait([execution], timeout=CANCEL_GRACE)
 
 
 def main():
@@ -154,14 +294,70 @@ def main():
     parser.add_argument("--port", type=int, default=9019, help="Port to bind the server")
     parser.add_argument("--card-url", type=str, help="External URL for the agent card")
     parser.add_argument("--model", type=str, default="openai/gpt-4o-mini", help="LLM model to use")
+    parser.add_argument("--rpm", type=int, help="Requests per minute allowed by the LLM provider (queue beyond it)")
+    parser.add_argument("--tpm", type=int, help="Tokens per minute allowed by the LLM provider (queue beyond it)")
+    parser.add_argument("--max-concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY, help="Maximum concurrent LLM calls")
+    parser.add_argument("--history", type=str, choices=HISTORY_MODES, default="windowed", help="Conversation history sent with each question")
+    parser.add_argument("--max-turns", type=int, default=DEFAULT_MAX_TURNS, help="Most recent turns kept per context (windowed history)")
+    parser.add_argument("--max-history-tokens", type=int, help="Prompt token budget per call (windowed history)")
+    parser.add_argument("--max-contexts", type=int, default=DEFAULT_MAX_CONTEXTS, help="Maximum conversations kept in memory")
+    parser.add_argument("--context-ttl", type=float, default=DEFAULT_CONTEXT_TTL, help="Seconds before an idle conversation is evicted")
+    parser.add_argument("--data-dir", type=str, default=os.environ.get("ETF_DATA_DIR"), help="Directory with provider CSV/Parquet tables (default: $ETF_DATA_DIR)")
+    parser.add_argument("--answer-cache", action="store_true", help="Reuse answers to questions already answered by the same model")
+    parser.add_argument("--answer-cache-path", type=str, help="SQLite file for a persistent answer cache tier")
+    parser.add_argument("--answer-cache-size", type=int, default=DEFAULT_MAX_ENTRIES, help="Answers kept in the in-memory cache")
+    parser.add_argument("--answer-cache-ttl", type=float, help="Seconds a cached answer stays valid")
+    parser.add_argument("--single-flight", action=argparse.BooleanOptionalAction, default=True, help="Share one LLM call between identical questions asked at the same time")
+    parser.add_argument("--task-store", type=str, default=os.environ.get("TASK_STORE_PATH", "tasks.sqlite"), help="SQLite file tasks are kept in (default: $TASK_STORE_PATH or tasks.sqlite)")
+    parser.add_argument("--task-retention", type=float, default=DEFAULT_MAX_AGE, help="Seconds finished tasks are kept")
+    parser.add_argument("--max-stored-tasks", type=int, default=DEFAULT_MAX_STORED_TASKS, help="Most recent finished tasks kept")
     args = parser.parse_args()
 
     logger.info("Starting ETF Purple Agent...")
     card = prepare_agent_card(args.card_url or f"http://{args.host}:{args.port}/")
 
+    data_engine = ETFDataEngine.load(args.data_dir) if args.data_dir else None
+
+    answer_cache = None
+    if args.answer_cache or args.answer_cache_path:
+        answer_cache = AnswerCache(
+            max_entries=args.answer_cache_size,
+            ttl=args.answer_cache_ttl,
+            path=args.answer_cache_path,
+        )
+
+    task_store = SQLiteTaskStore(
+        args.task_store,
+        max_age=args.task_retention,
+        max_terminal_tasks=args.max_stored_tasks,
+    )
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        await task_store.close()
+        if answer_cache is not None:
+            await answer_cache.close()
+
     request_handler = DefaultRequestHandler(
-        agent_executor=ETFAgentExecutor(model=args.model),
-        task_store=InMemoryTaskStore(),
+        agent_executor=ETFAgentExecutor(
+            model=args.model,
+            max_concurrency=args.max_concurrency,
+            history=create_history_store(
+                args.history,
+                SYSTEM_PROMPT,
+                max_turns=args.max_turns,
+                max_tokens=args.max_history_tokens,
+                max_contexts=args.max_contexts,
+                idle_ttl=args.context_ttl,
+                model=args.model,
+            ),
+            answer_cache=answer_cache,
+            data_engine=data_engine,
+            rate_limiter=RateLimiter(args.rpm, args.tpm) if args.rpm or args.tpm else None,
+            single_flight=args.single_flight,
+        ),
+        task_store=task_store,
     )
 
     app = A2AStarletteApplication(
@@ -170,7 +366,7 @@ def main():
     )
 
     uvicorn.run(
-        app.build(),
+        app.build(lifespan=lifespan),
         host=args.host,
         port=args.port,
         timeout_keep_alive=300,
@@ -0,0 +1,164 @@
+"""
+Answer cache for the ETF purple agent.
+
+Answers are keyed on model name + normalized question + system prompt hash
+(+ history mode), so a question already answered by the same model is not
+sent to the LLM again. Two tiers:
+- an in-memory LRU with a maximum number of entries
+- an optional on-disk SQLite tier that survives restarts
+Both tiers honour the TTL; the disk tier is trimmed to `max_disk_entries`.
+Disk reads and writes run in a worker thread, off the event loop.
+"""
+import asyncio
+import hashlib
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from loguru import logger
+
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_MAX_DISK_ENTRIES = 100_000
+
+# Disk tier is trimmed every this many inserts rather than on each one
+_TRIM_EVERY = 100
+
+
+def normalize_question(text: str) -> str:
+    """Collapse whitespace and case so trivially different phrasings share a key."""
+    return " ".join(text.split()).casefold()
+
+
+def cache_key(model: str, question: str, system_prompt: str, policy: str = "") -> str:
+    prompt_hash = hashlib.sha256(system_prompt.encode()).hexdigest()
+    raw = "\x1f".join((model, prompt_hash, policy, normalize_question(question)))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+class AnswerCache:
+    """Two-tier (memory LRU + optional SQLite) cache of LLM answers.
+
+    Args:
+        max_entries: Entries kept in the in-memory LRU
+        ttl: Seconds an answer stays valid (None = forever)
+        path: SQLite file for the on-disk tier (None = memory only)
+        max_disk_entries: Oldest disk entries beyond this are deleted
+        clock: Wall-clock time source (injectable for tests)
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl: float | None = None,
+        path: str | Path | None = None,
+        max_disk_entries: int = DEFAULT_MAX_DISK_ENTRIES,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.max_disk_entries = max_disk_entries
+        self.stats = CacheStats()
+        self._memory: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._db: sqlite3.Connection | None = None
+        self._inserts = 0
+        # One disk operation at a time on the shared connection
+        self._lock = asyncio.Lock()
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "key TEXT PRIMARY KEY, answer TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS answers_created ON answers (created)")
+            self._db.commit()
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl is not None and self.clock() - created > self.ttl
+
+    async def get(self, key: str) -> str | None:
+        entry = self._memory.get(key)
+        if entry is not None:
+            answer, created = entry
+            if not self._expired(created):
+                self._memory.move_to_end(key)
+                self.stats.hits += 1
+                return answer
+            del self._memory[key]
+
+        if self._db is not None:
+            async with self._lock:
+                row = await asyncio.to_thread(self._select, key)
+            if row is not None and not self._expired(row[1]):
+                self._remember(key, row[0], row[1])
+                self.stats.hits += 1
+                self.stats.disk_hits += 1
+                return row[0]
+
+        self.stats.misses += 1
+        return None
+
+    async def put(self, key: str, answer: str) -> None:
+        created = self.clock()
+        self._remember(key, answer, created)
+        if self._db is not None:
+            self._inserts += 1
+            trim = self._inserts % _TRIM_EVERY == 0
+            async with self._lock:
+                await asyncio.to_thread(self._insert, key, answer, created, trim)
+
+    def _remember(self, key: str, answer: str, created: float) -> None:
+        self._memory[key] = (answer, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _select(self, key: str) -> tuple[str, float] | None:
+        return self._db.execute("SELECT answer, created FROM answers WHERE key = ?", (key,)).fetchone()
+
+    def _insert(self, key: str, answer: str, created: float, trim: bool) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO answers (key, answer, created) VALUES (?, ?, ?)",
+            (key, answer, created),
+        )
+        if trim:
+            self._trim_disk()
+        self._db.commit()
+
+    def _trim_disk(self) -> None:
+        if self.ttl is not None:
+            self._db.execute("DELETE FROM answers WHERE created < ?", (self.clock() - self.ttl,))
+        self._db.execute(
+            "DELETE FROM answers WHERE key IN ("
+            "SELECT key FROM answers ORDER BY created DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
+        logger.debug("Trimmed on-disk answer cache")
+
+    async def close(self) -> None:
+        if self._db is not None:
+            async with self._lock:
+                await asyncio.to_thread(self._db.close)
+            self._db = None
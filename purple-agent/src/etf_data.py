@@ -0,0 +1,272 @@
+"""
+Columnar ETF data engine for the purple agent.
+
+Provider tables (Fidelity, iShares, Schwab, Vanguard) are loaded once from
+local CSV or Parquet files into NumPy columns: numeric attributes become
+float64 arrays with NaN for missing values, everything else an object array
+with None. Aggregates, filters, quantiles, correlations and ranks are then
+vectorized operations over those columns.
+
+Expected layout of the data directory (file names are case-insensitive):
+    fidelity.csv | fidelity.parquet
+    ishares.csv  | ishares.parquet
+    schwab.csv   | schwab.parquet
+    vanguard.csv | vanguard.parquet
+
+Percentage attributes are not stored in one unit: returns, yields and
+turnover are fractions (0.05 = 5%) while expense ratios are percentage
+points (0.05 = 0.05%). `COLUMN_UNITS` declares the unit of each such column
+so thresholds and answers can be converted without guessing from the data.
+"""
+import csv
+import operator
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+from loguru import logger
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet support is optional
+    pq = None
+
+
+PROVIDERS = ("Fidelity", "iShares", "Schwab", "Vanguard")
+
+# Columns tried, in order, as the ticker symbol of each row
+TICKER_COLUMNS = ("Ticker", "Symbol", "ticker", "symbol")
+
+# Stored unit of percentage attributes; columns not listed are plain numbers
+FRACTION = "fraction"
+PERCENT = "percent"
+COLUMN_UNITS: dict[str, str] = {
+    "TotalExpenseRatio": PERCENT,
+    "OneYearNAVReturn": FRACTION,
+    "ThreeYearNAVReturn": FRACTION,
+    "FiveYearNAVReturn": FRACTION,
+    "TenYearNAVReturn": FRACTION,
+    "DividendYield": FRACTION,
+    "ReturnOnEquity": FRACTION,
+    "PortfolioTurnover": FRACTION,
+    "StandardDeviation": FRACTION,
+}
+
+COMPARISONS: dict[str, Callable[[np.ndarray, float], np.ndarray]] = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+
+class DataError(LookupError):
+    """A provider, column or ticker is not present in the loaded data."""
+
+
+def _to_column(values: list) -> np.ndarray:
+    """Convert raw cell values into a float64 column if every non-empty value is numeric."""
+    cleaned = [None if v is None or (isinstance(v, str) and v.strip() in ("", "NA", "NaN", "null", "None")) else v for v in values]
+    try:
+        return np.array([np.nan if v is None else float(v) for v in cleaned], dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.array([v.strip() if isinstance(v, str) else v for v in cleaned], dtype=object)
+
+
+def average_ranks(values: np.ndarray, ascending: bool = True) -> np.ndarray:
+    """1-based ranks with ties sharing their average rank; NaN stays NaN."""
+    ranks = np.full(values.shape, np.nan)
+    valid = ~np.isnan(values)
+    present = values[valid] if ascending else -values[valid]
+    if present.size == 0:
+        return ranks
+    order = np.argsort(present, kind="mergesort")
+    ordinal = np.empty(present.size)
+    ordinal[order] = np.arange(1, present.size + 1)
+    _, inverse, counts = np.unique(present, return_inverse=True, return_counts=True)
+    ranks[valid] = (np.bincount(inverse, weights=ordinal) / counts)[inverse]
+    return ranks
+
+
+class ProviderTable:
+    """One provider's ETFs as named NumPy columns."""
+    __slots__ = ("provider", "columns", "tickers", "_ticker_index")
+
+    def __init__(self, provider: str, columns: dict[str, np.ndarray]):
+        self.provider = provider
+        self.columns = columns
+        ticker_column = next((c for c in TICKER_COLUMNS if c in columns), None)
+        self.tickers = columns[ticker_column] if ticker_column else np.array([], dtype=object)
+        self._ticker_index = {str(t).upper(): i for i, t in enumerate(self.tickers) if t is not None}
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def column(self, name: str) -> np.ndarray:
+        try:
+            return self.columns[name]
+        except KeyError:
+            raise DataError(f"{self.provider} has no column {name!r}") from None
+
+    def numeric(self, name: str) -> np.ndarray:
+        values = self.column(name)
+        if values.dtype != np.float64:
+            raise DataError(f"{self.provider}.{name} is not numeric")
+        return values
+
+    def present(self, name: str) -> np.ndarray:
+        """Boolean mask of rows with a non-null value in `name`."""
+        values = self.column(name)
+        if values.dtype == np.float64:
+            return ~np.isnan(values)
+        return np.array([v is not None for v in values], dtype=bool)
+
+    def row(self, ticker: str) -> int:
+        try:
+            return self._ticker_index[ticker.upper()]
+        except KeyError:
+            raise DataError(f"{self.provider} has no ETF {ticker!r}") from None
+
+
+class ETFDataEngine:
+    """Vectorized queries over provider tables loaded once at startup.
+
+    Args:
+        tables: Provider name -> table
+        units: Stored unit (FRACTION or PERCENT) of percentage columns
+    """
+
+    def __init__(self, tables: dict[str, ProviderTable], units: dict[str, str] | None = None):
+        self.tables = tables
+        self.units = COLUMN_UNITS if units is None else units
+
+    @classmethod
+    def load(cls, data_dir: str | Path) -> "ETFDataEngine":
+        data_dir = Path(data_dir)
+        files = {p.stem.lower(): p for p in data_dir.iterdir() if p.suffix.lower() in (".csv", ".parquet")}
+        tables = {}
+        for provider in PROVIDERS:
+            path = files.get(provider.lower())
+            if path is None:
+                logger.warning(f"No data file for {provider} in {data_dir}")
+                continue
+            tables[provider] = ProviderTable(provider, _read_columns(path))
+            logger.info(f"Loaded {len(tables[provider])} {provider} ETFs from {path.name}")
+        return cls(tables)
+
+    def table(self, provider: str) -> ProviderTable:
+        try:
+            return self.tables[provider]
+        except KeyError:
+            raise DataError(f"No data loaded for provider {provider!r}") from None
+
+    def unit(self, column: str) -> str | None:
+        """FRACTION or PERCENT for percentage columns, None for plain numbers."""
+        return self.units.get(column)
+
+    # Filters
+
+    def mask(self, provider: str, column: str, op: str, value: float | str) -> np.ndarray:
+        """Rows where `column <op> value`; rows with missing values never match."""
+        table = self.table(provider)
+        values = table.column(column)
+        if values.dtype == np.float64:
+            with np.errstate(invalid="ignore"):
+                return COMPARISONS[op](values, float(value)) & ~np.isnan(values)
+        compare = COMPARISONS[op]
+        return np.array([v is not None and compare(str(v).casefold(), str(value).casefold()) for v in values], dtype=bool)
+
+    def count(self, provider: str, mask: np.ndarray | None = None) -> int:
+        table = self.table(provider)
+        return len(table) if mask is None else int(np.count_nonzero(mask))
+
+    def count_present(self, provider: str, *columns: str) -> int:
+        """ETFs with non-null values in all of `columns`."""
+        table = self.table(provider)
+        mask = np.ones(len(table), dtype=bool)
+        for column in columns:
+            mask &= table.present(column)
+        return int(np.count_nonzero(mask))
+
+    def distinct(self, provider: str, column: str) -> int:
+        values = self.table(provider).column(column)
+        if values.dtype == np.float64:
+            return int(np.unique(values[~np.isnan(values)]).size)
+        return len({v for v in values if v is not None})
+
+    # Aggregates
+
+    def values(self, provider: str, column: str, mask: np.ndarray | None = None) -> np.ndarray:
+        """Non-null numeric values of `column`, optionally restricted to `mask`."""
+        values = self.table(provider).numeric(column)
+        keep = ~np.isnan(values)
+        if mask is not None:
+            keep &= mask
+        return values[keep]
+
+    def aggregate(self, provider: str, column: str, func: str, mask: np.ndarray | None = None) -> float:
+        """mean, median, std (sample), var, min, max, sum or count of a column."""
+        values = self.values(provider, column, mask)
+        if func == "count":
+            return float(values.size)
+        if values.size == 0:
+            return float("nan")
+        if func == "std":
+            return float(np.std(values, ddof=1)) if values.size > 1 else float("nan")
+        if func == "var":
+            return float(np.var(values, ddof=1)) if values.size > 1 else float("nan")
+        reducers = {"mean": np.mean, "median": np.median, "min": np.min, "max": np.max, "sum": np.sum}
+        return float(reducers[func](values))
+
+    def quantile(self, provider: str, column: str, q: float | list[float], mask: np.ndarray | None = None):
+        values = self.values(provider, column, mask)
+        if values.size == 0:
+            return float("nan")
+        result = np.quantile(values, q)
+        return float(result) if np.ndim(result) == 0 else result
+
+    def correlation(self, provider: str, x: str, y: str) -> float:
+        """Pearson correlation over ETFs that report both columns."""
+        table = self.table(provider)
+        xs, ys = table.numeric(x), table.numeric(y)
+        both = ~np.isnan(xs) & ~np.isnan(ys)
+        if np.count_nonzero(both) < 2:
+            return float("nan")
+        return float(np.corrcoef(xs[both], ys[both])[0, 1])
+
+    def ranks(self, provider: str, column: str, ascending: bool = True) -> np.ndarray:
+        return average_ranks(self.table(provider).numeric(column), ascending=ascending)
+
+    def rank_difference(self, provider: str, x: str, y: str, ascending: bool = True) -> np.ndarray:
+        """|rank(x) - rank(y)| for ETFs that report both columns (NaN elsewhere)."""
+        table = self.table(provider)
+        both = table.present(x) & table.present(y)
+        xs = np.where(both, table.numeric(x), np.nan)
+        ys = np.where(both, table.numeric(y), np.nan)
+        return np.abs(average_ranks(xs, ascending) - average_ranks(ys, ascending))
+
+    def lookup(self, provider: str, ticker: str, column: str):
+        table = self.table(provider)
+        value = table.column(column)[table.row(ticker)]
+        if isinstance(value, float) and np.isnan(value):
+            return None
+        return value
+
+
+def _read_columns(path: Path) -> dict[str, np.ndarray]:
+    if path.suffix.lower() == ".parquet":
+        if pq is None:
+            raise RuntimeError(f"Reading {path.name} requires pyarrow (pip install pyarrow)")
+        table = pq.read_table(path)
+        return {name: _to_column(table.column(name).to_pylist()) for name in table.column_names}
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        rows = list(reader)
+    return {
+        name: _to_column([row[i] if i < len(row) else None for row in rows])
+        for i, name in enumerate(header)
+    }
@@ -0,0 +1,209 @@
+"""
+Conversation history stores for the ETF purple agent.
+
+Each store decides which prior turns are sent to the LLM along with a new
+question:
+- StatelessHistoryStore: only the system prompt and the current question
+- WindowedHistoryStore: the most recent turns per context, bounded by turn
+  and token budgets, with an LRU cap on contexts and idle-TTL eviction
+"""
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Callable
+
+from litellm import token_counter
+from loguru import logger
+
+
+HISTORY_MODES = ("stateless", "windowed", "full")
+
+DEFAULT_MAX_TURNS = 20
+DEFAULT_MAX_CONTEXTS = 256
+DEFAULT_CONTEXT_TTL = 3600.0
+
+
+def estimate_tokens(messages: list[dict], model: str | None = None) -> int:
+    """Estimate the prompt tokens of a message list, falling back to ~4 chars per token."""
+    try:
+        return token_counter(model=model or "", messages=messages)
+    except Exception:
+        return sum(len(m.get("content") or "") for m in messages) // 4 + 4 * len(messages)
+
+
+@dataclass
+class TokenStats:
+    """Running totals of prompt tokens sent to the LLM."""
+    calls: int = 0
+    total_tokens: int = 0
+    max_tokens: int = 0
+
+    def record(self, tokens: int):
+        self.calls += 1
+        self.total_tokens += tokens
+        self.max_tokens = max(self.max_tokens, tokens)
+
+    @property
+    def avg_tokens(self) -> float:
+        return self.total_tokens / self.calls if self.calls else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "total_tokens": self.total_tokens,
+            "avg_tokens": round(self.avg_tokens, 1),
+            "max_tokens": self.max_tokens,
+        }
+
+
+class HistoryStore:
+    """Builds the message list for each LLM call and remembers completed turns."""
+
+    mode: str = "stateless"
+
+    def __init__(self, system_prompt: str):
+        self.system_prompt = system_prompt
+
+    def build_messages(self, context_id: str, user_input: str) -> list[dict]:
+        """Return the messages to send for a new question in `context_id`."""
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": user_input},
+        ]
+
+    def record(self, context_id: str, user_input: str, assistant_content: str):
+        """Remember a completed question/answer turn."""
+
+    def __len__(self) -> int:
+        return 0
+
+
+class StatelessHistoryStore(HistoryStore):
+    """Answers every question with only the system prompt; nothing is kept."""
+
+
+@dataclass
+class Conversation:
+    turns: deque = field(default_factory=deque)
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class WindowedHistoryStore(HistoryStore):
+    """Keeps a bounded window of recent turns per context.
+
+    Args:
+        system_prompt: Prompt sent first in every call
+        max_turns: Most recent question/answer turns kept per context (None = unbounded)
+        max_tokens: Prompt token budget per call; oldest turns are dropped to fit (None = unbounded)
+        max_contexts: Least recently used contexts beyond this are evicted
+        idle_ttl: Contexts idle for longer than this many seconds are evicted
+        model: Model name used for token estimation
+        clock: Monotonic time source (injectable for tests)
+    """
+
+    mode = "windowed"
+
+    def __init__(
+        self,
+        system_prompt: str,
+        max_turns: int | None = DEFAULT_MAX_TURNS,
+        max_tokens: int | None = None,
+        max_contexts: int = DEFAULT_MAX_CONTEXTS,
+        idle_ttl: float = DEFAULT_CONTEXT_TTL,
+        model: str | None = None,
+        count_tokens: Callable[[list[dict], str | None], int] = estimate_tokens,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__(system_prompt)
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self.max_contexts = max_contexts
+        self.idle_ttl = idle_ttl
+        self.model = model
+        self._count_tokens = count_tokens
+        self._clock = clock
+        self._conversations: OrderedDict[str, Conversation] = OrderedDict()
+
+    def _touch(self, context_id: str) -> Conversation:
+        self._evict()
+        conversation = self._conversations.get(context_id)
+        if conversation is None:
+            conversation = Conversation(turns=deque(maxlen=self.max_turns))
+            self._conversations[context_id] = conversation
+        else:
+            self._conversations.move_to_end(context_id)
+        conversation.last_used = self._clock()
+        while len(self._conversations) > self.max_contexts:
+            evicted, _ = self._conversations.popitem(last=False)
+            logger.debug(f"Evicted history for context {evicted} (LRU)")
+        return conversation
+
+    def _evict(self):
+        # Conversations are kept in LRU order, so idle ones are at the front
+        deadline = self._clock() - self.idle_ttl
+        while self._conversations:
+            context_id, conversation = next(iter(self._conversations.items()))
+            if conversation.last_used >= deadline:
+                break
+            self._conversations.popitem(last=False)
+            logger.debug(f"Evicted history for context {context_id} (idle)")
+
+    def build_messages(self, context_id: str, user_input: str) -> list[dict]:
+        conversation = self._touch(context_id)
+        system = {"role": "system", "content": self.system_prompt}
+        user = {"role": "user", "content": user_input}
+
+        history = []
+        for question, answer in conversation.turns:
+            history.append({"role": "user", "content": question})
+            history.append({"role": "assistant", "content": answer})
+
+        if self.max_tokens is not None:
+            # Drop the oldest turns until the prompt fits the token budget
+            while history and self._count_tokens([system, *history, user], self.model) > self.max_tokens:
+                history = history[2:]
+
+        return [system, *history, user]
+
+    def record(self, context_id: str, user_input: str, assistant_content: str):
+        conversation = self._touch(context_id)
+        conversation.turns.append((user_input, assistant_content))
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+
+def create_history_store(
+    mode: str,
+    system_prompt: str,
+    max_turns: int | None = DEFAULT_MAX_TURNS,
+    max_tokens: int | None = None,
+    max_contexts: int = DEFAULT_MAX_CONTEXTS,
+    idle_ttl: float = DEFAULT_CONTEXT_TTL,
+    model: str | None = None,
+) -> HistoryStore:
+    """Create the history store for a mode in HISTORY_MODES."""
+    if mode == "stateless":
+        return StatelessHistoryStore(system_prompt)
+    if mode == "windowed":
+        return WindowedHistoryStore(
+            system_prompt,
+            max_turns=max_turns,
+            max_tokens=max_tokens,
+            max_contexts=max_contexts,
+            idle_ttl=idle_ttl,
+            model=model,
+        )
+    if mode == "full":
+        # Every turn is kept, but contexts are still LRU/TTL bounded
+        store = WindowedHistoryStore(
+            system_prompt,
+            max_turns=None,
+            max_tokens=None,
+            max_contexts=max_contexts,
+            idle_ttl=idle_ttl,
+            model=model,
+        )
+        store.mode = "full"
+        return store
+    raise ValueError(f"Unknown history mode: {mode} (expected one of {HISTORY_MODES})")
@@ -0,0 +1,386 @@
+"""
+Question templates and compiled query plans for the purple agent.
+
+Benchmark questions follow a small set of templates, e.g.
+    "What is the median PriceBookRatio across ETFs in Schwab?"
+    "How many ETFs have a PriceEarningsRatio value greater than 20 in Vanguard?"
+A question is reduced to its template by masking provider, ticker and
+numbers. Each template is compiled once (and cached) into a QueryPlan —
+operation, attributes, comparisons, output unit — and then bound to the
+question's provider, ticker and numbers to give a Query that the
+ETFDataEngine executes. Questions that match no template return None so
+the caller can fall back to the LLM.
+"""
+import math
+import re
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Callable
+
+import numpy as np
+
+from etf_data import FRACTION, PERCENT, PROVIDERS, DataError, ETFDataEngine
+
+
+_PROVIDER_RE = re.compile(r"\b(" + "|".join(PROVIDERS) + r")\b", re.IGNORECASE)
+_TICKER_RE = re.compile(r"\bETF ([A-Z][A-Z0-9.]{0,5})\b")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d[\d,]*(?:\.\d+)?")
+
+# Longest phrases first so "greater than or equal to" wins over "greater than"
+COMPARISON_PHRASES = {
+    "greater than or equal to": ">=",
+    "less than or equal to": "<=",
+    "greater than": ">",
+    "less than": "<",
+    "above": ">",
+    "below": "<",
+    "equal to": "==",
+}
+_COMPARISON = "|".join(re.escape(p) for p in COMPARISON_PHRASES)
+
+# "top decile of X" etc. -> (quantile of X, comparison against it)
+GROUPS = {
+    "top decile": (0.9, ">="),
+    "top quartile": (0.75, ">="),
+    "lowest quartile": (0.25, "<="),
+    "bottom quartile": (0.25, "<="),
+}
+_GROUP = "|".join(GROUPS)
+
+_AGGREGATIONS = {"average": "mean", "median": "median", "standard deviation of": "std"}
+
+# "{n}Y" return periods
+_PERIODS = {1: "OneYearNAVReturn", 3: "ThreeYearNAVReturn", 5: "FiveYearNAVReturn", 10: "TenYearNAVReturn"}
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    """A compiled template: everything about a question except its values."""
+    operation: str
+    attributes: tuple[str, ...] = ()
+    comparisons: tuple[str, ...] = ()
+    aggregation: str | None = None
+    group: str | None = None
+    percent_threshold: bool = False
+    unit: str | None = None
+
+
+@dataclass(frozen=True)
+class Query:
+    """A plan bound to one question's provider, ticker and numbers."""
+    plan: QueryPlan
+    provider: str
+    thresholds: tuple[float, ...] = ()
+    ticker: str | None = None
+    category: str | None = None
+
+
+def question_template(question: str) -> str:
+    """Mask provider, ticker and numbers, e.g. "... greater than {n} in {provider}?"."""
+    template = _PROVIDER_RE.sub("{provider}", question.strip())
+    template = _TICKER_RE.sub("ETF {ticker}", template)
+    return _NUMBER_RE.sub("{n}", template)
+
+
+def _template_regex(pattern: str) -> re.Pattern:
+    return re.compile("^" + pattern + r"\??$", re.IGNORECASE)
+
+
+_A = r"(?:an? )?(?P<a>[A-Za-z]+)(?: values?)?"
+_B = r"(?:an? )?(?P<b>[A-Za-z]+)(?: values?)?"
+_IN = r" (?:across (?:all |the )?(?:ETFs|ETF universe) )?in \{provider\}"
+
+# (template regex, operation, plan overrides); the first match wins
+_RULES: list[tuple[re.Pattern, str, dict]] = [
+    (_template_regex(r"What is the (?P<a>[A-Za-z]+)(?: value)? for ETF \{ticker\} in \{provider\}"), "lookup", {}),
+    (_template_regex(r"What is the (?P<agg>average|median|standard deviation of) (?P<a>[A-Za-z]+)" + _IN), "aggregate", {}),
+    (_template_regex(r"What is the bottom quartile of (?P<a>[A-Za-z]+)(?: values)? in \{provider\}"), "quantile", {"aggregation": "0.25"}),
+    (_template_regex(r"What is the correlation between (?P<a>[A-Za-z]+) and (?P<b>[A-Za-z]+)(?: across ETFs)? in \{provider\}"), "correlation", {}),
+    (_template_regex(r"What is the maximum absolute difference between (?P<a>[A-Za-z]+) and (?P<b>[A-Za-z]+) ranks in \{provider\}"), "max_rank_difference", {}),
+    (_template_regex(r"What is the average (?P<b>[A-Za-z]+) (?:among|for) ETFs in the (?P<group>" + _GROUP + r") of (?P<a>[A-Za-z]+) in \{provider\}"), "group_mean", {}),
+    (_template_regex(r"What is the difference between the average (?P<b>[A-Za-z]+) of above-median and below-median (?P<a>[A-Za-z]+) ETFs in \{provider\}"), "median_split_difference", {}),
+    (_template_regex(r"What is the ratio of ETFs with above-mean (?P<a>[A-Za-z]+) to those with below-mean (?P=a) in \{provider\}"), "mean_split_ratio", {}),
+    (_template_regex(r"What (?:proportion|percentage) of ETFs simultaneously rank in the top half for (?P<a>[A-Za-z]+) and (?P<b>[A-Za-z]+) in \{provider\}"), "top_half_both", {}),
+    (_template_regex(r"What proportion of ETFs have (?P<a>[A-Za-z]+) greater than (?P<b>[A-Za-z]+) in \{provider\}"), "proportion_greater", {}),
+    (_template_regex(r"What proportion of (?:\{provider\} )?ETFs (?:with a non-null [A-Za-z]+ )?have " + _A + r" (?P<cmp>" + _COMPARISON + r") \{n\}(?P<pct>%)?(?: in \{provider\})?"), "proportion", {}),
+    (_template_regex(r"How many ETFs are available on \{provider\}"), "count_all", {}),
+    (_template_regex(r"How many distinct (?P<a>[A-Za-z]+) categories exist across ETFs in \{provider\}"), "distinct", {}),
+    (_template_regex(r"How many (?:\{provider\} )?ETFs (?:report|have) (?:a |an )?(?:non-null )?(?P<a>[A-Za-z]+)(?: values?)?(?: in \{provider\})?"), "count_present", {}),
+    (_template_regex(r"How many ETFs (?:report|have) (?:non-null values for )?(?:both|BOTH) " + _A + r" and " + _B + r" in \{provider\}"), "count_present", {}),
+    (_template_regex(r"How many ETFs have complete return data for \{n\}Y, \{n\}Y, and \{n\}Y periods in \{provider\}"), "count_present_periods", {}),
+    (_template_regex(r"How many ETFs have " + _A + r" equal to \"(?P<category>[^\"]+)\" in \{provider\}"), "count_equal", {}),
+    (_template_regex(r"How many ETFs have " + _A + r" above the (?:ETF universe )?average in \{provider\}"), "count_above_mean", {}),
+    (_template_regex(r"How many ETFs have " + _A + r" (?:that are )?more than one standard deviation away from the mean in \{provider\}"), "count_outside_std", {}),
+    (_template_regex(r"How many ETFs have " + _A + r" closer to the universe median than to the universe mean in \{provider\}"), "count_closer_to_median", {}),
+    (_template_regex(r"How many ETFs change quartile classification when moving from (?P<a>[A-Za-z]+) to (?P<b>[A-Za-z]+) in \{provider\}"), "quartile_changes", {}),
+    (_template_regex(r"How many ETFs (?:have|report) (?P<a>[A-Za-z]+) (?P<cmp>" + _COMPARISON + r") \{n\} AND (?P<b>[A-Za-z]+) (?P<cmp2>" + _COMPARISON + r") \{n\} in \{provider\}"), "count_compare", {}),
+    (_template_regex(r"How many ETFs (?:have|report) " + _A + r" (?P<cmp>" + _COMPARISON + r") \{n\}(?P<pct>%)?(?: \(\{n\}[%MB]\))? in \{provider\}"), "count_compare", {}),
+]
+
+
+def _output_unit(template: str) -> str | None:
+    lowered = template.lower()
+    if "in percentage" in lowered and "not percentage" not in lowered:
+        return "percent"
+    if "decimal" in lowered:
+        return "decimal"
+    return None
+
+
+@lru_cache(maxsize=512)
+def compile_template(template: str) -> QueryPlan | None:
+    """Compile a question template into a QueryPlan, or None if no rule matches."""
+    # Unit instructions trail the question proper: "...? Return the answer as a decimal."
+    head, _, _ = template.partition("?")
+    for pattern, operation, overrides in _RULES:
+        match = pattern.match(head.strip())
+        if match is None:
+            continue
+        groups = match.groupdict()
+        attributes = tuple(groups[g] for g in ("a", "b") if groups.get(g))
+        comparisons = tuple(COMPARISON_PHRASES[groups[g].lower()] for g in ("cmp", "cmp2") if groups.get(g))
+        plan = QueryPlan(
+            operation=operation,
+            attributes=attributes,
+            comparisons=comparisons,
+            aggregation=_AGGREGATIONS.get((groups.get("agg") or "").lower()),
+            group=(groups.get("group") or "").lower() or None,
+            percent_threshold=bool(groups.get("pct")),
+            unit=_output_unit(template),
+        )
+        return replace(plan, **overrides)
+    return None
+
+
+def parse_question(question: str) -> Query | None:
+    """Parse a benchmark question into a Query, or None if it matches no template."""
+    plan = compile_template(question_template(question))
+    if plan is None:
+        return None
+    provider = _PROVIDER_RE.search(question)
+    if provider is None:
+        return None
+    canonical = {p.lower(): p for p in PROVIDERS}[provider.group(1).lower()]
+    ticker = _TICKER_RE.search(question)
+    category = re.search(r"\"([^\"]+)\"", question)
+    return Query(
+        plan=plan,
+        provider=canonical,
+        thresholds=tuple(float(n.replace(",", "")) for n in _NUMBER_RE.findall(_PROVIDER_RE.sub("", question))),
+        ticker=ticker.group(1) if ticker else None,
+        category=category.group(1) if category else None,
+    )
+
+
+# Execution
+
+def _threshold(engine: ETFDataEngine, query: Query, column: str, value: float) -> float:
+    # "above 5%" against a column of fractions means above 0.05; percent-point columns take 5 as is
+    if query.plan.percent_threshold and engine.unit(column) == FRACTION:
+        return value / 100
+    return value
+
+
+def _in_unit(engine: ETFDataEngine, column: str, value: float, unit: str | None) -> float:
+    """Convert a value of `column` to the unit the question asks for."""
+    stored = engine.unit(column)
+    if unit == "percent" and stored == FRACTION:
+        return value * 100
+    if unit == "decimal" and stored == PERCENT:
+        return value / 100
+    return value
+
+
+def _both(engine: ETFDataEngine, query: Query) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Both attribute columns and the mask of ETFs reporting both."""
+    table = engine.table(query.provider)
+    a, b = query.plan.attributes[:2]
+    both = table.present(a) & table.present(b)
+    return table.numeric(a), table.numeric(b), both
+
+
+def _lookup(engine, query):
+    value = engine.lookup(query.provider, query.ticker, query.plan.attributes[0])
+    if value is None:
+        raise DataError(f"{query.ticker} has no {query.plan.attributes[0]}")
+    return float(value)
+
+
+def _aggregate(engine, query):
+    return engine.aggregate(query.provider, query.plan.attributes[0], query.plan.aggregation)
+
+
+def _quantile(engine, query):
+    return engine.quantile(query.provider, query.plan.attributes[0], float(query.plan.aggregation))
+
+
+def _correlation(engine, query):
+    return engine.correlation(query.provider, *query.plan.attributes[:2])
+
+
+def _max_rank_difference(engine, query):
+    differences = engine.rank_difference(query.provider, *query.plan.attributes[:2])
+    return float(np.nanmax(differences)) if np.any(~np.isnan(differences)) else math.nan
+
+
+def _group_mask(engine: ETFDataEngine, query: Query) -> np.ndarray:
+    q, op = GROUPS[query.plan.group]
+    column = query.plan.attributes[0]
+    cutoff = engine.quantile(query.provider, column, q)
+    return engine.mask(query.provider, column, op, cutoff)
+
+
+def _group_mean(engine, query):
+    return engine.aggregate(query.provider, query.plan.attributes[1], "mean", _group_mask(engine, query))
+
+
+def _median_split_difference(engine, query):
+    split, target = query.plan.attributes[:2]
+    median = engine.aggregate(query.provider, split, "median")
+    above = engine.aggregate(query.provider, target, "mean", engine.mask(query.provider, split, ">", median))
+    below = engine.aggregate(query.provider, target, "mean", engine.mask(query.provider, split, "<", median))
+    return above - below
+
+
+def _mean_split_ratio(engine, query):
+    column = query.plan.attributes[0]
+    mean = engine.aggregate(query.provider, column, "mean")
+    below = engine.count(query.provider, engine.mask(query.provider, column, "<", mean))
+    if below == 0:
+        return math.nan
+    return engine.count(query.provider, engine.mask(query.provider, column, ">", mean)) / below
+
+
+def _top_half_both(engine, query):
+    a, b, both = _both(engine, query)
+    if not np.any(both):
+        return math.nan
+    with np.errstate(invalid="ignore"):
+        top = (a >= np.median(a[both])) & (b >= np.median(b[both])) & both
+    return np.count_nonzero(top) / np.count_nonzero(both)
+
+
+def _proportion_greater(engine, query):
+    a, b, both = _both(engine, query)
+    if not np.any(both):
+        return math.nan
+    with np.errstate(invalid="ignore"):
+        greater = (a > b) & both
+    return np.count_nonzero(greater) / np.count_nonzero(both)
+
+
+def _compare_mask(engine: ETFDataEngine, query: Query) -> np.ndarray:
+    mask = None
+    for column, op, value in zip(query.plan.attributes, query.plan.comparisons, query.thresholds):
+        condition = engine.mask(query.provider, column, op, _threshold(engine, query, column, value))
+        mask = condition if mask is None else mask & condition
+    return mask
+
+
+def _proportion(engine, query):
+    present = engine.count_present(query.provider, query.plan.attributes[0])
+    if present == 0:
+        return math.nan
+    return engine.count(query.provider, _compare_mask(engine, query)) / present
+
+
+def _count_compare(engine, query):
+    return engine.count(query.provider, _compare_mask(engine, query))
+
+
+def _count_all(engine, query):
+    return engine.count(query.provider)
+
+
+def _distinct(engine, query):
+    return engine.distinct(query.provider, query.plan.attributes[0])
+
+
+def _count_present(engine, query):
+    return engine.count_present(query.provider, *query.plan.attributes)
+
+
+def _count_present_periods(engine, query):
+    columns = [_PERIODS[int(n)] for n in query.thresholds if int(n) in _PERIODS]
+    return engine.count_present(query.provider, *columns)
+
+
+def _count_equal(engine, query):
+    return engine.count(query.provider, engine.mask(query.provider, query.plan.attributes[0], "==", query.category))
+
+
+def _count_above_mean(engine, query):
+    column = query.plan.attributes[0]
+    mean = engine.aggregate(query.provider, column, "mean")
+    return engine.count(query.provider, engine.mask(query.provider, column, ">", mean))
+
+
+def _count_outside_std(engine, query):
+    column = query.plan.attributes[0]
+    values = engine.values(query.provider, column)
+    if values.size < 2:
+        return 0
+    return int(np.count_nonzero(np.abs(values - values.mean()) > np.std(values, ddof=1)))
+
+
+def _count_closer_to_median(engine, query):
+    values = engine.values(query.provider, query.plan.attributes[0])
+    if values.size == 0:
+        return 0
+    return int(np.count_nonzero(np.abs(values - np.median(values)) < np.abs(values - values.mean())))
+
+
+def _quartile_changes(engine, query):
+    a, b, both = _both(engine, query)
+    if not np.any(both):
+        return 0
+    a_class = np.searchsorted(np.quantile(a[both], [0.25, 0.5, 0.75]), a[both], side="right")
+    b_class = np.searchsorted(np.quantile(b[both], [0.25, 0.5, 0.75]), b[both], side="right")
+    return int(np.count_nonzero(a_class != b_class))
+
+
+OPERATIONS: dict[str, Callable[[ETFDataEngine, Query], float]] = {
+    "lookup": _lookup,
+    "aggregate": _aggregate,
+    "quantile": _quantile,
+    "correlation": _correlation,
+    "max_rank_difference": _max_rank_difference,
+    "group_mean": _group_mean,
+    "median_split_difference": _median_split_difference,
+    "mean_split_ratio": _mean_split_ratio,
+    "top_half_both": _top_half_both,
+    "proportion_greater": _proportion_greater,
+    "proportion": _proportion,
+    "count_all": _count_all,
+    "distinct": _distinct,
+    "count_present": _count_present,
+    "count_present_periods": _count_present_periods,
+    "count_equal": _count_equal,
+    "count_above_mean": _count_above_mean,
+    "count_outside_std": _count_outside_std,
+    "count_closer_to_median": _count_closer_to_median,
+    "quartile_changes": _quartile_changes,
+    "count_compare": _count_compare,
+}
+
+
+# Operations whose answer is in the unit of one of their attributes (index into attributes)
+VALUE_ATTRIBUTE = {"lookup": 0, "aggregate": 0, "quantile": 0, "group_mean": 1, "median_split_difference": 1}
+
+
+def execute(engine: ETFDataEngine, query: Query) -> float:
+    """Run a query against the data engine; raises DataError when it cannot be answered."""
+    value = float(OPERATIONS[query.plan.operation](engine, query))
+    if math.isnan(value):
+        raise DataError(f"No data to answer {query.plan.operation} over {query.plan.attributes}")
+    plan = query.plan
+    if plan.operation in VALUE_ATTRIBUTE:
+        value = _in_unit(engine, plan.attributes[VALUE_ATTRIBUTE[plan.operation]], value, plan.unit)
+    return value
+
+
+def format_answer(value: float) -> str:
+    """Plain positional notation (no exponent), trailing zeros trimmed."""
+    if float(value).is_integer():
+        return str(int(value))
+    return np.format_float_positional(value, precision=10, unique=True, trim="-")
@@ -0,0 +1,135 @@
+"""
+Client-side rate limiting of LLM calls.
+
+Providers cap requests per minute (RPM) and tokens per minute (TPM). Rather
+than sending calls until the provider throttles them, each call first takes
+one request from an RPM token bucket and its estimated token count from a
+TPM bucket. Calls that do not fit wait in arrival order, so a large prompt
+is not starved by a stream of small ones. Once the provider reports real
+usage (prompt + completion tokens), the difference from the estimate is
+settled against the TPM bucket.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from loguru import logger
+
+
+@dataclass
+class RateLimitStats:
+    """Time LLM calls spent queued behind the rate limits."""
+    calls: int = 0
+    queued_calls: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    throttled: int = 0
+
+    def record(self, wait: float):
+        self.calls += 1
+        if wait > 0:
+            self.queued_calls += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "queued_calls": self.queued_calls,
+            "avg_wait": round(self.total_wait / self.calls, 3) if self.calls else 0.0,
+            "max_wait": round(self.max_wait, 3),
+            "throttled": self.throttled,
+        }
+
+
+class TokenBucket:
+    """Holds up to `per_minute` units and refills at `per_minute` / 60 per second."""
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if they are now)."""
+        self._refill()
+        # A request larger than the bucket only waits for a full one
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= amount
+
+    def drain(self) -> None:
+        self._refill()
+        self.level = min(self.level, 0.0)
+
+
+class RateLimiter:
+    """RPM and TPM buckets in front of the LLM; waiting calls are served FIFO.
+
+    Args:
+        rpm: Requests per minute (None = unlimited)
+        tpm: Tokens per minute (None = unlimited)
+        clock: Monotonic time source (tests pass a fake one)
+        sleep: Waits the given seconds of `clock` time
+    """
+
+    def __init__(
+        self,
+        rpm: int | None = None,
+        tpm: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable] = asyncio.sleep,
+    ):
+        self.requests = TokenBucket(rpm, clock) if rpm else None
+        self.tokens = TokenBucket(tpm, clock) if tpm else None
+        self.stats = RateLimitStats()
+        self.clock = clock
+        self.sleep = sleep
+        # asyncio.Lock wakes waiters in arrival order
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int) -> float:
+        """Wait until a call estimated at `tokens` fits both limits; returns the seconds waited."""
+        started = self.clock()
+        queued = self._lock.locked()
+        async with self._lock:
+            while True:
+                delay = max(
+                    self.requests.wait_time(1) if self.requests else 0.0,
+                    self.tokens.wait_time(tokens) if self.tokens else 0.0,
+                )
+                if delay <= 0:
+                    break
+                queued = True
+                await self.sleep(delay)
+            if self.requests:
+                self.requests.take(1)
+            if self.tokens:
+                self.tokens.take(tokens)
+        wait = self.clock() - started if queued else 0.0
+        self.stats.record(wait)
+        return wait
+
+    def settle(self, estimated: int, actual: int) -> None:
+        """Charge (or refund) the difference between a call's estimated and reported tokens."""
+        if self.tokens and actual:
+            self.tokens.take(actual - estimated)
+
+    def throttled(self) -> None:
+        """The provider rejected a call for exceeding its limits; hold back everyone for a while."""
+        self.stats.throttled += 1
+        for bucket in (self.requests, self.tokens):
+            if bucket:
+                bucket.drain()
+        logger.warning(f"LLM provider throttled a call; rate limit stats: {self.stats.as_dict()}")
@@ -0,0 +1,71 @@
+"""
+Single-flight deduplication of identical in-flight questions.
+
+With concurrent or multi-participant assessments the same question can
+arrive several times at once. Requests with the same key (see
+`answer_cache.cache_key`: model + normalized question + prompt + history
+mode) share one LLM call: the first starts it, later ones wait for its
+answer. The call runs in its own task, so it is only cancelled once every
+request waiting on it has been cancelled.
+"""
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Callable, Coroutine, TypeVar
+
+from loguru import logger
+
+T = TypeVar("T")
+
+
+@dataclass
+class FlightStats:
+    calls: int = 0
+    coalesced: int = 0
+
+    def as_dict(self) -> dict:
+        requests = self.calls + self.coalesced
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "coalesced_rate": round(self.coalesced / requests, 3) if requests else 0.0,
+        }
+
+
+@dataclass
+class Flight:
+    task: asyncio.Task
+    waiters: int = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key onto one."""
+
+    def __init__(self):
+        self.stats = FlightStats()
+        self._flights: dict[str, Flight] = {}
+
+    async def do(self, key: str, call: Callable[[], Coroutine[Any, Any, T]]) -> T:
+        """Run `call()`, or wait for the identical call already in flight."""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = Flight(asyncio.create_task(call()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.stats.calls += 1
+        else:
+            self.stats.coalesced += 1
+            logger.info(f"Joined the call in flight for an identical question ({self.stats.as_dict()})")
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                # Nobody else is waiting for this answer
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _forget(self, key: str, flight: Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
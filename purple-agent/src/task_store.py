@@ -0,0 +1,191 @@
+"""Bounded, persistent A2A task store.
+
+`InMemoryTaskStore` keeps every task (with its message history and
+artifacts) for the life of the process. `SQLiteTaskStore` instead
+keeps a bounded LRU of recently used tasks in memory over a SQLite file in
+WAL mode, so a long-running server holds a flat amount of memory and tasks
+survive a restart:
+- saves are buffered and written in one transaction per batch
+- terminal tasks (completed, failed, ...) are deleted once older than
+  `max_age` seconds, and beyond the newest `max_terminal_tasks`
+
+The green and purple agents are built as separate images, so each ships
+this module in its src/; the two copies are kept identical
+(green-agent/tests/test_task_store.py checks it).
+"""
+import asyncio
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from a2a.server.context import ServerCallContext
+from a2a.server.tasks import TaskStore
+from a2a.types import Task, TaskState
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MAX_HOT_TASKS = 128
+DEFAULT_MAX_TERMINAL_TASKS = 1000
+DEFAULT_MAX_AGE = 7 * 24 * 3600.0
+# Buffered saves are written after this many seconds, or once this many are pending
+DEFAULT_FLUSH_INTERVAL = 0.5
+DEFAULT_BATCH_SIZE = 64
+
+# Retention is applied every this many flushes rather than on each one
+_RETAIN_EVERY = 20
+
+TERMINAL_STATES = {TaskState.completed, TaskState.canceled, TaskState.failed, TaskState.rejected}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    context_id TEXT,
+    terminal INTEGER NOT NULL,
+    updated REAL NOT NULL,
+    task TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_terminal_updated ON tasks (terminal, updated);
+"""
+
+
+class SQLiteTaskStore(TaskStore):
+    """Task store with an in-memory LRU hot tier over a SQLite (WAL) file.
+
+    Args:
+        path: SQLite file (":memory:" keeps the cold tier in memory too)
+        max_hot_tasks: Tasks kept deserialized in memory
+        max_age: Seconds a terminal task is kept (None = forever)
+        max_terminal_tasks: Newest terminal tasks kept (None = no limit)
+        flush_interval: Seconds a save may wait to be written with others
+        batch_size: Pending saves that trigger an immediate write
+    """
+
+    def __init__(
+        self,
+        path: str | Path = ":memory:",
+        max_hot_tasks: int = DEFAULT_MAX_HOT_TASKS,
+        max_age: float | None = DEFAULT_MAX_AGE,
+        max_terminal_tasks: int | None = DEFAULT_MAX_TERMINAL_TASKS,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        self.max_hot_tasks = max_hot_tasks
+        self.max_age = max_age
+        self.max_terminal_tasks = max_terminal_tasks
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._hot: OrderedDict[str, Task] = OrderedDict()
+        self._pending: dict[str, Task] = {}
+        self._flusher: asyncio.Task | None = None
+        self._flushes = 0
+        # The connection is used from worker threads, one operation at a time
+        self._lock = asyncio.Lock()
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+
+    async def save(self, task: Task, context: ServerCallContext | None = None) -> None:
+        self._remember(task)
+        self._pending[task.id] = task
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+        elif self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_later())
+
+    async def get(self, task_id: str, context: ServerCallContext | None = None) -> Task | None:
+        task = self._pending.get(task_id) or self._hot.get(task_id)
+        if task is None:
+            async with self._lock:
+                row = await asyncio.to_thread(self._select, task_id)
+            if row is None:
+                return None
+            task = Task.model_validate_json(row[0])
+        self._remember(task)
+        return task
+
+    async def delete(self, task_id: str, context: ServerCallContext | None = None) -> None:
+        self._hot.pop(task_id, None)
+        self._pending.pop(task_id, None)
+        async with self._lock:
+            await asyncio.to_thread(self._execute, "DELETE FROM tasks WHERE task_id = ?", (task_id,))
+
+    async def flush(self) -> None:
+        """Write every pending save in one transaction."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        now = time.time()
+        rows = []
+        for task in pending.values():
+            try:
+                terminal = int(task.status.state in TERMINAL_STATES)
+                rows.append((task.id, task.context_id, terminal, now, task.model_dump_json()))
+            except Exception:
+                logger.exception(f"Could not serialize task {task.id}; it is not stored")
+        try:
+            async with self._lock:
+                await asyncio.to_thread(self._write, rows)
+                self._flushes += 1
+                if self._flushes % _RETAIN_EVERY == 0:
+                    await asyncio.to_thread(self._retain)
+        except BaseException:
+            # Keep the saves for the next flush, unless they were saved again since
+            self._pending = {**pending, **self._pending}
+            raise
+
+    async def close(self) -> None:
+        """Write pending saves and close the database."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+        await self.flush()
+        async with self._lock:
+            self._db.close()
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        try:
+            await self.flush()
+        except Exception:
+            # Nobody awaits this task, so an error would otherwise go unnoticed
+            logger.exception("Could not write tasks to the task store")
+
+    def _remember(self, task: Task) -> None:
+        self._hot[task.id] = task
+        self._hot.move_to_end(task.id)
+        while len(self._hot) > self.max_hot_tasks:
+            self._hot.popitem(last=False)
+
+    def _select(self, task_id: str) -> tuple | None:
+        return self._db.execute("SELECT task FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+
+    def _execute(self, sql: str, params: tuple) -> None:
+        with self._db:
+            self._db.execute(sql, params)
+
+    def _write(self, rows: list[tuple]) -> None:
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO tasks (task_id, context_id, terminal, updated, task) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def _retain(self) -> None:
+        with self._db:
+            if self.max_age is not None:
+                self._db.execute(
+                    "DELETE FROM tasks WHERE terminal = 1 AND updated < ?", (time.time() - self.max_age,)
+                )
+            if self.max_terminal_tasks is not None:
+                self._db.execute(
+                    "DELETE FROM tasks WHERE task_id IN ("
+                    "SELECT task_id FROM tasks WHERE terminal = 1 ORDER BY updated DESC LIMIT -1 OFFSET ?)",
+                    (self.max_terminal_tasks,),
+                )
+        logger.debug("Applied task store retention")
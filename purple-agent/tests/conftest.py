@@ -0,0 +1,13 @@
+from pathlib import Path
+
+import pytest
+
+from etf_data import ETFDataEngine
+
+DATA_DIR = Path(__file__).parent / "data"
+
+
+@pytest.fixture(scope="session")
+def engine() -> ETFDataEngine:
+    """Engine over the small Vanguard table in tests/data (no other providers)."""
+    return ETFDataEngine.load(DATA_DIR)
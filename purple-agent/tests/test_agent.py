@@ -0,0 +1,68 @@
+"""Cancelling questions in the ETF purple agent's executor."""
+import asyncio
+
+import pytest
+from a2a.server.agent_execution import RequestContext
+from a2a.server.events import EventQueue
+from a2a.types import Message, MessageSendParams, Part, Role, TaskState, TaskStatusUpdateEvent, TextPart
+from a2a.utils import new_task
+
+import agent
+from agent import ETFAgentExecutor
+
+
+class HangingCompletion:
+    """An acompletion stand-in that never returns, noting when it starts and is cancelled."""
+
+    def __init__(self):
+        self.started = asyncio.Event()
+        self.cancelled = False
+
+    async def __call__(self, **kwargs):
+        self.started.set()
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+def request_context(text: str = "What is the answer?") -> RequestContext:
+    message = Message(role=Role.user, parts=[Part(TextPart(text=text))], message_id="m")
+    task = new_task(message)
+    return RequestContext(
+        request=MessageSendParams(message=message), task_id=task.id, context_id=task.context_id, task=task
+    )
+
+
+def final_state(queue: EventQueue) -> TaskState:
+    events = []
+    while not queue.queue.empty():
+        events.append(queue.queue.get_nowait())
+    return [e for e in events if isinstance(e, TaskStatusUpdateEvent)][-1].status.state
+
+
+@pytest.mark.asyncio
+async def test_cancel_stops_the_llm_call_in_flight(monkeypatch):
+    completion = HangingCompletion()
+    monkeypatch.setattr(agent, "acompletion", completion)
+    executor = ETFAgentExecutor(model="test-model")
+    context, queue = request_context(), EventQueue()
+    execution = asyncio.create_task(executor.execute(context, queue))
+    await asyncio.wait_for(completion.started.wait(), timeout=5)
+
+    await executor.cancel(context, queue)
+    await asyncio.wait_for(execution, timeout=5)
+    assert completion.cancelled
+    assert final_state(queue) == TaskState.canceled
+    assert executor._running == {}
+    # A cancelled question leaves nothing in the conversation history
+    assert executor.history.build_messages(context.context_id, "next")[1:] == [{"role": "user", "content": "next"}]
+
+
+@pytest.mark.asyncio
+async def test_cancel_of_an_unknown_task_still_marks_it_canceled():
+    executor = ETFAgentExecutor(model="test-model")
+    context, queue = request_context(), EventQueue()
+    await executor.cancel(context, queue)
+    assert final_state(queue) == TaskState.canceled
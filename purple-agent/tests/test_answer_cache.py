@@ -0,0 +1,78 @@
+"""Keys, TTL expiry, LRU eviction and the disk tier of the answer cache."""
+import pytest
+
+import answer_cache
+from answer_cache import AnswerCache, cache_key
+
+
+class FakeClock:
+    """Wall-clock time that only moves when the test says so."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_key_ignores_case_and_whitespace_only():
+    key = cache_key("gpt", "How many  Vanguard ETFs?", "prompt")
+    assert cache_key("gpt", " how many vanguard\nETFs? ", "prompt") == key
+    assert len({key, cache_key("other", "How many Vanguard ETFs?", "prompt"),
+                cache_key("gpt", "How many Vanguard ETFs?", "other prompt"),
+                cache_key("gpt", "How many Vanguard ETFs?", "prompt", policy="stateless")}) == 4
+
+
+@pytest.mark.asyncio
+async def test_memory_tier_evicts_least_recently_used():
+    cache = AnswerCache(max_entries=2)
+    await cache.put("a", "1")
+    await cache.put("b", "2")
+    assert await cache.get("a") == "1"
+    await cache.put("c", "3")
+    assert await cache.get("b") is None
+    assert [await cache.get(key) for key in ("a", "c")] == ["1", "3"]
+    assert cache.stats.as_dict() == {"hits": 3, "disk_hits": 0, "misses": 1, "hit_rate": 0.75}
+
+
+@pytest.mark.asyncio
+async def test_entries_expire_after_the_ttl(tmp_path):
+    clock = FakeClock()
+    cache = AnswerCache(ttl=60, path=tmp_path / "cache.sqlite", clock=clock)
+    await cache.put("a", "1")
+    clock.now += 59
+    assert await cache.get("a") == "1"
+    # Expired in memory and on disk alike
+    clock.now += 2
+    assert await cache.get("a") is None
+    assert "a" not in cache._memory
+    await cache.close()
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_a_restart(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cache = AnswerCache(path=path)
+    await cache.put("a", "1")
+    await cache.close()
+
+    restarted = AnswerCache(max_entries=1, path=path)
+    assert await restarted.get("a") == "1"
+    assert restarted.stats.disk_hits == 1
+    # Promoted to memory: the second lookup doesn't touch the disk
+    assert await restarted.get("a") == "1"
+    assert restarted.stats.disk_hits == 1
+    await restarted.close()
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_is_trimmed_to_its_size(tmp_path, monkeypatch):
+    monkeypatch.setattr(answer_cache, "_TRIM_EVERY", 5)
+    clock = FakeClock()
+    cache = AnswerCache(max_entries=1, path=tmp_path / "cache.sqlite", max_disk_entries=3, clock=clock)
+    for i in range(5):
+        clock.now += 1
+        await cache.put(str(i), str(i))
+    # Only the newest entries are left on disk
+    assert [await cache.get(str(i)) for i in range(5)] == [None, None, "2", "3", "4"]
+    await cache.close()
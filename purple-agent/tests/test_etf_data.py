@@ -0,0 +1,120 @@
+"""Columnar ETF data engine over tiny in-memory tables."""
+import math
+
+import numpy as np
+import pytest
+
+from etf_data import DataError, ETFDataEngine, ProviderTable, _to_column, average_ranks
+
+NAN = math.nan
+
+
+@pytest.fixture
+def engine() -> ETFDataEngine:
+    table = ProviderTable("Vanguard", {
+        "Ticker": _to_column(["VA", "VB", "VC", "VD", "VE"]),
+        "PriceEarningsRatio": _to_column(["20", "", "10", "NA", "30"]),
+        "PriceBookRatio": _to_column(["2", "4", "4", "1", None]),
+        "AssetClass": _to_column(["Equity", "Bond", "", "Equity", "equity"]),
+    })
+    return ETFDataEngine({"Vanguard": table})
+
+
+def test_columns_are_typed_with_missing_values():
+    assert _to_column(["1.5", "", "NaN", "-2"]).tolist()[::3] == [1.5, -2.0]
+    assert np.isnan(_to_column(["1.5", "", "NaN", "-2"])[1:3]).all()
+    text = _to_column([" Equity ", "", "Bond"])
+    assert text.dtype == object and text.tolist() == ["Equity", None, "Bond"]
+
+
+def test_average_ranks_share_ties_and_keep_nan():
+    ranks = average_ranks(np.array([10.0, NAN, 20.0, 10.0, 30.0]))
+    assert np.isnan(ranks[1])
+    assert ranks[[0, 2, 3, 4]].tolist() == [1.5, 3.0, 1.5, 4.0]
+    descending = average_ranks(np.array([10.0, 20.0, 20.0, 5.0]), ascending=False)
+    assert descending.tolist() == [3.0, 1.5, 1.5, 4.0]
+    assert np.isnan(average_ranks(np.array([NAN, NAN]))).all()
+
+
+def test_mask_never_matches_missing_values(engine):
+    assert engine.mask("Vanguard", "PriceEarningsRatio", ">", 5).tolist() == [True, False, True, False, True]
+    assert engine.mask("Vanguard", "PriceEarningsRatio", "!=", 20).tolist() == [False, False, True, False, True]
+    # Text comparisons ignore case; empty cells never match
+    assert engine.mask("Vanguard", "AssetClass", "==", "EQUITY").tolist() == [True, False, False, True, True]
+    assert engine.count("Vanguard") == 5
+    assert engine.count_present("Vanguard", "PriceEarningsRatio", "PriceBookRatio") == 2
+    assert engine.distinct("Vanguard", "AssetClass") == 3
+    assert engine.distinct("Vanguard", "PriceBookRatio") == 3
+
+
+def test_aggregates_skip_missing_values(engine):
+    assert engine.aggregate("Vanguard", "PriceEarningsRatio", "mean") == 20
+    assert engine.aggregate("Vanguard", "PriceEarningsRatio", "std") == pytest.approx(10.0)
+    assert engine.aggregate("Vanguard", "PriceEarningsRatio", "var") == pytest.approx(100.0)
+    assert engine.aggregate("Vanguard", "PriceEarningsRatio", "count") == 3
+    assert engine.aggregate("Vanguard", "PriceBookRatio", "median") == 3
+    assert engine.aggregate("Vanguard", "PriceBookRatio", "sum") == 11
+    mask = engine.mask("Vanguard", "PriceBookRatio", ">=", 4)
+    assert engine.aggregate("Vanguard", "PriceEarningsRatio", "max", mask) == 10
+    # Nothing left to aggregate
+    assert math.isnan(engine.aggregate("Vanguard", "PriceEarningsRatio", "mean", np.zeros(5, dtype=bool)))
+    assert math.isnan(engine.aggregate("Vanguard", "PriceEarningsRatio", "std", mask))
+
+
+def test_quantile(engine):
+    assert engine.quantile("Vanguard", "PriceEarningsRatio", 0.25) == 15
+    assert engine.quantile("Vanguard", "PriceBookRatio", [0.0, 1.0]).tolist() == [1.0, 4.0]
+
+
+def test_correlation_uses_rows_with_both_values(engine):
+    # Only VA (20, 2) and VC (10, 4) report both
+    assert engine.correlation("Vanguard", "PriceEarningsRatio", "PriceBookRatio") == pytest.approx(-1.0)
+    single = ProviderTable("Schwab", {"X": _to_column(["1", ""]), "Y": _to_column(["2", "3"])})
+    assert math.isnan(ETFDataEngine({"Schwab": single}).correlation("Schwab", "X", "Y"))
+
+
+def test_rank_difference_ranks_only_rows_with_both_values(engine):
+    differences = engine.rank_difference("Vanguard", "PriceEarningsRatio", "PriceBookRatio")
+    # VA: rank 2 vs 1; VC: rank 1 vs 2; everyone else lacks a value
+    assert differences[[0, 2]].tolist() == [1.0, 1.0]
+    assert np.isnan(differences[[1, 3, 4]]).all()
+    # VB and VC tie on PriceBookRatio 4 and share ranks 3 and 4
+    assert engine.ranks("Vanguard", "PriceBookRatio")[[1, 2]].tolist() == [3.5, 3.5]
+
+
+def test_lookup(engine):
+    assert engine.lookup("Vanguard", "vc", "PriceEarningsRatio") == 10
+    assert engine.lookup("Vanguard", "VB", "PriceEarningsRatio") is None
+    assert engine.lookup("Vanguard", "VA", "AssetClass") == "Equity"
+
+
+@pytest.mark.parametrize(
+    "call",
+    [
+        lambda e: e.table("Schwab"),
+        lambda e: e.lookup("Vanguard", "ZZZ", "PriceBookRatio"),
+        lambda e: e.aggregate("Vanguard", "Beta", "mean"),
+        lambda e: e.aggregate("Vanguard", "AssetClass", "mean"),
+    ],
+)
+def test_missing_data_raises_data_error(engine, call):
+    with pytest.raises(DataError):
+        call(engine)
+
+
+def test_load_csv(tmp_path):
+    (tmp_path / "Schwab.CSV").write_text("Symbol,DividendYield\nSCHD,0.035\nSCHB,\n")
+    engine = ETFDataEngine.load(tmp_path)
+    assert list(engine.tables) == ["Schwab"]
+    assert engine.lookup("Schwab", "SCHD", "DividendYield") == 0.035
+    assert engine.count_present("Schwab", "DividendYield") == 1
+
+
+def test_load_parquet(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    pq.write_table(pa.table({"Ticker": ["IVV", "IJH"], "Beta": [1.0, None]}), tmp_path / "ishares.parquet")
+    engine = ETFDataEngine.load(tmp_path)
+    assert engine.lookup("iShares", "IVV", "Beta") == 1.0
+    assert engine.lookup("iShares", "IJH", "Beta") is None
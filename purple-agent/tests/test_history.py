@@ -0,0 +1,93 @@
+"""Window trimming, LRU eviction, idle TTL and modes of the conversation history stores."""
+import pytest
+
+from history import StatelessHistoryStore, WindowedHistoryStore, create_history_store
+
+
+class FakeClock:
+    """Monotonic time that only moves when the test says so."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def count_words(messages: list[dict], model: str | None = None) -> int:
+    return sum(len(m["content"].split()) for m in messages)
+
+
+def questions(messages: list[dict]) -> list[str]:
+    """The user turns of a message list, the new question last."""
+    return [m["content"] for m in messages if m["role"] == "user"]
+
+
+def ask(store, context_id: str, *turns: str) -> None:
+    for question in turns:
+        store.build_messages(context_id, question)
+        store.record(context_id, question, f"answer to {question}")
+
+
+def test_window_keeps_the_most_recent_turns():
+    store = WindowedHistoryStore("system", max_turns=2)
+    ask(store, "c", "q1", "q2", "q3")
+    messages = store.build_messages("c", "q4")
+    assert messages[0] == {"role": "system", "content": "system"}
+    assert [m["role"] for m in messages] == ["system", "user", "assistant", "user", "assistant", "user"]
+    assert questions(messages) == ["q2", "q3", "q4"]
+    assert messages[2] == {"role": "assistant", "content": "answer to q2"}
+
+
+def test_token_budget_drops_the_oldest_turns_first():
+    # Each turn costs 4 words; system prompt and new question 1 each
+    store = WindowedHistoryStore("system", max_turns=None, max_tokens=10, count_tokens=count_words)
+    ask(store, "c", "q1", "q2", "q3")
+    assert questions(store.build_messages("c", "q4")) == ["q2", "q3", "q4"]
+    # The new question itself is always sent, even over budget
+    assert questions(store.build_messages("c", " ".join(["word"] * 20))) == [" ".join(["word"] * 20)]
+
+
+def test_least_recently_used_context_is_evicted():
+    store = WindowedHistoryStore("system", max_contexts=2)
+    ask(store, "a", "qa")
+    ask(store, "b", "qb")
+    ask(store, "a", "qa2")
+    ask(store, "c", "qc")
+    assert len(store) == 2
+    assert questions(store.build_messages("b", "again")) == ["again"]
+    assert questions(store.build_messages("a", "again")) == ["again"]
+
+
+def test_idle_contexts_expire():
+    clock = FakeClock()
+    store = WindowedHistoryStore("system", idle_ttl=60, clock=clock)
+    ask(store, "idle", "q1")
+    clock.now += 30
+    ask(store, "busy", "q1")
+    clock.now += 40
+    assert questions(store.build_messages("busy", "q2")) == ["q1", "q2"]
+    assert questions(store.build_messages("idle", "q2")) == ["q2"]
+
+
+def test_stateless_store_keeps_nothing():
+    store = create_history_store("stateless", "system")
+    assert isinstance(store, StatelessHistoryStore)
+    ask(store, "c", "q1", "q2")
+    assert store.build_messages("c", "q3") == [
+        {"role": "system", "content": "system"},
+        {"role": "user", "content": "q3"},
+    ]
+    assert len(store) == 0
+
+
+def test_full_mode_keeps_every_turn():
+    store = create_history_store("full", "system", max_turns=2, max_tokens=1)
+    assert store.mode == "full"
+    ask(store, "c", *[f"q{i}" for i in range(30)])
+    assert len(questions(store.build_messages("c", "last"))) == 31
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        create_history_store("everything", "system")
@@ -0,0 +1,131 @@
+"""Question routing and query plans against the tests/data fixture.
+
+Vanguard fixture (empty = missing):
+    Ticker  TER   1Y     3Y    P/E  P/B
+    VA      0.03  0.10   0.08  20   3.0
+    VB      0.03  0.05   0.06  15   2.0
+    VC      0.04  -0.02  0.01  25   4.0
+    VD      0.05  0.20   0.12       5.0
+    VE      0.07  0.08         30   1.0
+    VF      0.10  0.03   0.04  10   2.5
+    VG      0.20         0.02  18   3.5
+    VH      0.35  0.15   0.03  22   6.0
+TotalExpenseRatio is stored in percentage points, returns as fractions.
+"""
+import statistics
+
+import pytest
+
+from etf_data import DataError
+from query import compile_template, execute, format_answer, parse_question, question_template
+
+ONE_YEAR = [0.10, 0.05, -0.02, 0.20, 0.08, 0.03, 0.15]
+
+
+def answer(engine, question: str) -> float:
+    query = parse_question(question)
+    assert query is not None, f"no template matches {question!r}"
+    return execute(engine, query)
+
+
+@pytest.mark.parametrize(
+    "question, expected",
+    [
+        # Plain thresholds
+        ("How many ETFs have PriceEarningsRatio greater than 20 in Vanguard?", 3),
+        ("How many ETFs have PriceEarningsRatio greater than 15 AND PriceBookRatio less than 4 in Vanguard?", 3),
+        ("How many ETFs are available on Vanguard?", 8),
+        ("How many ETFs report both PriceEarningsRatio and ThreeYearNAVReturn in Vanguard?", 6),
+        ('How many ETFs have AssetClass equal to "bond" in Vanguard?', 3),
+        # Percent thresholds: percentage points for expense ratios, fractions for returns
+        ("How many ETFs have TotalExpenseRatio below 0.05% in Vanguard?", 3),
+        ("How many ETFs have OneYearNAVReturn below 5% in Vanguard?", 2),
+    ],
+)
+def test_counts(engine, question, expected):
+    assert answer(engine, question) == expected
+
+
+def test_proportions(engine):
+    assert answer(
+        engine, "What proportion of ETFs have TotalExpenseRatio greater than 0.1% in Vanguard? "
+        "Return the answer as a decimal value (not percentage points)."
+    ) == 0.25
+    # Only the 7 ETFs reporting a one-year return count
+    assert answer(
+        engine, "What proportion of ETFs have a OneYearNAVReturn value greater than 5% in Vanguard? "
+        "Return the answer as a decimal (not percentage points)."
+    ) == pytest.approx(4 / 7)
+
+
+def test_aggregates(engine):
+    # Percentage points are already "in percentage"
+    assert answer(engine, "What is the average TotalExpenseRatio across all ETFs in Vanguard? In percentage") == (
+        pytest.approx(0.87 / 8)
+    )
+    assert answer(
+        engine, "What is the median TotalExpenseRatio across ETFs in Vanguard? Return the answer as a decimal value."
+    ) == pytest.approx(0.0006)
+    assert answer(engine, "What is the median PriceEarningsRatio across ETFs in Vanguard?") == 20
+    # Fractions are scaled to percent
+    assert answer(
+        engine, "What is the standard deviation of OneYearNAVReturn across the ETF universe in Vanguard? In percentage"
+    ) == pytest.approx(statistics.stdev(ONE_YEAR) * 100)
+
+
+def test_quantile(engine):
+    # 8 sorted values, position 0.25 * 7 = 1.75 -> 0.03 + 0.75 * (0.04 - 0.03)
+    assert answer(engine, "What is the bottom quartile of TotalExpenseRatio values in Vanguard? In percentage.") == (
+        pytest.approx(0.0375)
+    )
+
+
+def test_correlation(engine):
+    pe = [20, 15, 25, 30, 10, 18, 22]
+    pb = [3.0, 2.0, 4.0, 1.0, 2.5, 3.5, 6.0]
+    assert answer(engine, "What is the correlation between PriceEarningsRatio and PriceBookRatio in Vanguard?") == (
+        pytest.approx(statistics.correlation(pe, pb))
+    )
+
+
+def test_max_rank_difference(engine):
+    # Among the 6 ETFs with both returns, VH ranks 5th on 1Y and 2nd on 3Y
+    assert answer(
+        engine, "What is the maximum absolute difference between OneYearNAVReturn and ThreeYearNAVReturn ranks in Vanguard?"
+    ) == 3
+
+
+def test_lookup(engine):
+    assert answer(engine, "What is the OneYearNAVReturn for ETF VA in Vanguard? In percentage.") == pytest.approx(10.0)
+    assert answer(engine, "What is the TotalExpenseRatio for ETF VH in Vanguard? In percentage.") == 0.35
+    assert answer(
+        engine, "What is the OneYearNAVReturn for ETF VC in Vanguard? Return the answer as a decimal value (not percentage points)."
+    ) == -0.02
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "What is the PriceEarningsRatio for ETF VD in Vanguard?",  # missing value
+        "What is the PriceEarningsRatio for ETF ZZZ in Vanguard?",  # unknown ticker
+        "What is the median PriceEarningsRatio across ETFs in Schwab?",  # provider not loaded
+        "What is the median Beta across ETFs in Vanguard?",  # unknown column
+    ],
+)
+def test_unanswerable_raises_data_error(engine, question):
+    with pytest.raises(DataError):
+        answer(engine, question)
+
+
+def test_unmatched_question_returns_none():
+    assert parse_question("Which Vanguard ETF would you recommend for retirement?") is None
+    assert parse_question("What is the median PriceEarningsRatio across ETFs?") is None
+    assert compile_template(question_template("Tell me about ETF VA in Vanguard")) is None
+
+
+def test_format_answer():
+    assert format_answer(22.0) == "22"
+    assert format_answer(-3.0) == "-3"
+    assert format_answer(0.1 + 0.2) == "0.3"
+    assert format_answer(1e-7) == "0.0000001"
+    assert format_answer(1234567.5) == "1234567.5"
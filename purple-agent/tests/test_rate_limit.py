@@ -0,0 +1,136 @@
+"""RPM/TPM token buckets on a fake clock."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from litellm import RateLimitError
+
+import agent
+from agent import MAX_THROTTLED_RETRIES, ETFAgentExecutor
+from rate_limit import RateLimiter, TokenBucket
+
+
+class FakeClock:
+    """Monotonic time that only advances when someone sleeps on it."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.now += seconds
+        await asyncio.sleep(0)
+
+
+def limiter(clock: FakeClock, **limits) -> RateLimiter:
+    return RateLimiter(**limits, clock=clock, sleep=clock.sleep)
+
+
+def test_bucket_refills_up_to_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(600, clock)  # 10 per second
+    bucket.take(600)
+    assert bucket.wait_time(50) == pytest.approx(5.0)
+    clock.now = 3.0
+    assert bucket.wait_time(50) == pytest.approx(2.0)
+    clock.now = 1000.0
+    assert bucket.wait_time(600) == 0.0 and bucket.level == 600
+    # More than the bucket holds only waits for a full bucket
+    bucket.take(600)
+    assert bucket.wait_time(10_000) == pytest.approx(60.0)
+
+
+@pytest.mark.asyncio
+async def test_waiting_calls_are_served_in_arrival_order():
+    clock = FakeClock()
+    limits = limiter(clock, tpm=600)
+    limits.tokens.take(600)
+    finished = []
+
+    async def call(name: str, tokens: int) -> None:
+        await limits.acquire(tokens)
+        finished.append((name, clock.now))
+
+    # The large prompt arrives first and is not overtaken by the small ones behind it
+    await asyncio.gather(call("large", 300), call("small-1", 10), call("small-2", 10))
+    assert finished == [("large", 30.0), ("small-1", 31.0), ("small-2", 32.0)]
+    assert limits.stats.queued_calls == 3 and limits.stats.max_wait == 30.0
+
+
+@pytest.mark.asyncio
+async def test_settle_charges_or_refunds_reported_tokens():
+    clock = FakeClock()
+    limits = limiter(clock, tpm=600)
+    assert await limits.acquire(100) == 0.0
+    assert limits.tokens.level == 500
+    limits.settle(estimated=100, actual=250)
+    assert limits.tokens.level == 350
+    limits.settle(estimated=100, actual=40)
+    assert limits.tokens.level == 410
+    # No usage reported: the estimate stands
+    limits.settle(estimated=100, actual=0)
+    assert limits.tokens.level == 410
+
+
+@pytest.mark.asyncio
+async def test_throttled_drains_the_buckets():
+    clock = FakeClock()
+    limits = limiter(clock, rpm=60, tpm=6000)
+    await limits.acquire(100)
+    limits.throttled()
+    assert limits.requests.level == 0 and limits.tokens.level == 0
+    # The next call waits for one request (1s) and its 100 tokens (1s)
+    assert await limits.acquire(100) == pytest.approx(1.0)
+    assert limits.stats.throttled == 1 and limits.stats.queued_calls == 1
+
+
+def throttle_error() -> RateLimitError:
+    return RateLimitError("429 Too Many Requests", llm_provider="openai", model="test")
+
+
+@pytest.mark.asyncio
+async def test_complete_retries_throttled_calls(monkeypatch):
+    clock = FakeClock()
+    executor = ETFAgentExecutor(model="test", rate_limiter=limiter(clock, rpm=60, tpm=6000), single_flight=False)
+    outcomes = [throttle_error(), SimpleNamespace(usage=SimpleNamespace(total_tokens=150))]
+
+    async def acompletion(**kwargs):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(agent, "acompletion", acompletion)
+    response = await executor.complete([{"role": "user", "content": "Q"}], prompt_tokens=100)
+    assert response.usage.total_tokens == 150
+    assert executor.rate_limiter.stats.throttled == 1
+    assert clock.now == pytest.approx(1.0)
+    # Drained, refilled by 100 and taken again; then charged the 50 tokens above the estimate
+    assert executor.rate_limiter.tokens.level == pytest.approx(-50)
+
+
+@pytest.mark.asyncio
+async def test_complete_gives_up_after_max_throttled_retries(monkeypatch):
+    clock = FakeClock()
+    executor = ETFAgentExecutor(model="test", rate_limiter=limiter(clock, rpm=60), single_flight=False)
+    calls = 0
+
+    async def acompletion(**kwargs):
+        nonlocal calls
+        calls += 1
+        raise throttle_error()
+
+    monkeypatch.setattr(agent, "acompletion", acompletion)
+    with pytest.raises(RateLimitError):
+        await executor.complete([{"role": "user", "content": "Q"}], prompt_tokens=100)
+    assert calls == MAX_THROTTLED_RETRIES + 1
+    assert executor.rate_limiter.stats.throttled == MAX_THROTTLED_RETRIES
+
+    # Without client-side limits a throttled call is not retried
+    executor.rate_limiter = None
+    calls = 0
+    with pytest.raises(RateLimitError):
+        await executor.complete([{"role": "user", "content": "Q"}], prompt_tokens=100)
+    assert calls == 1
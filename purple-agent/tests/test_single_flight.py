@@ -0,0 +1,88 @@
+"""Coalescing of identical in-flight calls."""
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+class Call:
+    """An LLM call stand-in that runs until released."""
+
+    def __init__(self, result: str = "22"):
+        self.result = result
+        self.started = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+
+    async def __call__(self) -> str:
+        self.started += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+@pytest.mark.asyncio
+async def test_identical_keys_share_one_call():
+    flights, call, other_call = SingleFlight(), Call(), Call("7")
+    waiters = [asyncio.create_task(flights.do("q", call)) for _ in range(3)]
+    other = asyncio.create_task(flights.do("other", other_call))
+    await asyncio.sleep(0)
+    call.release.set()
+    other_call.release.set()
+    assert await asyncio.gather(*waiters) == ["22", "22", "22"]
+    assert await other == "7"
+    assert call.started == 1
+    assert flights.stats.as_dict() == {"calls": 2, "coalesced": 2, "coalesced_rate": 0.5}
+    # Finished flights are forgotten, so a later identical call runs again
+    later = Call("23")
+    later.release.set()
+    assert await flights.do("q", later) == "23"
+
+
+@pytest.mark.asyncio
+async def test_one_waiter_cancelling_keeps_the_shared_call():
+    flights, call = SingleFlight(), Call()
+    first = asyncio.create_task(flights.do("q", call))
+    second = asyncio.create_task(flights.do("q", call))
+    await asyncio.sleep(0)
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    call.release.set()
+    assert await second == "22"
+    assert not call.cancelled
+
+
+@pytest.mark.asyncio
+async def test_last_waiter_cancelling_cancels_the_call():
+    flights, call = SingleFlight(), Call()
+    waiters = [asyncio.create_task(flights.do("q", call)) for _ in range(2)]
+    await asyncio.sleep(0)
+    for waiter in waiters:
+        waiter.cancel()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert all(isinstance(r, asyncio.CancelledError) for r in results)
+    await asyncio.sleep(0)
+    assert call.cancelled
+    assert flights._flights == {}
+
+
+@pytest.mark.asyncio
+async def test_error_reaches_every_waiter_and_clears_the_key():
+    flights, call = SingleFlight(), Call(RuntimeError("provider down"))
+    waiters = [asyncio.create_task(flights.do("q", call)) for _ in range(3)]
+    await asyncio.sleep(0)
+    call.release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert [str(r) for r in results] == ["provider down"] * 3
+    assert flights._flights == {}
+    retry = Call("22")
+    retry.release.set()
+    assert await flights.do("q", retry) == "22"
+    assert retry.started == 1